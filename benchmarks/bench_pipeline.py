@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for the execution pipeline
+
+Runs the daytona_executor pipeline against the in-process FakeDaytona backend
+and reports p50/p95/p99 latency and throughput for single, pooled, batch and
+concurrent runs.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--runs N] [--scale S] [--json FILE]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The fake backend needs no credentials, but Config still requires a key
+os.environ.setdefault("DAYTONA_API_KEY", "benchmark")
+
+from fake_daytona import FakeDaytona, LatencyModel  # noqa: E402
+from daytona_goose.async_executor import AsyncWorkspaceManager, execute_in_workspace_async  # noqa: E402
+from daytona_goose.cleanup import get_cleanup_queue  # noqa: E402
+from daytona_goose.daytona_executor import WorkspaceManager, execute_in_workspace  # noqa: E402
+from daytona_goose.pool import WorkspacePool  # noqa: E402
+
+SNIPPET = "print(sum(range(1000)))"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile of samples using linear interpolation"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, items: int, failures: int,
+              first_error: Optional[str] = None) -> Dict[str, Any]:
+    """Build one report row"""
+    return {
+        "scenario": name,
+        "runs": len(latencies),
+        "failures": failures,
+        "first_error": first_error,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_per_s": items / elapsed if elapsed else 0.0,
+    }
+
+
+def failure_reason(results: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the output of the first failed result, or None if all succeeded"""
+    for result in results:
+        if not result.get("success"):
+            return str(result.get("output", "")).strip() or "unknown error"
+    return None
+
+
+def timed_runs(runs: int, run: Callable[[], Optional[str]]):
+    """Call run() sequentially; it returns None on success or a failure reason
+
+    Returns:
+        (latencies, elapsed time, failures, first failure reason or None)
+    """
+    latencies = []
+    failures = 0
+    first_error = None
+    start = time.perf_counter()
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        error = run()
+        if error is not None:
+            failures += 1
+            first_error = first_error or error
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start, failures, first_error
+
+
+def bench_single(manager: WorkspaceManager, runs: int) -> Dict[str, float]:
+    """Full create / execute / cleanup lifecycle per snippet"""
+    def run():
+        workspace = manager.create_workspace(show_spinner=False)
+        if not workspace:
+            return "Failed to create workspace"
+        result = manager.execute_code(workspace, SNIPPET)
+        manager.cleanup_workspace(workspace)
+        return failure_reason([result])
+
+    latencies, elapsed, failures, first_error = timed_runs(runs, run)
+    return summarize("single", latencies, elapsed, runs, failures, first_error)
+
+
+def bench_pooled(manager: WorkspaceManager, runs: int) -> Dict[str, float]:
+    """Snippets executed on a warm workspace leased from a pool"""
+    pool = WorkspacePool(manager, min_size=1, max_size=1).start()
+    try:
+        latencies, elapsed, failures, first_error = timed_runs(
+            runs, lambda: failure_reason([execute_in_workspace(SNIPPET, pool=pool)])
+        )
+    finally:
+        pool.close()
+    return summarize("pooled", latencies, elapsed, runs, failures, first_error)
+
+
+def bench_batch(manager: WorkspaceManager, runs: int, batch_size: int) -> Dict[str, float]:
+    """One workspace and one upload per batch of snippets"""
+    def run():
+        workspace = manager.create_workspace(show_spinner=False)
+        if not workspace:
+            return "Failed to create workspace"
+        results = manager.execute_batch(workspace, [SNIPPET] * batch_size)
+        manager.cleanup_workspace(workspace)
+        return failure_reason(results)
+
+    latencies, elapsed, failures, first_error = timed_runs(runs, run)
+    return summarize(f"batch x{batch_size}", latencies, elapsed, runs * batch_size, failures, first_error)
+
+
+def bench_concurrent(manager: WorkspaceManager, runs: int, concurrency: int) -> Dict[str, float]:
+    """Independent lifecycles driven concurrently from asyncio"""
+    async_manager = AsyncWorkspaceManager(manager, max_concurrency=concurrency)
+
+    async def one():
+        t0 = time.perf_counter()
+        result = await execute_in_workspace_async(SNIPPET, manager=async_manager)
+        return time.perf_counter() - t0, result
+
+    async def run_all():
+        return await asyncio.gather(*(one() for _ in range(runs)))
+
+    start = time.perf_counter()
+    outcomes = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    latencies = [latency for latency, _ in outcomes]
+    results = [result for _, result in outcomes]
+    failures = sum(1 for result in results if not result.get("success"))
+    return summarize(f"concurrent x{concurrency}", latencies, elapsed, runs, failures, failure_reason(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="runs per scenario")
+    parser.add_argument("--batch-size", type=int, default=10, help="snippets per batch")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent SDK calls")
+    parser.add_argument("--scale", type=float, default=0.1, help="multiplier on simulated latencies")
+    parser.add_argument("--sigma", type=float, default=0.4, help="log-normal latency spread")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of a create failure")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    model = LatencyModel(sigma=args.sigma, scale=args.scale, seed=args.seed,
+                         failure_rates={"create": args.failure_rate})
+    manager = WorkspaceManager(daytona_client=FakeDaytona(model))
+
+    # Silence the pipeline's progress output while measuring
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = [
+            bench_single(manager, args.runs),
+            bench_pooled(manager, args.runs),
+            bench_batch(manager, max(1, args.runs // args.batch_size), args.batch_size),
+            bench_concurrent(manager, args.runs, args.concurrency),
+        ]
+        # Async runs remove their workspaces in the background
+        get_cleanup_queue().drain()
+
+    print(f"{'scenario':<16} {'runs':>5} {'fail':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'items/s':>9}")
+    for row in report:
+        if row["failures"] == row["runs"]:
+            # Timings of runs that all failed measure the failure, not the pipeline
+            print(f"{row['scenario']:<16} {row['runs']:>5} {row['failures']:>5} {'-':>9} {'-':>9} {'-':>9} {'-':>9}")
+        else:
+            print(f"{row['scenario']:<16} {row['runs']:>5} {row['failures']:>5} {row['p50_ms']:>9.1f} "
+                  f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['throughput_per_s']:>9.1f}")
+    for row in report:
+        if row["first_error"]:
+            print(f"{row['scenario']}: first failure: {row['first_error'].splitlines()[-1]}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(row["failures"] == row["runs"] for row in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+In-process stand-in for the Daytona client used by the benchmarks
+
+FakeDaytona mimics the parts of the daytona_sdk client and workspace API that
+daytona_goose uses. Every call sleeps for a simulated latency drawn from a
+log-normal distribution and can fail at a configurable rate, so pipeline
+changes can be measured without a live service.
+"""
+import io
+import json
+import math
+import random
+import tarfile
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+# Must match daytona_executor.BATCH_RESULT_MARKER
+BATCH_RESULT_MARKER = "__DAYTONA_BATCH_RESULTS__"
+
+# Median latency in seconds of each simulated operation
+DEFAULT_LATENCIES = {
+    "create": 0.5,
+    "remove": 0.1,
+    "upload": 0.02,
+    "exec": 0.05,
+}
+
+
+class LatencyModel:
+    """Log-normal latency and failure injection for simulated operations"""
+    def __init__(self, latencies: Optional[Dict[str, float]] = None, sigma: float = 0.4,
+                 failure_rates: Optional[Dict[str, float]] = None, scale: float = 1.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            latencies: Median latency per operation, merged over DEFAULT_LATENCIES
+            sigma: Log-normal shape; larger values give a longer tail
+            failure_rates: Probability per operation of raising an error
+            scale: Multiplier applied to every latency
+            seed: Seed for reproducible runs
+        """
+        self.latencies = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.sigma = sigma
+        self.failure_rates = failure_rates or {}
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def simulate(self, operation: str) -> None:
+        """Sleep for one sampled latency and maybe raise a simulated failure"""
+        with self._lock:
+            delay = self.latencies.get(operation, 0.0) * self.scale * math.exp(self._random.gauss(0, self.sigma))
+            fail = self._random.random() < self.failure_rates.get(operation, 0.0)
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"Simulated {operation} failure")
+
+
+class FakeExecuteResponse:
+    def __init__(self, exit_code: int, result: str):
+        self.exit_code = exit_code
+        self.result = result
+
+
+class FakeFileSystem:
+    def __init__(self, model: LatencyModel):
+        self.model = model
+        self.files: Dict[str, bytes] = {}
+
+    def upload_file(self, path: str, file: bytes) -> None:
+        self.model.simulate("upload")
+        self.files[path] = file
+
+    def download_file(self, path: str) -> bytes:
+        self.model.simulate("upload")
+        return self.files[path]
+
+
+class FakeProcess:
+    def __init__(self, model: LatencyModel, fs: FakeFileSystem):
+        self.model = model
+        self.fs = fs
+
+    def exec(self, command: str, cwd: Optional[str] = None, timeout: Optional[int] = None) -> FakeExecuteResponse:
+        self.model.simulate("exec")
+        if "which python3" in command:
+            return FakeExecuteResponse(0, "/usr/bin/python3\n3.12.0\n")
+        if "run_batch.py" in command:
+            return FakeExecuteResponse(0, BATCH_RESULT_MARKER + json.dumps(self._batch_results()))
+        return FakeExecuteResponse(0, "")
+
+    def _batch_results(self):
+        archives = [data for path, data in self.fs.files.items() if path.endswith(".tar.gz")]
+        if not archives:
+            return []
+        with tarfile.open(fileobj=io.BytesIO(archives[-1]), mode="r:gz") as tar:
+            count = sum(1 for name in tar.getnames() if name.startswith("snippets/") and name.endswith("/cmd"))
+        return [{"exit_code": 0, "output": ""} for _ in range(count)]
+
+
+class FakeWorkspace:
+    def __init__(self, model: LatencyModel, name: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.fs = FakeFileSystem(model)
+        self.process = FakeProcess(model, self.fs)
+
+
+class FakeCreateParams:
+    """Stand-in for daytona_sdk.CreateWorkspaceParams, so no SDK install is needed"""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeDaytona:
+    """Drop-in replacement for daytona_sdk.Daytona with simulated latencies"""
+    params_class = FakeCreateParams
+
+    def __init__(self, model: Optional[LatencyModel] = None):
+        self.model = model or LatencyModel()
+        self.workspaces: Dict[str, FakeWorkspace] = {}
+        self.created = 0
+        self.removed = 0
+        self._lock = threading.Lock()
+
+    def create(self, params=None, timeout: Optional[float] = 60) -> FakeWorkspace:
+        self.model.simulate("create")
+        workspace = FakeWorkspace(self.model, getattr(params, "name", None))
+        with self._lock:
+            self.workspaces[workspace.id] = workspace
+            self.created += 1
+        return workspace
+
+    def remove(self, workspace: FakeWorkspace, timeout: Optional[float] = 60) -> None:
+        self.model.simulate("remove")
+        with self._lock:
+            self.workspaces.pop(workspace.id, None)
+            self.removed += 1
+
+    def list(self):
+        with self._lock:
+            return list(self.workspaces.values())
+
+    def get_current_workspace(self, workspace_id: str) -> FakeWorkspace:
+        with self._lock:
+            return self.workspaces[workspace_id]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the daytona_goose package
+
+Each target is imported in a fresh interpreter several times and the wall
+time of the import statement is reported, so startup regressions in the CLI
+entry points show up without a live Daytona service.
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Statements timed in a fresh interpreter
+TARGETS = {
+    "package": "import daytona_goose",
+    "parse_goose_input": "from daytona_goose.utils import parse_goose_input",
+    "executor module": "import daytona_goose.daytona_executor",
+    "daemon client": "from daytona_goose.daemon import execute_via_daemon",
+    "executor + SDK": "import daytona_goose.daytona_executor, daytona_sdk",
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(statement: str, runs: int) -> list:
+    """
+    Time an import statement in fresh interpreters
+
+    Args:
+        statement: Python import statement to time
+        runs: Number of fresh interpreters to launch
+
+    Returns:
+        List of import durations in seconds, empty if the import failed
+    """
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src_dir, os.getenv("PYTHONPATH")])))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement=statement)],
+            capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            return []
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per target")
+    args = parser.parse_args()
+
+    print(f"{'target':<20} {'median ms':>10} {'min ms':>10}")
+    for name, statement in TARGETS.items():
+        samples = time_import(statement, args.runs)
+        if not samples:
+            print(f"{name:<20} {'failed':>10}")
+            continue
+        print(f"{name:<20} {statistics.median(samples) * 1000:>10.1f} {min(samples) * 1000:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
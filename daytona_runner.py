@@ -35,6 +35,16 @@ def execute_in_daytona(code: str) -> Dict[str, Any]:
     Returns:
         Dictionary with execution results
     """
+    # Use a running executor daemon when available, skipping process startup
+    try:
+        from daytona_goose.daemon import execute_via_daemon
+        result = execute_via_daemon(code)
+    except ImportError:
+        result = None
+    if result is not None:
+        result["error"] = None if result.get("success") else result.get("output")
+        return result
+    
     # Write code to a temporary file
     temp_file = None
     try:
@@ -10,8 +10,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import package functionality
-from daytona_goose import execute_in_workspace
-from daytona_goose.utils import generate_code
+from daytona_goose import execute_in_workspace, generate_and_execute
 
 def run_example():
     """Run a simple example using the package"""
@@ -41,16 +40,14 @@ print(f"Python version: {sys.version}")
     # Option 2: Generate and execute code
     prompt = "Write a function that calculates the nth Fibonacci number"
     
-    print("\n🤖 Generating code with OpenAI...")
-    generated_code = generate_code(prompt)
+    # The workspace is provisioned while OpenAI generates the code
+    print("\n🤖 Generating code with OpenAI while the workspace starts...")
+    result = generate_and_execute(prompt, cleanup=True)
     
-    if generated_code:
+    if result.get("code"):
         print("\nGenerated code:")
         print("--------------")
-        print(generated_code)
-        
-        print("\n🧪 Executing generated code in Daytona...")
-        result = execute_in_workspace(generated_code, cleanup=True)
+        print(result["code"])
         
         print("\nExecution result:")
         print("-----------------")
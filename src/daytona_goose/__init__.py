@@ -5,10 +5,65 @@ This package provides tools to:
 1. Create and manage Daytona workspaces
 2. Execute code in sandboxed environments
 3. Integrate with Goose AI for testing
+4. Keep a pool of warm workspaces for repeated executions
+5. Drive many workspaces concurrently from asyncio
+6. Keep interpreter state across snippets of one Goose session
+7. Pre-install the packages snippets depend on
+8. Run multi-file projects, uploading only changed files
+9. Run code in languages other than Python
+10. Spread workspaces over several Daytona targets
 """
 
 __version__ = "0.1.0"
 
-from .daytona_executor import WorkspaceManager, execute_in_workspace
-from .goose_handler import handle_goose_request
-from .utils import generate_code, load_environment
\ No newline at end of file
+import importlib
+
+# Public names and the submodule that defines them. Submodules are imported on
+# first attribute access so that `import daytona_goose` stays cheap and free of
+# side effects; heavy SDK imports happen only when a workspace is created.
+_LAZY_ATTRIBUTES = {
+    "AdmissionController": "admission",
+    "AdmissionRejected": "admission",
+    "LocalBackend": "backends",
+    "WorkspaceManager": "daytona_executor",
+    "execute_batch": "daytona_executor",
+    "execute_code_blocks": "daytona_executor",
+    "execute_in_workspace": "daytona_executor",
+    "ResultCache": "cache",
+    "DependencyInstaller": "dependencies",
+    "RequirementsSpec": "dependencies",
+    "AsyncWorkspaceManager": "async_executor",
+    "execute_in_workspace_async": "async_executor",
+    "execute_many_async": "async_executor",
+    "generate_and_execute": "async_executor",
+    "generate_and_execute_async": "async_executor",
+    "handle_goose_request": "goose_handler",
+    "KernelSession": "kernel",
+    "execute_in_session": "kernel",
+    "ProjectSync": "project",
+    "execute_project": "project",
+    "WorkspacePool": "pool",
+    "Runner": "runners",
+    "register_runner": "runners",
+    "get_default_pool": "pool",
+    "MultiTargetClient": "targets",
+    "CodeBlockParser": "utils",
+    "extract_code_blocks": "utils",
+    "generate_code": "utils",
+    "generate_code_async": "utils",
+    "load_environment": "utils",
+    "parse_goose_input": "utils",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
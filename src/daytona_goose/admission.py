@@ -0,0 +1,246 @@
+"""
+Admission control in front of WorkspaceManager
+
+Every execution first takes a slot from the process-wide AdmissionController.
+At most max_in_flight executions run at once; the rest wait in a queue that
+is served by priority and, within a priority, round-robin over sessions, so
+one Goose session or CI job firing hundreds of snippets cannot starve the
+others. When the queue is full, the lowest-priority, most recently queued
+request is shed (or the new one, if it is not more urgent), and requests
+that wait longer than the queue timeout give up. Rejections raise
+AdmissionRejected right away instead of piling onto Daytona as creation
+failures. Queue depth, in-flight count and rejections are exported as
+metrics.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Union
+
+from .metrics import registry, span
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request is shed or waits too long for a slot"""
+
+
+def parse_priority(priority: Union[int, str, None]) -> int:
+    """
+    Return the numeric priority (lower is more urgent) of a name or number
+
+    None falls back to DAYTONA_PRIORITY, then "normal".
+    """
+    if priority is None:
+        priority = os.getenv('DAYTONA_PRIORITY', 'normal')
+    if isinstance(priority, int):
+        return priority
+    priority = priority.strip().lower()
+    if priority.lstrip("-").isdigit():
+        return int(priority)
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority} (use {', '.join(PRIORITIES)} or a number)")
+    return PRIORITIES[priority]
+
+
+def _priority_label(priority: int) -> str:
+    for name, value in PRIORITIES.items():
+        if value == priority:
+            return name
+    return str(priority)
+
+
+class Ticket:
+    """A request waiting for, or holding, an execution slot"""
+    def __init__(self, priority: int, session: str, seq: int):
+        self.priority = priority
+        self.session = session
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.rejection: Optional[str] = None
+
+
+class AdmissionController:
+    """Priority queue with per-session fairness and a cap on in-flight executions"""
+    def __init__(self, max_in_flight: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        """
+        Args:
+            max_in_flight: Executions allowed to run at once, defaults to
+                DAYTONA_MAX_IN_FLIGHT or 8
+            max_queue: Requests allowed to wait, defaults to DAYTONA_MAX_QUEUE or 100
+            queue_timeout: Seconds a request may wait before it is rejected,
+                defaults to DAYTONA_QUEUE_TIMEOUT or 300
+        """
+        self.max_in_flight = max_in_flight or int(os.getenv('DAYTONA_MAX_IN_FLIGHT', '8'))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv('DAYTONA_MAX_QUEUE', '100'))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv('DAYTONA_QUEUE_TIMEOUT', '300'))
+
+        # priority -> session -> waiting tickets; session order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[Ticket]]"] = {}
+        self._depth = 0
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._lock = threading.Condition()
+
+    def acquire(self, priority: Union[int, str, None] = None, session: Optional[str] = None) -> Ticket:
+        """
+        Wait for an execution slot
+
+        Args:
+            priority: "high", "normal", "low" or a number (lower runs first),
+                defaults to DAYTONA_PRIORITY or "normal"
+            session: Requests are shared fairly between sessions, defaults
+                to GOOSE_SESSION_ID
+
+        Returns:
+            The granted ticket, to be passed to release()
+
+        Raises:
+            AdmissionRejected: If the request was shed or timed out
+        """
+        ticket = Ticket(parse_priority(priority), session or os.getenv('GOOSE_SESSION_ID', 'default'),
+                        next(self._seq))
+        deadline = ticket.enqueued_at + self.queue_timeout
+        with self._lock:
+            if self._in_flight < self.max_in_flight and self._depth == 0:
+                self._grant(ticket)
+                return ticket
+
+            self._enqueue(ticket)
+            while not ticket.granted and ticket.rejection is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    ticket.rejection = f"Request waited longer than {self.queue_timeout:g}s for an execution slot"
+                    registry.increment("admission_rejected_total", reason="timeout")
+                    break
+                self._lock.wait(remaining)
+            self._update_gauges()
+
+        if ticket.rejection is not None:
+            raise AdmissionRejected(ticket.rejection)
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """Free the slot held by a granted ticket and hand it to the next request"""
+        with self._lock:
+            if not ticket.granted:
+                return
+            ticket.granted = False
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, priority: Union[int, str, None] = None, session: Optional[str] = None) -> Iterator[Ticket]:
+        """
+        Hold an execution slot for the duration of the block
+
+        The wait is recorded as the "queue" phase. See acquire() for the arguments.
+
+        Raises:
+            AdmissionRejected: If the request was shed or timed out
+        """
+        with span("queue"):
+            ticket = self.acquire(priority, session)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _grant(self, ticket: Ticket) -> None:
+        ticket.granted = True
+        self._in_flight += 1
+        self._update_gauges()
+
+    def _enqueue(self, ticket: Ticket) -> None:
+        if self._depth >= self.max_queue:
+            victim = self._least_urgent()
+            if victim is None or victim.priority <= ticket.priority:
+                registry.increment("admission_rejected_total", reason="shed")
+                raise AdmissionRejected(f"Execution queue is full ({self.max_queue} waiting)")
+            # Make room by shedding a less urgent request
+            self._remove(victim)
+            victim.rejection = "Request was shed to make room for a more urgent one"
+            registry.increment("admission_rejected_total", reason="shed")
+            self._lock.notify_all()
+
+        self._queues.setdefault(ticket.priority, OrderedDict()).setdefault(ticket.session, deque()).append(ticket)
+        self._depth += 1
+        self._update_gauges()
+
+    def _least_urgent(self) -> Optional[Ticket]:
+        if not self._queues:
+            return None
+        sessions = self._queues[max(self._queues)]
+        return max((waiting[-1] for waiting in sessions.values()), key=lambda t: t.seq)
+
+    def _remove(self, ticket: Ticket) -> None:
+        sessions = self._queues.get(ticket.priority)
+        waiting = sessions.get(ticket.session) if sessions else None
+        if not waiting or ticket not in waiting:
+            return
+        waiting.remove(ticket)
+        self._depth -= 1
+        if not waiting:
+            del sessions[ticket.session]
+            if not sessions:
+                del self._queues[ticket.priority]
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting tickets: most urgent priority first, sessions in turn"""
+        while self._in_flight < self.max_in_flight and self._queues:
+            priority = min(self._queues)
+            sessions = self._queues[priority]
+            session, waiting = next(iter(sessions.items()))
+            ticket = waiting.popleft()
+            self._depth -= 1
+            if waiting:
+                # Send this session to the back of the rotation
+                sessions.move_to_end(session)
+            else:
+                del sessions[session]
+                if not sessions:
+                    del self._queues[priority]
+            self._grant(ticket)
+        self._update_gauges()
+        self._lock.notify_all()
+
+    def _update_gauges(self) -> None:
+        registry.set_gauge("in_flight", self._in_flight)
+        for priority in PRIORITIES.values():
+            sessions = self._queues.get(priority, {})
+            registry.set_gauge("queue_depth", sum(len(w) for w in sessions.values()),
+                               priority=_priority_label(priority))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-flight count and queue depth per priority and session"""
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "queued": self._depth,
+                "max_queue": self.max_queue,
+                "queues": {
+                    _priority_label(priority): {session: len(waiting) for session, waiting in sessions.items()}
+                    for priority, sessions in sorted(self._queues.items())
+                },
+            }
+
+
+_default_controller: Optional[AdmissionController] = None
+_default_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide AdmissionController, creating it on first use"""
+    global _default_controller
+    with _default_controller_lock:
+        if _default_controller is None:
+            _default_controller = AdmissionController()
+        return _default_controller
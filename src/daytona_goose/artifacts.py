@@ -0,0 +1,183 @@
+"""
+Artifact mode: large output and data files written to local disk
+
+Without it, a program's whole output comes back from Daytona as one string
+that is held in memory and printed. In artifact mode the program's output is
+redirected to a file in the workspace and every file the program writes to
+$DAYTONA_ARTIFACTS_DIR is kept. After the run, output up to a threshold is
+returned inline as usual; larger output and all artifact files are
+downloaded in fixed-size chunks straight to local disk, optionally gzipped,
+and the result carries their paths plus a short preview of the output.
+"""
+import base64
+import os
+import shlex
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_LOCAL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "artifacts")
+
+# Per-run directories inside the workspace
+REMOTE_ROOT = "/home/daytona/.artifacts"
+
+
+def artifacts_enabled() -> bool:
+    """Return True if DAYTONA_ARTIFACTS opts in to artifact mode"""
+    return os.getenv('DAYTONA_ARTIFACTS', 'false').lower() in ('true', '1', 'yes')
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class ArtifactCollector:
+    """Redirects one run's output to files in the workspace and downloads them afterwards"""
+    def __init__(self, workspace: Any, local_dir: Optional[str] = None,
+                 threshold: Optional[int] = None, compress: Optional[bool] = None,
+                 chunk_size: Optional[int] = None, preview_bytes: Optional[int] = None):
+        """
+        Args:
+            workspace: Daytona workspace object
+            local_dir: Where run directories are created, defaults to
+                DAYTONA_ARTIFACT_DIR or ~/.cache/daytona-goose/artifacts
+            threshold: Output larger than this many bytes is saved to a file
+                instead of returned inline, defaults to DAYTONA_ARTIFACT_THRESHOLD or 64 KiB
+            compress: Gzip files larger than threshold in the workspace
+                before download, defaults to DAYTONA_ARTIFACT_COMPRESS
+            chunk_size: Bytes fetched per round trip, defaults to
+                DAYTONA_ARTIFACT_CHUNK_SIZE or 1 MiB
+            preview_bytes: Size of the preview returned for saved output,
+                split between its head and tail, defaults to
+                DAYTONA_ARTIFACT_PREVIEW or 4 KiB
+        """
+        self.workspace = workspace
+        self.local_dir = local_dir or os.getenv('DAYTONA_ARTIFACT_DIR', DEFAULT_LOCAL_DIR)
+        self.threshold = threshold if threshold is not None else int(os.getenv('DAYTONA_ARTIFACT_THRESHOLD', str(64 * 1024)))
+        self.compress = compress if compress is not None else os.getenv('DAYTONA_ARTIFACT_COMPRESS', 'false').lower() in ('true', '1', 'yes')
+        self.chunk_size = chunk_size or int(os.getenv('DAYTONA_ARTIFACT_CHUNK_SIZE', str(1024 * 1024)))
+        self.preview_bytes = preview_bytes if preview_bytes is not None else int(os.getenv('DAYTONA_ARTIFACT_PREVIEW', '4096'))
+
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.remote_dir = f"{REMOTE_ROOT}/{self.run_id}"
+        self.output_path = f"{self.remote_dir}/output.log"
+        self.files_dir = f"{self.remote_dir}/files"
+
+    def wrap(self, command: str) -> str:
+        """
+        Return command with its output redirected to the run's output file
+
+        The program finds the directory for its artifacts in
+        $DAYTONA_ARTIFACTS_DIR. The exit status of command is preserved.
+        """
+        files_dir = shlex.quote(self.files_dir)
+        return (
+            f"mkdir -p {files_dir} && export DAYTONA_ARTIFACTS_DIR={files_dir} && "
+            f"( {command} ) > {shlex.quote(self.output_path)} 2>&1"
+        )
+
+    def _exec(self, command: str) -> str:
+        result = self.workspace.process.exec(command)
+        if result.exit_code != 0:
+            raise RuntimeError(result.result.strip() or f"'{command}' failed with exit code {result.exit_code}")
+        return result.result
+
+    def _read(self, path: str, offset: int, length: int) -> bytes:
+        """Return up to length bytes of a remote file starting at offset"""
+        encoded = self._exec(
+            f"tail -c +{offset + 1} {shlex.quote(path)} | head -c {length} | base64 | tr -d '\\n'"
+        )
+        return base64.b64decode(encoded.strip())
+
+    def _read_tail(self, path: str, length: int) -> bytes:
+        return base64.b64decode(self._exec(f"tail -c {length} {shlex.quote(path)} | base64 | tr -d '\\n'").strip())
+
+    def _list_files(self) -> List[Tuple[str, int]]:
+        """Return (relative path, size) of every file the program left in the artifacts directory"""
+        listing = self._exec(f"cd {shlex.quote(self.files_dir)} && find . -type f -printf '%s %P\\n'")
+        files = []
+        for line in listing.splitlines():
+            size, _, name = line.strip().partition(" ")
+            if name and size.isdigit():
+                files.append((name, int(size)))
+        return sorted(files)
+
+    def _download(self, remote_path: str, size: int, local_path: str) -> Dict[str, Any]:
+        """Download a remote file chunk by chunk, gzipping it in the workspace first if enabled"""
+        compress = self.compress and size > self.threshold
+        if compress:
+            # Program-chosen file names may contain spaces or shell metacharacters
+            source, target = shlex.quote(remote_path), shlex.quote(f"{remote_path}.gz")
+            size = int(self._exec(f"gzip -c {source} > {target} && stat -c %s {target}").strip())
+            remote_path = f"{remote_path}.gz"
+            local_path = f"{local_path}.gz"
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "wb") as f:
+            offset = 0
+            while offset < size:
+                data = self._read(remote_path, offset, self.chunk_size)
+                if not data:
+                    break
+                f.write(data)
+                offset += len(data)
+        return {"path": local_path, "size": offset, "compressed": compress}
+
+    def _preview(self, size: int, local_path: str) -> str:
+        half = self.preview_bytes // 2
+        head = self._read(self.output_path, 0, half).decode("utf-8", "replace")
+        tail = self._read_tail(self.output_path, half).decode("utf-8", "replace")
+        omitted = size - 2 * half
+        return (
+            f"{head}\n... [{omitted} bytes omitted, full output ({_format_size(size)}) saved to {local_path}] ...\n{tail}"
+        )
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Fetch the run's output and artifacts, then remove them from the workspace
+
+        Returns:
+            Dictionary with "output" (inline text or a preview), "output_path"
+            (local copy of large output, else None) and "artifacts" (one
+            {"name", "path", "size", "compressed"} entry per file)
+        """
+        local_run_dir = os.path.join(self.local_dir, self.run_id)
+        try:
+            size = int(self._exec(f"stat -c %s {shlex.quote(self.output_path)}").strip())
+            if size <= self.threshold:
+                output = self._read(self.output_path, 0, max(size, 1)).decode("utf-8", "replace").strip()
+                output_path = None
+            else:
+                saved = self._download(self.output_path, size, os.path.join(local_run_dir, "output.log"))
+                output_path = saved["path"]
+                output = self._preview(size, output_path).strip()
+                print(f"📦 Output ({_format_size(size)}) saved to {output_path}")
+
+            artifacts = []
+            for name, file_size in self._list_files():
+                saved = self._download(f"{self.files_dir}/{name}", file_size,
+                                       os.path.join(local_run_dir, "files", name))
+                saved["name"] = name
+                artifacts.append(saved)
+                print(f"📦 Artifact {name} ({_format_size(file_size)}) saved to {saved['path']}")
+
+            return {"output": output, "output_path": output_path, "artifacts": artifacts}
+        finally:
+            try:
+                self.workspace.process.exec(f"rm -rf {shlex.quote(self.remote_dir)}")
+            except Exception as e:
+                print(f"⚠️ Failed to remove {self.remote_dir} from workspace: {e}")
+
+
+def render_output(result: Dict[str, Any]) -> str:
+    """Return a result's output followed by the paths of any saved output and artifact files"""
+    lines = [result.get("output", "")]
+    if result.get("output_path"):
+        lines.append(f"Full output: {result['output_path']}")
+    for artifact in result.get("artifacts") or []:
+        lines.append(f"Artifact {artifact['name']}: {artifact['path']} ({_format_size(artifact['size'])})")
+    return "\n".join(lines)
@@ -0,0 +1,334 @@
+"""
+Asyncio execution API for running many Daytona workspaces concurrently
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .admission import AdmissionRejected, get_admission_controller
+from .daytona_executor import WorkspaceManager
+from .metrics import export_trace, span, start_trace
+
+
+class AsyncWorkspaceManager:
+    """
+    Asyncio wrapper around WorkspaceManager
+
+    Blocking SDK calls run in worker threads so that a single event loop can
+    drive many workspace creations, uploads and executions at once. A
+    semaphore bounds how many SDK calls are in flight at the same time.
+    """
+    def __init__(self, manager: Optional[WorkspaceManager] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            manager: Synchronous manager to delegate to, created if omitted
+            max_concurrency: Maximum number of concurrent SDK calls, defaults
+                to DAYTONA_MAX_CONCURRENCY or 8
+            timeout: Per-operation timeout in seconds, None for no limit
+        """
+        self.manager = manager or WorkspaceManager()
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv('DAYTONA_MAX_CONCURRENCY', '8'))
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking manager method in a thread under the semaphore and timeout"""
+        async with self._semaphore:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args), self.timeout)
+
+    async def create_workspace(self, name: str = "Goose-Daytona") -> Optional[Any]:
+        """
+        Create a new Daytona workspace without blocking the event loop
+
+        If the caller is cancelled or times out while creation is still in
+        progress, the workspace is removed as soon as it becomes available.
+
+        Args:
+            name: Name for the workspace
+
+        Returns:
+            Workspace object or None if creation failed
+        """
+        state: Dict[str, Any] = {"abandoned": False, "workspace": None}
+        lock = threading.Lock()
+
+        def create() -> Optional[Any]:
+            workspace = self.manager.create_workspace(name, False)
+            with lock:
+                abandoned = state["abandoned"]
+                state["workspace"] = workspace
+            if abandoned and workspace:
+                self.manager.schedule_cleanup(workspace)
+                return None
+            return workspace
+
+        async with self._semaphore:
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(create), self.timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                with lock:
+                    state["abandoned"] = True
+                    workspace = state["workspace"]
+                if workspace:
+                    self.manager.schedule_cleanup(workspace)
+                raise
+
+    async def execute_code(self, workspace: Any, code: str, language: str = "python") -> Dict[str, Any]:
+        """
+        Execute code in the workspace
+
+        Args:
+            workspace: Daytona workspace object
+            code: The code to execute
+            language: Programming language of the code
+
+        Returns:
+            Dictionary with execution results
+        """
+        return await self._call(self.manager.execute_code, workspace, code, language)
+
+    async def stream_code(self, workspace: Any, code: str, language: str = "python",
+                          max_output: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Execute code in the workspace and yield output chunks as they arrive
+
+        Args:
+            workspace: Daytona workspace object
+            code: The code to execute
+            language: Programming language of the code
+            max_output: Byte cap on streamed output
+
+        Yields:
+            Output chunks in the order they were produced
+        """
+        stream = await self._call(self.manager.stream_code, workspace, code, language, max_output)
+        iterator = iter(stream)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            await asyncio.to_thread(stream.close)
+
+    async def cleanup_workspace(self, workspace: Any) -> bool:
+        """
+        Remove a workspace
+
+        Args:
+            workspace: Daytona workspace object
+
+        Returns:
+            True if cleanup was successful, False otherwise
+        """
+        return await self._call(self.manager.cleanup_workspace, workspace)
+
+
+_admission_executor: Optional[ThreadPoolExecutor] = None
+_admission_executor_lock = threading.Lock()
+
+
+def _get_admission_executor() -> ThreadPoolExecutor:
+    """
+    Threads that wait for admission slots
+
+    Waiters get their own pool so that they never occupy the default executor
+    threads that admitted runs need to finish and release their slots.
+    """
+    global _admission_executor
+    with _admission_executor_lock:
+        if _admission_executor is None:
+            admission = get_admission_controller()
+            _admission_executor = ThreadPoolExecutor(
+                max_workers=admission.max_queue + admission.max_in_flight,
+                thread_name_prefix="admission")
+        return _admission_executor
+
+
+@asynccontextmanager
+async def _admitted(priority: Optional[Any], session: Optional[str]) -> AsyncIterator[None]:
+    """Hold a slot of the process-wide AdmissionController without blocking the event loop"""
+    admission = get_admission_controller()
+    with span("queue"):
+        acquiring = asyncio.get_running_loop().run_in_executor(
+            _get_admission_executor(), admission.acquire, priority, session)
+        try:
+            ticket = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The slot may still be granted after the caller gave up; hand it straight back
+            acquiring.add_done_callback(
+                lambda f: None if f.cancelled() or f.exception() else admission.release(f.result()))
+            raise
+    try:
+        yield
+    finally:
+        admission.release(ticket)
+
+
+async def execute_in_workspace_async(code: str, language: str = "python", cleanup: bool = True,
+                                     manager: Optional[AsyncWorkspaceManager] = None,
+                                     timeout: Optional[float] = None, priority: Optional[Any] = None,
+                                     session: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Asyncio counterpart of execute_in_workspace
+
+    Executions are admitted through the process-wide AdmissionController. If
+    the request is shed or waits too long, the result has "rejected" set.
+
+    Args:
+        code: The code to execute
+        language: Programming language of the code
+        cleanup: Whether to clean up the workspace after execution
+        manager: Shared AsyncWorkspaceManager, created if omitted
+        timeout: Overall deadline in seconds for queueing, create and execute
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the request is queued under, defaults to GOOSE_SESSION_ID
+
+    Returns:
+        Dictionary with execution results
+    """
+    with start_trace() as trace:
+        with span("total"):
+            try:
+                manager = manager or AsyncWorkspaceManager()
+                result = await asyncio.wait_for(_run(manager, code, language, cleanup, priority, session), timeout)
+            except asyncio.TimeoutError:
+                result = {"success": False, "output": f"Execution timed out after {timeout}s", "exit_code": 124}
+            except AdmissionRejected as e:
+                print(f"🚦 {e}")
+                result = {"success": False, "output": str(e), "exit_code": 1, "rejected": True}
+            except Exception as e:
+                result = {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+    result["timings"] = trace.timings()
+    export_trace(trace)
+    return result
+
+
+async def _run(manager: AsyncWorkspaceManager, code: str, language: str, cleanup: bool,
+               priority: Optional[Any], session: Optional[str]) -> Dict[str, Any]:
+    async with _admitted(priority, session):
+        workspace = await manager.create_workspace()
+        if not workspace:
+            return {"success": False, "output": "Failed to create workspace", "exit_code": 1}
+
+        try:
+            return await manager.execute_code(workspace, code, language)
+        finally:
+            if cleanup:
+                # Removed in the background, so the result is returned without waiting for it
+                manager.manager.schedule_cleanup(workspace)
+            else:
+                print(f"⚠️ Workspace {workspace.id} is still running")
+
+
+async def execute_many_async(codes: List[str], language: str = "python", cleanup: bool = True,
+                             max_concurrency: Optional[int] = None,
+                             timeout: Optional[float] = None, priority: Optional[Any] = None,
+                             session: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Execute several snippets concurrently, each in its own workspace
+
+    Args:
+        codes: Snippets to execute
+        language: Programming language of the snippets
+        cleanup: Whether to clean up each workspace after execution
+        max_concurrency: Maximum number of concurrent SDK calls
+        timeout: Per-snippet deadline in seconds
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the snippets are queued under, defaults to GOOSE_SESSION_ID
+
+    Returns:
+        List of result dictionaries in the same order as codes
+    """
+    manager = AsyncWorkspaceManager(max_concurrency=max_concurrency)
+    return await asyncio.gather(*(
+        execute_in_workspace_async(code, language, cleanup, manager=manager, timeout=timeout,
+                                   priority=priority, session=session)
+        for code in codes
+    ))
+
+
+async def generate_and_execute_async(prompt: str, model: str = "gpt-3.5-turbo", cleanup: bool = True,
+                                     manager: Optional[AsyncWorkspaceManager] = None,
+                                     priority: Optional[Any] = None,
+                                     session: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Generate code with OpenAI and run it, provisioning the workspace meanwhile
+
+    Workspace creation starts together with the completion request, so the
+    prompt-to-result latency is the longer of the two rather than their sum.
+
+    Args:
+        prompt: The prompt asking for code
+        model: The OpenAI model to use
+        cleanup: Whether to clean up the workspace after execution
+        manager: Shared AsyncWorkspaceManager, created if omitted
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the request is queued under, defaults to GOOSE_SESSION_ID
+
+    Returns:
+        Dictionary with execution results plus the generated "code" and
+        per-phase "timings"
+    """
+    from .utils import generate_code_async
+
+    async def generate() -> Optional[str]:
+        with span("generate", model=model):
+            return await generate_code_async(prompt, model)
+
+    with start_trace() as trace:
+        with span("total"):
+            try:
+                manager = manager or AsyncWorkspaceManager()
+                async with _admitted(priority, session):
+                    workspace_task = asyncio.ensure_future(manager.create_workspace())
+                    try:
+                        code = await generate()
+                    except BaseException:
+                        workspace_task.cancel()
+                        raise
+                    workspace = await workspace_task
+
+                    try:
+                        if not code:
+                            result = {"success": False, "output": "Failed to generate code", "exit_code": 1}
+                        elif not workspace:
+                            result = {"success": False, "output": "Failed to create workspace", "exit_code": 1}
+                        else:
+                            result = await manager.execute_code(workspace, code)
+                    finally:
+                        if workspace and cleanup:
+                            manager.manager.schedule_cleanup(workspace)
+                        elif workspace:
+                            print(f"⚠️ Workspace {workspace.id} is still running")
+                    result["code"] = code
+            except AdmissionRejected as e:
+                print(f"🚦 {e}")
+                result = {"success": False, "output": str(e), "exit_code": 1, "rejected": True}
+            except Exception as e:
+                result = {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+    result["timings"] = trace.timings()
+    export_trace(trace)
+    return result
+
+
+def generate_and_execute(prompt: str, model: str = "gpt-3.5-turbo", cleanup: bool = True) -> Dict[str, Any]:
+    """
+    Blocking wrapper around generate_and_execute_async for synchronous callers
+
+    Args:
+        prompt: The prompt asking for code
+        model: The OpenAI model to use
+        cleanup: Whether to clean up the workspace after execution
+
+    Returns:
+        Dictionary with execution results and the generated "code"
+    """
+    return asyncio.run(generate_and_execute_async(prompt, model, cleanup))
@@ -0,0 +1,365 @@
+"""
+Execution backends behind WorkspaceManager
+
+DAYTONA_BACKEND selects where workspaces live:
+    - daytona (default): remote Daytona workspaces through daytona_sdk
+    - local: workspaces on this machine, for trusted code only
+
+LocalBackend stands in for the Daytona client. Each local workspace is a
+directory under DAYTONA_LOCAL_ROOT that plays the part of /home/daytona, so
+the rest of daytona_goose (pooling, batching, streaming, kernels, resource
+limits) runs unchanged and needs neither the SDK nor an API key. With
+DAYTONA_LOCAL_RUNTIME=process (the default) commands run as subprocesses in
+their own process group, with HOME, TMPDIR and /home/daytona and /tmp paths
+pointed at the workspace directory and a per-workspace virtualenv for
+installed packages. With DAYTONA_LOCAL_RUNTIME=docker each workspace is a
+container with the directory mounted at /home/daytona; "auto" picks docker
+when it is installed.
+
+Paths are only rewritten in the commands daytona_goose runs; code that
+itself opens /tmp or /home/daytona sees the real host paths. The process
+runtime is not a sandbox either: code can read and write anything the
+current user can. Use it for your own code, tests and offline development.
+"""
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LOCAL_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "local")
+
+# Path the workspace directory stands in for
+REMOTE_HOME = "/home/daytona"
+
+# Absolute /home/daytona and /tmp paths in a command, not parts of longer paths
+_PATH_PATTERN = re.compile(r"(?<![\w/.])(" + re.escape(REMOTE_HOME) + r"|/tmp\b)")
+
+META_NAME = ".workspace.json"
+
+
+def backend_name() -> str:
+    """Return the configured backend, "daytona" or "local"
+
+    Raises:
+        ValueError: If DAYTONA_BACKEND names an unknown backend
+    """
+    name = os.getenv('DAYTONA_BACKEND', 'daytona').strip().lower()
+    if name not in ("daytona", "local"):
+        raise ValueError(f"Unknown DAYTONA_BACKEND: {name} (use daytona or local)")
+    return name
+
+
+class ExecuteResponse:
+    """Result of a command, shaped like the SDK's"""
+    def __init__(self, exit_code: int, result: str):
+        self.exit_code = exit_code
+        self.result = result
+
+
+class SessionExecuteRequest:
+    """Stand-in for daytona_sdk.SessionExecuteRequest"""
+    def __init__(self, command: str, var_async: bool = False):
+        self.command = command
+        self.var_async = var_async
+
+
+def session_request(command: str, var_async: bool = True) -> Any:
+    """Return a session command request, using the SDK's class when it is installed"""
+    try:
+        from daytona_sdk import SessionExecuteRequest as request_class
+    except ImportError:
+        request_class = SessionExecuteRequest
+    return request_class(command=command, var_async=var_async)
+
+
+class LocalWorkspaceParams:
+    """Creation parameters accepted by LocalBackend.create, mirroring CreateWorkspaceParams"""
+    def __init__(self, language: str = "python", target: Optional[str] = None, name: Optional[str] = None,
+                 image: Optional[str] = None, labels: Optional[Dict[str, str]] = None):
+        self.language = language
+        self.target = target
+        self.name = name
+        self.image = image
+        self.labels = labels or {}
+
+
+class LocalInstance:
+    """Name and labels of a local workspace, read by cleanup like the SDK's instance"""
+    def __init__(self, name: str, labels: Dict[str, str]):
+        self.name = name
+        self.labels = labels
+
+
+class LocalFileSystem:
+    """workspace.fs for a local workspace"""
+    def __init__(self, workspace: "LocalWorkspace"):
+        self.workspace = workspace
+
+    def upload_file(self, path: str, file: bytes) -> None:
+        local_path = self.workspace.host_path(path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "wb") as f:
+            f.write(file)
+
+    def download_file(self, path: str) -> bytes:
+        with open(self.workspace.host_path(path), "rb") as f:
+            return f.read()
+
+
+class LocalProcess:
+    """workspace.process for a local workspace: commands and background sessions"""
+    def __init__(self, workspace: "LocalWorkspace"):
+        self.workspace = workspace
+        self._sessions: Dict[str, List[subprocess.Popen]] = {}
+        self._lock = threading.Lock()
+
+    def _popen(self, command: str, cwd: Optional[str] = None, **kwargs: Any) -> subprocess.Popen:
+        # A new session per command, so a timeout can kill everything it started
+        return subprocess.Popen(self.workspace.argv(command, cwd), env=self.workspace.env(),
+                                cwd=self.workspace.host_cwd(cwd), start_new_session=True, **kwargs)
+
+    def exec(self, command: str, cwd: Optional[str] = None, timeout: Optional[int] = None) -> ExecuteResponse:
+        proc = self._popen(command, cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                           stdin=subprocess.DEVNULL)
+        try:
+            output, _ = proc.communicate(timeout=timeout or None)
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            output, _ = proc.communicate()
+            return ExecuteResponse(-1, output.decode("utf-8", "replace") + f"\nCommand timed out after {timeout}s")
+        return ExecuteResponse(proc.returncode, output.decode("utf-8", "replace"))
+
+    def create_session(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.setdefault(session_id, [])
+
+    def execute_session_command(self, session_id: str, req: Any) -> ExecuteResponse:
+        if not getattr(req, "var_async", False):
+            return self.exec(req.command)
+        proc = self._popen(req.command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+        with self._lock:
+            self._sessions.setdefault(session_id, []).append(proc)
+        return ExecuteResponse(0, "")
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            processes = self._sessions.pop(session_id, [])
+        for proc in processes:
+            _kill_group(proc)
+
+    def close(self) -> None:
+        """Stop every background session"""
+        for session_id in list(self._sessions):
+            self.delete_session(session_id)
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    if proc.poll() is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        proc.kill()
+    proc.wait()
+
+
+class LocalWorkspace:
+    """A workspace directory on this machine, optionally backed by a container"""
+    def __init__(self, workspace_id: str, root: str, name: str, labels: Dict[str, str],
+                 container: Optional[str] = None):
+        self.id = workspace_id
+        self.root = root
+        self.container = container
+        self.instance = LocalInstance(name, labels)
+        self.fs = LocalFileSystem(self)
+        self.process = LocalProcess(self)
+
+    @property
+    def venv(self) -> str:
+        return os.path.join(self.root, ".venv")
+
+    def in_root(self, path: str) -> bool:
+        """Whether path already points inside the workspace directory"""
+        return re.match(re.escape(self.root) + r"(?![^/\s'\";|&)])", path) is not None
+
+    def host_path(self, path: str) -> str:
+        """Map a workspace path to the file backing it on this machine"""
+        if self.in_root(path):
+            return path
+        if path.startswith(REMOTE_HOME):
+            return self.root + path[len(REMOTE_HOME):]
+        if path == "/tmp" or path.startswith("/tmp/"):
+            return os.path.join(self.root, ".tmp") + path[len("/tmp"):]
+        if not os.path.isabs(path):
+            return os.path.join(self.root, path)
+        return path
+
+    def host_command(self, command: str) -> str:
+        """Point the /home/daytona and /tmp paths of a command at the workspace directory"""
+        if self.container:
+            return command
+        # Leave paths alone that already point at the workspace, e.g. a root under /tmp
+        return _PATH_PATTERN.sub(
+            lambda m: m.group(1) if self.in_root(command[m.start():]) else self.host_path(m.group(1)),
+            command)
+
+    def host_cwd(self, cwd: Optional[str]) -> Optional[str]:
+        if self.container:
+            return None
+        return self.host_path(cwd) if cwd else self.root
+
+    def argv(self, command: str, cwd: Optional[str] = None) -> List[str]:
+        if self.container:
+            return ["docker", "exec", "-w", cwd or REMOTE_HOME, self.container, "bash", "-c", command]
+        return ["bash", "-c", self.host_command(command)]
+
+    def env(self) -> Dict[str, str]:
+        if self.container:
+            return dict(os.environ)
+        path = os.getenv("PATH", "/usr/local/bin:/usr/bin:/bin")
+        env = {
+            "PATH": f"{os.path.join(self.venv, 'bin')}{os.pathsep}{path}" if os.path.isdir(self.venv) else path,
+            "HOME": self.root,
+            "TMPDIR": os.path.join(self.root, ".tmp"),
+            "LANG": os.getenv("LANG", "C.UTF-8"),
+        }
+        if os.path.isdir(self.venv):
+            env["VIRTUAL_ENV"] = self.venv
+        return env
+
+
+class LocalBackend:
+    """Daytona client facade that creates workspaces on this machine"""
+    params_class = LocalWorkspaceParams
+
+    def __init__(self, root: Optional[str] = None, runtime: Optional[str] = None,
+                 image: Optional[str] = None, venv: Optional[bool] = None):
+        """
+        Args:
+            root: Directory holding the workspaces, defaults to
+                DAYTONA_LOCAL_ROOT or ~/.cache/daytona-goose/local
+            runtime: "process", "docker" or "auto", defaults to
+                DAYTONA_LOCAL_RUNTIME or "process"
+            image: Container image for the docker runtime, defaults to
+                DAYTONA_LOCAL_IMAGE or python:3.12-slim
+            venv: Give each process workspace its own virtualenv for
+                installed packages, defaults to DAYTONA_LOCAL_VENV or true
+
+        Raises:
+            ValueError: If the runtime is unknown, or docker is requested but not installed
+        """
+        self.root = os.path.abspath(os.path.expanduser(root or os.getenv('DAYTONA_LOCAL_ROOT', DEFAULT_LOCAL_ROOT)))
+        runtime = (runtime or os.getenv('DAYTONA_LOCAL_RUNTIME', 'process')).lower()
+        if runtime == "auto":
+            runtime = "docker" if shutil.which("docker") else "process"
+        if runtime not in ("process", "docker"):
+            raise ValueError(f"Unknown DAYTONA_LOCAL_RUNTIME: {runtime} (use process, docker or auto)")
+        if runtime == "docker" and not shutil.which("docker"):
+            raise ValueError("DAYTONA_LOCAL_RUNTIME=docker but docker is not installed")
+        self.runtime = runtime
+        self.image = image or os.getenv('DAYTONA_LOCAL_IMAGE', 'python:3.12-slim')
+        self.venv = venv if venv is not None else os.getenv('DAYTONA_LOCAL_VENV', 'true').lower() in ('true', '1', 'yes')
+        self._workspaces: Dict[str, LocalWorkspace] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def create(self, params: Any, timeout: Optional[float] = None) -> LocalWorkspace:
+        """
+        Create a workspace directory, plus its virtualenv or container
+
+        Raises:
+            RuntimeError: If the virtualenv or container could not be created
+        """
+        workspace_id = f"local-{uuid.uuid4().hex[:12]}"
+        root = os.path.join(self.root, workspace_id)
+        os.makedirs(os.path.join(root, ".tmp"))
+        name = getattr(params, "name", None) or workspace_id
+        labels = dict(getattr(params, "labels", None) or {})
+        container = None
+        try:
+            if self.runtime == "docker":
+                container = f"daytona-goose-{workspace_id}"
+                self._run(["docker", "run", "-d", "--name", container,
+                           "--user", f"{os.getuid()}:{os.getgid()}", "-e", f"HOME={REMOTE_HOME}",
+                           "-v", f"{root}:{REMOTE_HOME}", "-w", REMOTE_HOME,
+                           getattr(params, "image", None) or self.image, "sleep", "infinity"])
+            elif self.venv:
+                # Shares the host's packages; pip run from the venv installs into it
+                self._run([sys.executable, "-m", "venv", "--system-site-packages", "--without-pip",
+                           os.path.join(root, ".venv")])
+        except Exception:
+            shutil.rmtree(root, ignore_errors=True)
+            raise
+
+        with open(os.path.join(root, META_NAME), "w") as f:
+            json.dump({"name": name, "labels": labels, "container": container}, f)
+        workspace = LocalWorkspace(workspace_id, root, name, labels, container)
+        with self._lock:
+            self._workspaces[workspace_id] = workspace
+        return workspace
+
+    def _run(self, argv: List[str]) -> None:
+        result = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv[:3])} failed: {result.stdout.decode('utf-8', 'replace').strip()}")
+
+    def _load(self, workspace_id: str) -> Optional[LocalWorkspace]:
+        """Reopen a workspace created by another process"""
+        root = os.path.join(self.root, workspace_id)
+        try:
+            with open(os.path.join(root, META_NAME)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return LocalWorkspace(workspace_id, root, meta.get("name", workspace_id),
+                              meta.get("labels") or {}, meta.get("container"))
+
+    def get_current_workspace(self, workspace_id: str) -> LocalWorkspace:
+        """
+        Raises:
+            ValueError: If no local workspace has this ID
+        """
+        with self._lock:
+            workspace = self._workspaces.get(workspace_id)
+            if workspace is None:
+                workspace = self._load(workspace_id)
+                if workspace is None:
+                    raise ValueError(f"Local workspace {workspace_id} not found")
+                self._workspaces[workspace_id] = workspace
+            return workspace
+
+    def list(self) -> List[LocalWorkspace]:
+        """Return every workspace under the root, including other processes' ones"""
+        workspaces = []
+        for workspace_id in sorted(os.listdir(self.root)):
+            try:
+                workspaces.append(self.get_current_workspace(workspace_id))
+            except ValueError:
+                continue
+        return workspaces
+
+    def remove(self, workspace: Any) -> None:
+        """Stop a workspace's sessions and container and delete its directory"""
+        with self._lock:
+            local = self._workspaces.pop(workspace.id, None) or self._load(workspace.id)
+        if local is None:
+            raise ValueError(f"Local workspace {workspace.id} not found")
+        local.process.close()
+        if local.container:
+            subprocess.run(["docker", "rm", "-f", local.container],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            # Background sessions started by another process are not in close()'s handles
+            try:
+                subprocess.run(["pkill", "-f", re.escape(local.root + os.sep)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except OSError:
+                pass
+        shutil.rmtree(local.root, ignore_errors=True)
@@ -0,0 +1,196 @@
+"""
+Content-addressed result cache for deterministic snippets
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "results.db")
+
+# Result fields that describe one run, or files of it on local disk, rather than the snippet's outcome
+PER_RUN_FIELDS = ("cached", "hedge", "timings", "output_path", "artifacts")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+CREATE TABLE IF NOT EXISTS interpreters (
+    language TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+"""
+
+
+class ResultCache:
+    """
+    SQLite-backed LRU + TTL cache of execution results
+
+    Entries are keyed by a hash of the code, language, toolchain version and
+    declared dependencies. The database file is shared between processes, so
+    repeated CLI invocations can reuse each other's results. Only successful
+    results are stored, without their PER_RUN_FIELDS.
+    """
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        """
+        Args:
+            path: SQLite database file, defaults to DAYTONA_RESULT_CACHE_PATH
+            max_entries: Entries kept before least recently used ones are evicted
+            ttl: Seconds an entry stays valid
+        """
+        self.path = path or os.getenv('DAYTONA_RESULT_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('DAYTONA_RESULT_CACHE_SIZE', '1000'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('DAYTONA_RESULT_CACHE_TTL', '86400'))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(code: str, language: str, interpreter_version: str,
+                 dependencies: Optional[Iterable[str]] = None) -> str:
+        """
+        Compute the cache key for a snippet
+
+        Args:
+            code: The code to execute
+            language: Programming language of the code
+            interpreter_version: Version of the interpreter that runs the code
+            dependencies: Declared package requirements
+
+        Returns:
+            Hex SHA-256 digest identifying the snippet and its environment
+        """
+        payload = json.dumps({
+            "code": code,
+            "language": language,
+            "interpreter": interpreter_version,
+            "dependencies": sorted(dependencies or []),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached result and mark it as recently used
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            The cached result dictionary, or None if absent or expired
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT result, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a result, evicting expired and least recently used entries
+
+        Args:
+            key: Key from make_key
+            result: Result dictionary to cache
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now)
+            )
+            conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def lookup(self, code: str, language: str = "python",
+               dependencies: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a snippet using the last interpreter version seen for its language
+
+        Args:
+            code: The code to execute
+            language: Programming language of the code
+            dependencies: Declared package requirements
+
+        Returns:
+            Cached result marked with "cached": True, or None on a miss
+        """
+        version = self.get_interpreter_version(language)
+        if version is None:
+            return None
+        result = self.get(self.make_key(code, language, version, dependencies))
+        if result is not None:
+            result["cached"] = True
+        return result
+
+    def store(self, code: str, language: str, dependencies: Optional[Iterable[str]],
+              interpreter_version: str, result: Dict[str, Any]) -> None:
+        """
+        Cache a successful result and remember the interpreter version it ran on
+
+        Results whose output was saved to a local file are skipped: their
+        output is only a preview pointing at a file that may be gone later.
+
+        Args:
+            code: The executed code
+            language: Programming language of the code
+            dependencies: Declared package requirements
+            interpreter_version: Toolchain version reported by the workspace
+                for the language
+            result: Result dictionary from execution
+        """
+        if not result.get("success") or not interpreter_version or result.get("output_path"):
+            return
+        result = {name: value for name, value in result.items() if name not in PER_RUN_FIELDS}
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO interpreters (language, version) VALUES (?, ?)",
+                (language, interpreter_version)
+            )
+        self.put(self.make_key(code, language, interpreter_version, dependencies), result)
+
+    def get_interpreter_version(self, language: str) -> Optional[str]:
+        """Return the interpreter version last recorded for a language"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT version FROM interpreters WHERE language = ?", (language,)).fetchone()
+        return row[0] if row else None
+
+    def clear(self) -> None:
+        """Remove every cached result"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+
+def cache_enabled() -> bool:
+    """Return True if DAYTONA_RESULT_CACHE opts in to result caching"""
+    return os.getenv('DAYTONA_RESULT_CACHE', 'false').lower() in ('true', '1', 'yes')
@@ -0,0 +1,271 @@
+"""
+Background workspace removal and orphan reaping
+
+Removing a workspace takes a round trip to Daytona that callers should not
+wait for, so removals are handed to a small thread pool that retries with
+backoff. Every workspace this host creates is labelled with its owner
+process and recorded in an ownership directory (one file per workspace, safe
+to share between processes). On startup the reaper removes workspaces whose
+owner process has died without cleaning up.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set
+
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "workspaces")
+
+# Name prefix shared by every workspace the package creates
+WORKSPACE_NAME_PREFIX = "Goose-Daytona"
+
+LABEL_APP = "daytona-goose"
+LABEL_HOST = "daytona-goose-host"
+LABEL_PID = "daytona-goose-pid"
+LABEL_PERSISTENT = "daytona-goose-persistent"
+
+
+def workspace_labels(persistent: bool = False) -> Dict[str, str]:
+    """
+    Return the labels identifying a workspace's owner
+
+    Args:
+        persistent: True for workspaces meant to outlive the creating process
+            (kernel sessions, projects); the reaper never removes those
+    """
+    return {
+        LABEL_APP: "true",
+        LABEL_HOST: socket.gethostname(),
+        LABEL_PID: str(os.getpid()),
+        LABEL_PERSISTENT: "true" if persistent else "false",
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class OwnershipRegistry:
+    """One JSON file per live workspace created on this host"""
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv('DAYTONA_WORKSPACE_REGISTRY', DEFAULT_REGISTRY_DIR)
+
+    def _path(self, workspace_id: str) -> str:
+        return os.path.join(self.directory, f"{workspace_id}.json")
+
+    def record(self, workspace_id: str, name: str) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(workspace_id), "w") as f:
+                json.dump({"workspace_id": workspace_id, "name": name, "pid": os.getpid(),
+                           "host": socket.gethostname(), "created_at": time.time()}, f)
+        except OSError as e:
+            print(f"⚠️ Failed to record workspace {workspace_id}: {e}")
+
+    def forget(self, workspace_id: str) -> None:
+        try:
+            os.remove(self._path(workspace_id))
+        except OSError:
+            pass
+
+    def entries(self) -> List[Dict[str, Any]]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+
+class CleanupQueue:
+    """Removes workspaces in background threads, retrying failed removals"""
+    def __init__(self, workers: Optional[int] = None, retries: Optional[int] = None,
+                 backoff: float = 1.0):
+        """
+        Args:
+            workers: Concurrent removals, defaults to DAYTONA_CLEANUP_WORKERS or 4
+            retries: Attempts per workspace, defaults to DAYTONA_CLEANUP_RETRIES or 3
+            backoff: Seconds before the first retry, doubled on each further one
+        """
+        self.workers = workers or int(os.getenv('DAYTONA_CLEANUP_WORKERS', '4'))
+        self.retries = retries or int(os.getenv('DAYTONA_CLEANUP_RETRIES', '3'))
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="daytona-cleanup")
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, manager: Any, workspace: Any) -> Future:
+        """
+        Schedule removal of a workspace
+
+        Args:
+            manager: WorkspaceManager whose cleanup_workspace performs the removal
+            workspace: Daytona workspace object
+
+        Returns:
+            Future resolving to True once the workspace is removed
+        """
+        try:
+            future = self._executor.submit(self._remove, manager, workspace)
+        except RuntimeError:
+            # The interpreter is shutting down, e.g. a hedge loser arriving late; remove it here
+            future = Future()
+            future.set_result(self._remove(manager, workspace))
+            return future
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _remove(self, manager: Any, workspace: Any) -> bool:
+        delay = self.backoff
+        for attempt in range(self.retries):
+            if manager.cleanup_workspace(workspace):
+                return True
+            if attempt + 1 < self.retries:
+                time.sleep(delay)
+                delay *= 2
+        print(f"❌ Giving up on removing workspace {workspace.id}; the reaper will retry later")
+        return False
+
+    @property
+    def pending(self) -> int:
+        """Number of removals not finished yet"""
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for scheduled removals to finish
+
+        Args:
+            timeout: Seconds to wait, None waits indefinitely
+
+        Returns:
+            True if every removal finished in time
+        """
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+
+_default_queue: Optional[CleanupQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def get_cleanup_queue() -> CleanupQueue:
+    """Return the process-wide CleanupQueue, creating it on first use"""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = CleanupQueue()
+        return _default_queue
+
+
+def _labels_of(workspace: Any) -> Dict[str, str]:
+    instance = getattr(workspace, "instance", None)
+    return getattr(instance, "labels", None) or getattr(workspace, "labels", None) or {}
+
+
+def _name_of(workspace: Any) -> str:
+    instance = getattr(workspace, "instance", None)
+    return getattr(instance, "name", None) or getattr(workspace, "name", None) or ""
+
+
+def reap_orphans(manager: Any, registry: Optional[OwnershipRegistry] = None) -> int:
+    """
+    Remove workspaces created on this host by processes that no longer exist
+
+    Both the local ownership registry and the labels of the workspaces listed
+    by Daytona are checked, so orphans are found even if the registry file
+    was lost. Persistent workspaces are left alone.
+
+    Args:
+        manager: WorkspaceManager used to look up and remove workspaces
+        registry: Ownership registry, defaults to DAYTONA_WORKSPACE_REGISTRY
+
+    Returns:
+        Number of workspaces removed
+    """
+    registry = registry or OwnershipRegistry()
+    host = socket.gethostname()
+    orphans: Dict[str, Any] = {}
+
+    for entry in registry.entries():
+        if entry.get("host") == host and not _pid_alive(int(entry.get("pid", 0))):
+            orphans[entry["workspace_id"]] = None
+
+    try:
+        for workspace in manager.daytona_client.list():
+            labels = _labels_of(workspace)
+            if labels.get(LABEL_APP) != "true" or labels.get(LABEL_HOST) != host:
+                continue
+            if labels.get(LABEL_PERSISTENT) == "true" or not _name_of(workspace).startswith(WORKSPACE_NAME_PREFIX):
+                continue
+            try:
+                pid = int(labels.get(LABEL_PID, "0"))
+            except ValueError:
+                continue
+            if not _pid_alive(pid):
+                orphans[workspace.id] = workspace
+    except Exception as e:
+        print(f"⚠️ Could not list workspaces for reaping: {e}")
+
+    removed = 0
+    for workspace_id, workspace in orphans.items():
+        try:
+            if workspace is None:
+                workspace = manager.daytona_client.get_current_workspace(workspace_id)
+        except Exception:
+            # Already gone on the Daytona side
+            registry.forget(workspace_id)
+            continue
+        print(f"🧹 Removing orphaned workspace {workspace_id}")
+        if manager.cleanup_workspace(workspace):
+            removed += 1
+    return removed
+
+
+def start_reaper(manager: Any) -> Optional[threading.Thread]:
+    """
+    Reap orphaned workspaces in a background thread unless DAYTONA_REAP_ON_START is false
+
+    Args:
+        manager: WorkspaceManager used to look up and remove workspaces
+
+    Returns:
+        The reaper thread, or None if reaping is disabled
+    """
+    if os.getenv('DAYTONA_REAP_ON_START', 'true').lower() not in ('true', '1', 'yes'):
+        return None
+
+    def run():
+        try:
+            reap_orphans(manager)
+        except Exception as e:
+            print(f"⚠️ Orphan reaper failed: {e}")
+
+    thread = threading.Thread(target=run, name="daytona-reaper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Long-lived local executor daemon and its thin client
+
+The daemon keeps the Daytona client, its connection pool and a pool of warm
+workspaces alive between requests. Entry points talk to it over a Unix socket
+using newline-delimited JSON, so a request costs a socket round-trip instead
+of interpreter startup, SDK imports and client construction.
+
+The client half of this module only uses the standard library.
+"""
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "daemon.sock")
+
+
+def get_socket_path() -> str:
+    """Return the daemon socket path from DAYTONA_DAEMON_SOCKET or the default"""
+    return os.getenv('DAYTONA_DAEMON_SOCKET', DEFAULT_SOCKET_PATH)
+
+
+def daemon_enabled() -> bool:
+    """Return False if DAYTONA_DAEMON explicitly disables the daemon client"""
+    return os.getenv('DAYTONA_DAEMON', 'true').lower() in ('true', '1', 'yes')
+
+
+def daemon_available(socket_path: Optional[str] = None) -> bool:
+    """Return True if the daemon client is enabled and a daemon socket exists"""
+    return daemon_enabled() and os.path.exists(socket_path or get_socket_path())
+
+
+def request_daemon(payload: Dict[str, Any], on_chunk: Optional[Callable[[str], None]] = None,
+                   socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Send one request to the daemon and wait for its result
+
+    Args:
+        payload: Request with an "action" key and its arguments
+        on_chunk: Called with each output chunk of a streaming request
+        socket_path: Socket to connect to, defaults to get_socket_path()
+
+    Returns:
+        The daemon's result dictionary, or None if no daemon is listening
+    """
+    socket_path = socket_path or get_socket_path()
+    if not daemon_available(socket_path):
+        return None
+
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    except OSError:
+        return None
+
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if "chunk" in message:
+                if on_chunk:
+                    on_chunk(message["chunk"])
+            elif "result" in message:
+                return message["result"]
+    return {"success": False, "output": "Daemon closed the connection", "exit_code": 1}
+
+
+def execute_via_daemon(code: str, language: str = "python",
+                       on_chunk: Optional[Callable[[str], None]] = None,
+                       priority: Optional[str] = None,
+                       session: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Execute code through a running daemon
+
+    Args:
+        code: The code to execute
+        language: Programming language of the code
+        on_chunk: Stream output to this callback as it is produced
+        priority: Queue priority in the daemon, defaults to DAYTONA_PRIORITY
+        session: Session the request is queued under, defaults to GOOSE_SESSION_ID
+
+    Returns:
+        Dictionary with execution results, or None if no daemon is listening
+    """
+    return request_daemon(
+        {"action": "stream" if on_chunk else "execute", "code": code, "language": language,
+         "priority": priority or os.getenv('DAYTONA_PRIORITY'),
+         "session": session or os.getenv('GOOSE_SESSION_ID')},
+        on_chunk=on_chunk
+    )
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single client connection"""
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            action = request.get("action")
+            if action == "execute":
+                result = self.server.execute(request)
+            elif action == "stream":
+                result = self.server.stream(request, self._send_chunk)
+            elif action == "ping":
+                result = {"success": True, "output": "pong", "exit_code": 0}
+            elif action == "stats":
+                from .admission import get_admission_controller
+                stats: Dict[str, Any] = dict(self.server.pool.stats())
+                stats["admission"] = get_admission_controller().stats()
+                client = self.server.pool.manager.daytona_client
+                if hasattr(client, "stats"):
+                    # Per-target load and latency when spread over DAYTONA_TARGETS
+                    stats["targets"] = client.stats()
+                result = {"success": True, "output": json.dumps(stats), "exit_code": 0}
+            elif action == "metrics":
+                from .metrics import registry
+                result = {"success": True, "output": registry.to_prometheus(), "exit_code": 0}
+            else:
+                result = {"success": False, "output": f"Unknown action: {action}", "exit_code": 1}
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except Exception as e:
+            result = {"success": False, "output": f"Daemon error: {str(e)}", "exit_code": 1}
+        self._send({"result": result})
+
+    def _send_chunk(self, chunk: str) -> None:
+        self._send({"chunk": chunk})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class ExecutorDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server holding a warm WorkspacePool and optional ResultCache"""
+    daemon_threads = True
+
+    def __init__(self, socket_path: Optional[str] = None):
+        from .cache import ResultCache, cache_enabled
+        from .cleanup import start_reaper
+        from .pool import get_default_pool
+
+        self.socket_path = socket_path or get_socket_path()
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        # The process-wide pool, so hedging in this process can lease from it too
+        self.pool = get_default_pool()
+        start_reaper(self.pool.manager)
+        self.cache = ResultCache() if cache_enabled() else None
+        super().__init__(self.socket_path, DaemonRequestHandler)
+        os.chmod(self.socket_path, 0o600)
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a snippet on a pooled workspace"""
+        from .daytona_executor import execute_in_workspace
+
+        return execute_in_workspace(
+            request["code"], request.get("language", "python"),
+            pool=self.pool, cache=self.cache,
+            priority=request.get("priority"), session=request.get("session")
+        )
+
+    def stream(self, request: Dict[str, Any], send: Callable[[str], None]) -> Dict[str, Any]:
+        """Run a snippet on a pooled workspace, forwarding output chunks as they arrive"""
+        from .admission import AdmissionRejected, get_admission_controller
+
+        try:
+            with get_admission_controller().admit(request.get("priority"), request.get("session")):
+                workspace = self.pool.acquire()
+                if not workspace:
+                    return {"success": False, "output": "Failed to lease workspace", "exit_code": 1}
+
+                try:
+                    stream = self.pool.manager.stream_code(
+                        workspace, request["code"], request.get("language", "python"),
+                        on_close=lambda: self.pool.release(workspace)
+                    )
+                except Exception:
+                    # No stream exists yet to release the workspace on close
+                    try:
+                        self.pool.release(workspace)
+                    except Exception as e:
+                        print(f"⚠️ Failed to release workspace {workspace.id}: {e}")
+                    raise
+                try:
+                    for chunk in stream:
+                        send(chunk)
+                finally:
+                    stream.close()
+        except AdmissionRejected as e:
+            return {"success": False, "output": str(e), "exit_code": 1, "rejected": True}
+        return {"success": stream.exit_code == 0, "output": "", "exit_code": stream.exit_code}
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def main():
+    """Command-line entry point: `serve` runs the daemon, `ping`/`stats`/`metrics` query it"""
+    command = sys.argv[1] if len(sys.argv) > 1 else "serve"
+
+    if command == "serve":
+        server = ExecutorDaemon()
+
+        # Shut down cleanly so the pooled workspaces are removed
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        print(f"🚀 Daytona executor daemon listening on {server.socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    if command in ("ping", "stats", "metrics"):
+        result = request_daemon({"action": command})
+        if result is None:
+            print(f"No daemon listening on {get_socket_path()}")
+            return 1
+        print(result.get("output", ""))
+        return 0
+
+    print(f"Unknown command: {command}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,21 +2,65 @@
 """
 Daytona workspace management and code execution module
 """
+import io
 import os
 import sys
 import json
 import time
+import uuid
+import shlex
 import signal
+import tarfile
 import threading
+import itertools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional, Union
 
-from daytona_sdk import CreateWorkspaceParams, Daytona, DaytonaConfig
 from dotenv import load_dotenv
 
+from .admission import AdmissionRejected, get_admission_controller
+from .artifacts import ArtifactCollector, artifacts_enabled, render_output
+from .backends import LocalBackend, backend_name
+from .cache import ResultCache, cache_enabled
+from .cleanup import OwnershipRegistry, get_cleanup_queue, start_reaper, workspace_labels
+from .daemon import daemon_available, execute_via_daemon
+from .dependencies import DependencyInstaller, resolve_requirements
+from .hedging import PROVISION_PHASE, acquire_hedged, hedging_enabled
+from .metrics import export_trace, span, start_trace
+from .resilience import RetryPolicy, call_resilient, get_breaker
+from .runners import Runner, find_runner, get_runner, runner_for_path
+from .streaming import ExecutionStream
+from .targets import get_target_client
+
 # Active workspaces for cleanup
 active_workspaces = []
 
+# Marker separating the batch runner's JSON report from any stray output
+BATCH_RESULT_MARKER = "__DAYTONA_BATCH_RESULTS__"
+
+# Driver uploaded with a batch; runs each snippet's command in its own directory and process group
+BATCH_RUNNER_SCRIPT = """
+import json, os, signal, subprocess, sys
+timeout = float(sys.argv[1]) if sys.argv[1] != "none" else None
+results = []
+for name in sorted(os.listdir("snippets")):
+    workdir = os.path.join("snippets", name)
+    with open(os.path.join(workdir, "cmd")) as f:
+        command = f.read()
+    proc = subprocess.Popen(["sh", "-c", command], cwd=workdir, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, start_new_session=True)
+    try:
+        output, _ = proc.communicate(timeout=timeout)
+        results.append({"exit_code": proc.returncode, "output": output.decode("utf-8", "replace")})
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        output, _ = proc.communicate()
+        results.append({"exit_code": 124, "output": output.decode("utf-8", "replace") + "\\nTimed out after " + str(timeout) + "s"})
+print(%r + json.dumps(results))
+""" % BATCH_RESULT_MARKER
+
 def signal_handler(signum, frame):
     """Handle Ctrl+C to display active workspaces and exit"""
     print("\n\n⚠️ Process cancelled by user")
@@ -29,39 +73,258 @@ def signal_handler(signum, frame):
         print("- The Daytona CLI")
     sys.exit(0)
 
-# Register signal handler
-signal.signal(signal.SIGINT, signal_handler)
+def install_signal_handler():
+    """Register signal_handler for Ctrl+C; called by entry points, not on import"""
+    signal.signal(signal.SIGINT, signal_handler)
+
+class ReadinessPolicy:
+    """Exponential backoff settings for polling a new workspace until it responds"""
+    def __init__(self, timeout: float = 60.0, initial_delay: float = 0.1,
+                 max_delay: float = 2.0, backoff: float = 2.0,
+                 probe_command: str = "echo ready"):
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.probe_command = probe_command
+
+    def delays(self):
+        """Yield successive sleep intervals between probes"""
+        delay = self.initial_delay
+        while True:
+            yield delay
+            delay = min(delay * self.backoff, self.max_delay)
+
+# Exit statuses of `timeout` when it stopped the command (TERM, then KILL after the grace period)
+TIMEOUT_EXIT_CODES = (124, 137)
+
+# 128 + SIGXCPU, raised once the CPU-time ulimit is exhausted
+CPU_LIMIT_EXIT_CODE = 152
+
+class ResourceLimits:
+    """
+    Per-run wall-clock, CPU-time and memory caps enforced inside the workspace
+    
+    The exec command is wrapped in coreutils `timeout`, which signals the
+    whole process group, and a shell that applies ulimits before exec'ing the
+    command. Output is unbuffered so whatever was printed before a kill is
+    still returned.
+    """
+    def __init__(self, timeout: Optional[float] = None, cpu_seconds: Optional[int] = None,
+                 memory_mb: Optional[int] = None, kill_grace: float = 2.0):
+        """
+        Args:
+            timeout: Wall-clock limit in seconds, None or 0 for no limit
+            cpu_seconds: CPU-time limit in seconds
+            memory_mb: Virtual memory limit in megabytes
+            kill_grace: Seconds between SIGTERM and SIGKILL on timeout
+        """
+        self.timeout = timeout or None
+        self.cpu_seconds = cpu_seconds or None
+        self.memory_mb = memory_mb or None
+        self.kill_grace = kill_grace
+
+    def wrap(self, command: str, apply_timeout: bool = True) -> str:
+        """
+        Return command wrapped so that the limits are enforced
+        
+        Args:
+            command: Shell command to run
+            apply_timeout: False to apply only the ulimits, e.g. when the
+                command enforces its own per-item timeouts
+        """
+        steps = []
+        if self.cpu_seconds:
+            # Soft limit only, so the process gets SIGXCPU rather than SIGKILL
+            steps.append(f"ulimit -S -t {int(self.cpu_seconds)}")
+        if self.memory_mb:
+            steps.append(f"ulimit -v {int(self.memory_mb) * 1024}")
+        steps.append(command)
+        wrapped = f"sh -c {shlex.quote('; '.join(steps))}"
+        if self.timeout and apply_timeout:
+            wrapped = f"timeout -k {self.kill_grace:g} {self.timeout:g} {wrapped}"
+        return f"env PYTHONUNBUFFERED=1 {wrapped}"
+
+    def client_timeout(self) -> Optional[int]:
+        """Seconds the SDK call itself may take, as a backstop to the in-sandbox limit"""
+        if not self.timeout:
+            return None
+        return int(self.timeout + self.kill_grace) + 30
+
+    def describe(self, exit_code: int) -> Optional[str]:
+        """Return a message if exit_code means a limit stopped the run"""
+        if exit_code < 0:
+            # Killed by a signal without a shell in between
+            exit_code = 128 - exit_code
+        if self.timeout and exit_code in TIMEOUT_EXIT_CODES:
+            return f"Timed out after {self.timeout:g}s"
+        if self.cpu_seconds and exit_code == CPU_LIMIT_EXIT_CODE:
+            return f"CPU time limit of {int(self.cpu_seconds)}s exceeded"
+        return None
+
+# Single remote command that reports interpreter path, version and installed packages
+CAPABILITY_PROBE_COMMAND = (
+    "PY=$(which python3 || which python); echo \"$PY\"; "
+    "\"$PY\" -c 'import sys; print(sys.version.split()[0])'; "
+    "\"$PY\" -m pip list --format=freeze 2>/dev/null; true"
+)
+
+class WorkspaceCapabilities:
+    """Interpreter and package details of a workspace, probed once and cached"""
+    def __init__(self, interpreter: str = "python3", python_version: str = "",
+                 packages: Optional[Dict[str, str]] = None):
+        self.interpreter = interpreter
+        self.python_version = python_version
+        self.packages = packages or {}
+        # Toolchain versions of other languages, probed on first use
+        self.versions: Dict[str, str] = {}
+
+    @classmethod
+    def from_probe_output(cls, output: str) -> "WorkspaceCapabilities":
+        """Build capabilities from the output of CAPABILITY_PROBE_COMMAND"""
+        lines = [line.strip() for line in output.strip().splitlines() if line.strip()]
+        if not lines or not lines[0].startswith("/"):
+            return cls()
+        
+        interpreter = lines[0]
+        python_version = lines[1] if len(lines) > 1 else ""
+        packages = {}
+        for line in lines[2:]:
+            name, sep, version = line.partition("==")
+            if sep:
+                packages[name.lower()] = version
+        return cls(interpreter, python_version, packages)
+
+# Seconds daytona_sdk waits for a new workspace to start
+SDK_CREATE_TIMEOUT = 60.0
 
 class Config:
     """Server configuration class that loads environment variables for Daytona setup"""
     def __init__(self):
         load_dotenv()
 
+        # "daytona" for remote workspaces, "local" for trusted code on this machine
+        self.backend = backend_name()
         self.api_key = os.getenv('DAYTONA_API_KEY')
-        if not self.api_key:
+        # Multi-target setups may carry one key per target instead
+        self.targets = os.getenv('DAYTONA_TARGETS')
+        if not self.api_key and not self.targets and self.backend == "daytona":
             raise ValueError("DAYTONA_API_KEY is required")
 
         self.server_url = os.getenv('DAYTONA_SERVER_URL', 'https://app.daytona.io/api')
         self.target = os.getenv('DAYTONA_TARGET', 'us')
-        self.timeout = float(os.getenv('DAYTONA_TIMEOUT', '30.0'))
+        # Deadline of each SDK call; DAYTONA_TIMEOUT_<OPERATION> overrides it per operation
+        self.timeout = float(os.getenv('DAYTONA_TIMEOUT', str(SDK_CREATE_TIMEOUT)))
         self.verify_ssl = os.getenv('VERIFY_SSL', 'false').lower() in ('true', '1', 'yes')
 
+        # Warm workspace pool settings
+        self.pool_min_size = int(os.getenv('DAYTONA_POOL_MIN_SIZE', '1'))
+        self.pool_max_size = int(os.getenv('DAYTONA_POOL_MAX_SIZE', '4'))
+        self.pool_idle_ttl = float(os.getenv('DAYTONA_POOL_IDLE_TTL', '300'))
+
+        # Readiness probe settings for newly created workspaces
+        self.ready_timeout = float(os.getenv('DAYTONA_READY_TIMEOUT', '60.0'))
+        self.ready_initial_delay = float(os.getenv('DAYTONA_READY_INITIAL_DELAY', '0.1'))
+        self.ready_max_delay = float(os.getenv('DAYTONA_READY_MAX_DELAY', '2.0'))
+
+        # Streaming execution settings
+        self.stream_max_output = int(os.getenv('DAYTONA_STREAM_MAX_OUTPUT', str(10 * 1024 * 1024)))
+        self.stream_chunk_size = int(os.getenv('DAYTONA_STREAM_CHUNK_SIZE', str(64 * 1024)))
+        self.stream_poll_interval = float(os.getenv('DAYTONA_STREAM_POLL_INTERVAL', '0.2'))
+
+        # Base image for new workspaces; dependency sets may map to their own
+        self.image = os.getenv('DAYTONA_IMAGE')
+
+        # Per-run resource limits, 0 disables a limit
+        self.exec_timeout = float(os.getenv('DAYTONA_EXEC_TIMEOUT', '300'))
+        self.cpu_limit = int(os.getenv('DAYTONA_CPU_LIMIT', '0'))
+        self.memory_limit_mb = int(os.getenv('DAYTONA_MEMORY_LIMIT_MB', '0'))
+
+        # Retries of idempotent SDK calls and the circuit breaker on the Daytona API
+        self.retry_attempts = int(os.getenv('DAYTONA_RETRY_ATTEMPTS', '3'))
+        self.retry_base_delay = float(os.getenv('DAYTONA_RETRY_BASE_DELAY', '0.2'))
+        self.retry_max_delay = float(os.getenv('DAYTONA_RETRY_MAX_DELAY', '5.0'))
+        self.breaker_threshold = int(os.getenv('DAYTONA_BREAKER_THRESHOLD', '5'))
+        self.breaker_reset = float(os.getenv('DAYTONA_BREAKER_RESET', '30'))
+
     def get_daytona_config(self):
         """Return a DaytonaConfig object"""
+        from daytona_sdk import DaytonaConfig
+
         return DaytonaConfig(
             api_key=self.api_key,
             server_url=self.server_url,
             target=self.target
         )
 
+    def deadline(self, operation: str) -> float:
+        """
+        Return the deadline in seconds of an SDK operation, e.g. "create" or "upload"
+        
+        Unless DAYTONA_TIMEOUT_CREATE says otherwise, creation gets at least the
+        SDK's own start timeout, so the SDK reports a slow start before we give up.
+        """
+        override = os.getenv(f'DAYTONA_TIMEOUT_{operation.upper()}')
+        if override:
+            return float(override)
+        if operation == "create":
+            return max(self.timeout, SDK_CREATE_TIMEOUT)
+        return self.timeout
+
+    def get_retry_policy(self) -> RetryPolicy:
+        """Return the RetryPolicy configured from the environment"""
+        return RetryPolicy(
+            attempts=self.retry_attempts,
+            base_delay=self.retry_base_delay,
+            max_delay=self.retry_max_delay
+        )
+
+    def get_resource_limits(self) -> ResourceLimits:
+        """Return the ResourceLimits configured from the environment"""
+        return ResourceLimits(
+            timeout=self.exec_timeout,
+            cpu_seconds=self.cpu_limit,
+            memory_mb=self.memory_limit_mb
+        )
+
+    def get_readiness_policy(self) -> ReadinessPolicy:
+        """Return the ReadinessPolicy configured from the environment"""
+        return ReadinessPolicy(
+            timeout=self.ready_timeout,
+            initial_delay=self.ready_initial_delay,
+            max_delay=self.ready_max_delay
+        )
+
 class WorkspaceManager:
     """Manages Daytona workspaces for code execution"""
-    def __init__(self):
+    def __init__(self, daytona_client: Optional[Any] = None):
+        """
+        Args:
+            daytona_client: Client to use instead of constructing a Daytona
+                client from the environment, e.g. a fake for benchmarks. When
+                DAYTONA_BACKEND=local, a LocalBackend is used; when
+                DAYTONA_TARGETS is set, the shared MultiTargetClient.
+        """
         try:
             self.config = Config()
-            self.daytona_client = Daytona(config=self.config.get_daytona_config())
-            self.temp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp')
-            os.makedirs(self.temp_dir, exist_ok=True)
+            self.readiness_policy = self.config.get_readiness_policy()
+            self.resource_limits = self.config.get_resource_limits()
+            self.retry_policy = self.config.get_retry_policy()
+            # Shared by every manager in the process, so one outage is seen by all
+            self.api_breaker = get_breaker("api", self.config.breaker_threshold, self.config.breaker_reset)
+            if daytona_client is None and self.config.backend == "local":
+                daytona_client = LocalBackend()
+            if daytona_client is None and self.config.targets:
+                # Shared scheduler spreading workspaces over DAYTONA_TARGETS
+                daytona_client = get_target_client()
+            if daytona_client is None:
+                # Deferred so importing this module does not pull in the SDK
+                from daytona_sdk import Daytona
+
+                daytona_client = Daytona(config=self.config.get_daytona_config())
+            self.daytona_client = daytona_client
+            self.capabilities: Dict[str, WorkspaceCapabilities] = {}
+            self.ownership = OwnershipRegistry()
             self.spinner_done = True
         except Exception as e:
             print(f"Error initializing WorkspaceManager: {e}")
@@ -77,50 +340,219 @@ class WorkspaceManager:
             sys.stdout.write('\b')
             time.sleep(0.1)
 
-    def create_workspace(self, name="Goose-Daytona") -> Optional[Any]:
+    def _call(self, operation: str, fn, *args, retry: bool = True, api: bool = False,
+              deadline: bool = True, on_late_result=None, **kwargs) -> Any:
+        """
+        Make an SDK call with the configured deadline, retries and, for control-plane calls, the circuit breaker
+        
+        Args:
+            operation: Operation name, selects DAYTONA_TIMEOUT_<OPERATION>
+            fn: SDK function to call
+            retry: False for calls that are not safe to repeat
+            api: True for calls to the Daytona API (create, remove) that the
+                circuit breaker should gate
+            deadline: False to call fn on the calling thread, relying on the
+                SDK's own timeout, e.g. for calls that must work during
+                interpreter shutdown
+            on_late_result: Called with the result of a call that finished
+                after its deadline
+        """
+        return call_resilient(
+            fn, *args, operation=operation, policy=self.retry_policy, retry=retry,
+            deadline=self.config.deadline(operation) if deadline else None, breaker=self.api_breaker if api else None,
+            on_late_result=on_late_result, **kwargs
+        )
+
+    def wait_until_ready(self, workspace, policy: Optional[ReadinessPolicy] = None) -> bool:
+        """
+        Poll a workspace with a cheap command until it responds
+        
+        Args:
+            workspace: Daytona workspace object
+            policy: Backoff and deadline settings, defaults to the configured policy
+            
+        Returns:
+            True once the workspace answers the probe, False if the deadline passed
+        """
+        policy = policy or self.readiness_policy
+        deadline = time.monotonic() + policy.timeout
+        for delay in policy.delays():
+            try:
+                result = workspace.process.exec(policy.probe_command)
+                if result.exit_code == 0:
+                    return True
+            except Exception:
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+        return False
+
+    def probe_capabilities(self, workspace) -> WorkspaceCapabilities:
+        """
+        Query a workspace for its interpreter, Python version and packages
+        
+        Args:
+            workspace: Daytona workspace object
+            
+        Returns:
+            The probed capabilities, also stored in the per-workspace cache
+        """
+        try:
+            with span("probe"):
+                result = self._call("probe", workspace.process.exec, CAPABILITY_PROBE_COMMAND)
+            capabilities = WorkspaceCapabilities.from_probe_output(result.result)
+        except Exception as e:
+            print(f"⚠️ Capability probe failed: {e}")
+            capabilities = WorkspaceCapabilities()
+        self.capabilities[workspace.id] = capabilities
+        return capabilities
+
+    def get_capabilities(self, workspace) -> WorkspaceCapabilities:
+        """
+        Return cached capabilities for a workspace, probing on first use
+        
+        Args:
+            workspace: Daytona workspace object
+            
+        Returns:
+            WorkspaceCapabilities for the workspace
+        """
+        capabilities = self.capabilities.get(workspace.id)
+        if capabilities is None:
+            capabilities = self.probe_capabilities(workspace)
+        return capabilities
+
+    def runtime_version(self, workspace, language: str = "python") -> str:
+        """
+        Return the toolchain version that runs a language in a workspace
+        
+        Args:
+            workspace: Daytona workspace object
+            language: Programming language
+            
+        Returns:
+            The first line of the runner's version command, the Python
+            version for Python, or "" if it could not be determined
+        """
+        runner = get_runner(language)
+        capabilities = self.get_capabilities(workspace)
+        if runner.version is None:
+            return capabilities.python_version
+        version = capabilities.versions.get(runner.name)
+        if version is None:
+            try:
+                with span("probe", language=runner.name):
+                    result = self._call("probe", workspace.process.exec, runner.version)
+                lines = result.result.strip().splitlines() if result.exit_code == 0 else []
+                version = lines[0].strip() if lines else ""
+            except Exception as e:
+                print(f"⚠️ Version probe for {runner.name} failed: {e}")
+                version = ""
+            capabilities.versions[runner.name] = version
+        return version
+
+    def create_workspace(self, name="Goose-Daytona", show_spinner: bool = True,
+                         image: Optional[str] = None, persistent: bool = False) -> Optional[Any]:
         """
         Create a new Daytona workspace
         
         Args:
             name: Name for the workspace
+            show_spinner: Whether to animate a spinner on stdout while waiting.
+                Disable when creating several workspaces concurrently.
+            image: Image to start from, defaults to DAYTONA_IMAGE or the
+                Daytona default
+            persistent: True if the workspace should outlive this process;
+                otherwise it is recorded so the orphan reaper can remove it
+                if the process dies first
             
         Returns:
             Workspace object or None if creation failed
         """
+        # Timed as a whole so hedging compares like with like
+        with span(PROVISION_PHASE):
+            return self._create_workspace(name, show_spinner, image, persistent)
+
+    def _create_workspace(self, name: str, show_spinner: bool, image: Optional[str],
+                          persistent: bool) -> Optional[Any]:
+        spinner_thread = None
         try:
             print(f"\n📁 Creating workspace {name}...")
             
             # Show spinner while creating workspace
-            self.spinner_done = False
-            spinner_thread = threading.Thread(target=self.show_spinner_until_done)
-            spinner_thread.start()
+            if show_spinner:
+                self.spinner_done = False
+                spinner_thread = threading.Thread(target=self.show_spinner_until_done)
+                spinner_thread.start()
             
-            workspace_params = CreateWorkspaceParams(
+            # Backends other than Daytona bring their own parameter class
+            params_class = getattr(self.daytona_client, "params_class", None)
+            if params_class is None:
+                from daytona_sdk import CreateWorkspaceParams as params_class
+
+            workspace_params = params_class(
                 language="python",
                 target=self.config.target,
-                name=name
+                name=name,
+                image=image or self.config.image,
+                labels=workspace_labels(persistent)
             )
             
-            workspace = self.daytona_client.create(workspace_params)
+            with span("create"):
+                # A creation that finishes after its deadline is removed again
+                # Not retried: a failed attempt may still have created a workspace
+                workspace = self._call("create", self.daytona_client.create, workspace_params,
+                                       retry=False, api=True, on_late_result=self.schedule_cleanup)
             active_workspaces.append(workspace)
+            if not persistent:
+                self.ownership.record(workspace.id, name)
             
-            # Wait for workspace to initialize
-            time.sleep(3)
+            # Wait for workspace to answer before handing it out
+            with span("ready"):
+                ready = self.wait_until_ready(workspace)
             
             # Stop the spinner
-            self.spinner_done = True
-            spinner_thread.join()
+            if spinner_thread:
+                self.spinner_done = True
+                spinner_thread.join()
+            
+            if not ready:
+                print(f"❌ Workspace {workspace.id} did not become ready within {self.readiness_policy.timeout}s")
+                self.cleanup_workspace(workspace)
+                return None
+            
+            self.probe_capabilities(workspace)
             
             print(f"✅ Workspace created successfully (ID: {workspace.id})")
             return workspace
         except Exception as e:
-            self.spinner_done = True
-            if 'spinner_thread' in locals():
+            if spinner_thread:
+                self.spinner_done = True
                 spinner_thread.join()
             print(f"❌ Workspace creation error: {e}")
             return None
 
-    def execute_code(self, workspace, code: str, language="python") -> Dict[str, Any]:
+    def _upload_code(self, workspace, code: str, runner: Runner) -> str:
+        """Upload code straight from memory and return its remote path"""
+        remote_path = runner.source_path(code)
+        try:
+            with span("upload"):
+                self._call("upload", workspace.fs.upload_file, remote_path, code.encode('utf-8'))
+            print(f"✅ Code uploaded to {remote_path}")
+        except Exception as e:
+            print(f"⚠️ File upload failed: {e}")
+            # Fall back to process.exec
+            workspace.process.exec(
+                f"mkdir -p {os.path.dirname(remote_path)} && cat > {remote_path} << 'EOF'\n{code}\nEOF"
+            )
+        return remote_path
+
+    def execute_code(self, workspace, code: str, language="python",
+                     limits: Optional[ResourceLimits] = None,
+                     artifacts: Optional[bool] = None) -> Dict[str, Any]:
         """
         Execute code in the workspace
         
@@ -128,51 +560,50 @@ class WorkspaceManager:
             workspace: Daytona workspace object
             code: The code to execute
             language: Programming language of the code
+            limits: Resource limits for this run, defaults to the configured ones
+            artifacts: Save large output and the files the program writes to
+                $DAYTONA_ARTIFACTS_DIR to local disk, defaults to DAYTONA_ARTIFACTS
             
         Returns:
-            Dictionary with execution results
+            Dictionary with execution results. "timed_out" is True if a
+            limit stopped the run; output printed before that is kept. In
+            artifact mode "output_path" and "artifacts" give the local files.
         """
         try:
+            runner = get_runner(language)
             print(f"📝 Deploying code to workspace {workspace.id}...")
             
-            # Write code to a temp file
-            temp_file = os.path.join(self.temp_dir, f"code_{workspace.id}.{language}")
-            os.makedirs(os.path.dirname(temp_file), exist_ok=True)
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(code)
-            
-            # Read the temp file
-            with open(temp_file, 'rb') as f:
-                file_content = f.read()
-            
-            # Upload to workspace
-            remote_path = f"/home/daytona/code.{language}"
-            try:
-                workspace.fs.upload_file(remote_path, file_content)
-                print(f"✅ Code uploaded to {remote_path}")
-            except Exception as e:
-                print(f"⚠️ File upload failed: {e}")
-                # Fall back to process.exec
-                workspace.process.exec(f"cat > {remote_path} << 'EOF'\n{code}\nEOF")
-            
-            # Find Python interpreter
-            python_check = workspace.process.exec("which python3 || which python")
-            if python_check.exit_code == 0:
-                python_path = python_check.result.strip()
-            else:
-                python_path = "python3"  # Default
+            remote_path = self._upload_code(workspace, code, runner)
+            python_path = self.get_capabilities(workspace).interpreter
 
+            limits = limits or self.resource_limits
+            command = limits.wrap(runner.command(remote_path, python_path))
+            collector = ArtifactCollector(workspace) if (artifacts if artifacts is not None else artifacts_enabled()) else None
             print(f"🧪 Executing code in workspace {workspace.id}...")
-            result = workspace.process.exec(f"{python_path} {remote_path} 2>&1")
+            with span("exec", language=runner.name):
+                result = workspace.process.exec(
+                    collector.wrap(command) if collector else command + " 2>&1",
+                    timeout=limits.client_timeout()
+                )
+            
+            saved = {}
+            if collector:
+                with span("download"):
+                    saved = collector.collect()
             
             print(f"Execution result (exit code {result.exit_code}):")
-            output = result.result.strip()
+            output = saved.pop("output") if saved else result.result.strip()
+            limit_message = limits.describe(result.exit_code)
+            if limit_message:
+                print(f"⏱️ {limit_message}")
+                output = f"{output}\n{limit_message}".strip()
             
             return {
                 "success": result.exit_code == 0,
                 "output": output,
-                "exit_code": result.exit_code
+                "exit_code": result.exit_code,
+                "timed_out": limit_message is not None,
+                **saved
             }
         except Exception as e:
             print(f"❌ Execution error: {e}")
@@ -181,13 +612,125 @@ class WorkspaceManager:
                 "output": str(e),
                 "exit_code": 1
             }
-        finally:
-            # Clean up temp file
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except:
-                pass
+
+    def stream_code(self, workspace, code: str, language="python",
+                    max_output: Optional[int] = None,
+                    on_close: Optional[Any] = None) -> ExecutionStream:
+        """
+        Start code in the workspace and return an iterator over its output
+        
+        Args:
+            workspace: Daytona workspace object
+            code: The code to execute
+            language: Programming language of the code
+            max_output: Byte cap on streamed output, defaults to DAYTONA_STREAM_MAX_OUTPUT
+            on_close: Called when the stream finishes
+            
+        Returns:
+            ExecutionStream yielding output chunks; exit_code is set once exhausted
+        """
+        runner = get_runner(language)
+        print(f"📝 Deploying code to workspace {workspace.id}...")
+        remote_path = self._upload_code(workspace, code, runner)
+        python_path = self.get_capabilities(workspace).interpreter
+        
+        print(f"🧪 Streaming execution in workspace {workspace.id}...")
+        stream = ExecutionStream(
+            workspace,
+            self.resource_limits.wrap(runner.command(remote_path, python_path)),
+            max_output=max_output or self.config.stream_max_output,
+            chunk_size=self.config.stream_chunk_size,
+            poll_interval=self.config.stream_poll_interval,
+            on_close=on_close
+        )
+        stream.start()
+        return stream
+
+    def execute_batch(self, workspace, codes: List[str], language="python",
+                      timeout: Optional[float] = None,
+                      artifacts: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        Execute several snippets in one workspace with a single upload and exec
+        
+        Each snippet runs in its own directory and process so that files and
+        interpreter state do not leak between snippets.
+        
+        Args:
+            workspace: Daytona workspace object
+            codes: The snippets to execute
+            language: Programming language of the snippets
+            timeout: Per-snippet wall-clock limit in seconds, defaults to
+                DAYTONA_EXEC_TIMEOUT
+            artifacts: Save each snippet's large output and files to local
+                disk, defaults to DAYTONA_ARTIFACTS. The snippets then run one
+                after another through execute_code.
+            
+        Returns:
+            List of result dictionaries in the same order as codes
+        """
+        if timeout is None:
+            timeout = self.resource_limits.timeout
+        if artifacts if artifacts is not None else artifacts_enabled():
+            limits = ResourceLimits(timeout, self.resource_limits.cpu_seconds, self.resource_limits.memory_mb)
+            return [self.execute_code(workspace, code, language, limits, artifacts=True) for code in codes]
+        try:
+            runner = get_runner(language)
+            python_path = self.get_capabilities(workspace).interpreter
+            print(f"📝 Deploying {len(codes)} snippets to workspace {workspace.id}...")
+            
+            # Pack every snippet, its run command and the driver into one archive
+            archive = io.BytesIO()
+            with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+                members = [("run_batch.py", BATCH_RUNNER_SCRIPT)]
+                for i, code in enumerate(codes):
+                    source = f"code.{runner.extension}"
+                    if runner.compiled:
+                        # Copy into the shared build cache so binaries are reused across runs
+                        cached = runner.source_path(code)
+                        command = (f"mkdir -p {os.path.dirname(cached)} && cp {source} {cached} && "
+                                   f"{runner.command(cached, python_path)}")
+                    else:
+                        command = runner.command(source, python_path)
+                    members += [(f"snippets/{i:04d}/{source}", code), (f"snippets/{i:04d}/cmd", command)]
+                for path, content in members:
+                    data = content.encode("utf-8")
+                    info = tarfile.TarInfo(path)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+            
+            batch_dir = f"/home/daytona/batch_{uuid.uuid4().hex[:8]}"
+            with span("upload", snippets=len(codes)):
+                self._call("upload", workspace.fs.upload_file, f"{batch_dir}.tar.gz", archive.getvalue())
+            
+            print(f"🧪 Executing batch in workspace {workspace.id}...")
+            timeout_arg = "none" if timeout is None else str(timeout)
+            with span("exec", language=runner.name, snippets=len(codes)):
+                # Snippets get the CPU and memory caps; run_batch.py applies the timeout per snippet
+                batch_command = self.resource_limits.wrap(f"{python_path} run_batch.py {timeout_arg} 2>&1",
+                                                          apply_timeout=False)
+                result = workspace.process.exec(
+                    f"mkdir -p {batch_dir} && tar -xzf {batch_dir}.tar.gz -C {batch_dir} && "
+                    f"cd {batch_dir} && {batch_command}; "
+                    f"rm -rf {batch_dir} {batch_dir}.tar.gz"
+                )
+            
+            output = result.result
+            if BATCH_RESULT_MARKER not in output:
+                raise RuntimeError(f"Batch runner failed: {output.strip()}")
+            report = json.loads(output.split(BATCH_RESULT_MARKER, 1)[1].strip().splitlines()[0])
+            
+            return [
+                {
+                    "success": item["exit_code"] == 0,
+                    "output": item["output"].strip(),
+                    "exit_code": item["exit_code"],
+                    "timed_out": item["exit_code"] == 124
+                }
+                for item in report
+            ]
+        except Exception as e:
+            print(f"❌ Batch execution error: {e}")
+            return [{"success": False, "output": str(e), "exit_code": 1} for _ in codes]
 
     def cleanup_workspace(self, workspace) -> bool:
         """
@@ -200,7 +743,13 @@ class WorkspaceManager:
             True if cleanup was successful, False otherwise
         """
         try:
-            self.daytona_client.remove(workspace)
+            with span("remove"):
+                # CleanupQueue retries failed removals itself. Called directly, bounded by the
+                # SDK's own timeout: removals queued at exit run after thread pools shut down
+                self._call("remove", self.daytona_client.remove, workspace, retry=False, api=True,
+                           deadline=False)
+            self.capabilities.pop(workspace.id, None)
+            self.ownership.forget(workspace.id)
             if workspace in active_workspaces:
                 active_workspaces.remove(workspace)
             print(f"✅ Workspace {workspace.id} removed successfully")
@@ -209,38 +758,521 @@ class WorkspaceManager:
             print(f"❌ Failed to remove workspace: {e}")
             return False
 
-def execute_in_workspace(code: str, language: str = "python", cleanup: bool = True) -> Dict[str, Any]:
+    def schedule_cleanup(self, workspace) -> Any:
+        """
+        Remove a workspace in the background, retrying on failure
+        
+        Args:
+            workspace: Daytona workspace object
+            
+        Returns:
+            Future resolving to True once the workspace is removed
+        """
+        return get_cleanup_queue().submit(self, workspace)
+
+def execute_in_workspace(code: str, language: str = "python", cleanup: bool = True,
+                         pool: Optional[Any] = None, cache: Optional[Any] = None,
+                         dependencies: Optional[List[str]] = None,
+                         limits: Optional[ResourceLimits] = None,
+                         priority: Optional[Any] = None,
+                         session: Optional[str] = None,
+                         hedge: Optional[bool] = None,
+                         workspace: Optional[Any] = None) -> Dict[str, Any]:
     """
     High-level function to execute code in a Daytona workspace
     
+    The result includes a "timings" dictionary with the seconds spent in each
+    phase (queue, create, ready, probe, upload, exec, remove, total, ...), which
+    is also exported according to the DAYTONA_METRICS_* settings.
+    
+    Executions are admitted through the process-wide AdmissionController. If
+    the request is shed or waits too long, the result has "rejected" set.
+    
     Args:
         code: The code to execute
         language: Programming language of the code
         cleanup: Whether to clean up the workspace after execution
+        pool: Optional WorkspacePool to lease a warm workspace from. When
+            given, the workspace is returned to the pool instead of removed.
+        cache: Optional ResultCache. Repeat runs of the same snippet on the
+            same interpreter and dependencies are answered without Daytona.
+        dependencies: Package requirements installed before the code runs,
+            merged with DAYTONA_REQUIREMENTS and, if DAYTONA_AUTO_INSTALL is
+            set, the code's detected imports. Part of the cache key.
+        limits: Timeout, CPU and memory caps for the run, defaults to the
+            DAYTONA_EXEC_TIMEOUT / DAYTONA_CPU_LIMIT / DAYTONA_MEMORY_LIMIT_MB settings
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the request is queued under for fair sharing,
+            defaults to GOOSE_SESSION_ID
+        hedge: Start a second workspace if creation is slow and use
+            whichever is ready first, defaults to DAYTONA_HEDGE. The result's
+            "hedge" entry reports whether a hedge ran and which side won.
+        workspace: Workspace created in advance to run on instead of
+            creating one; it is cleaned up like a created one
         
     Returns:
         Dictionary with execution results
     """
+    with start_trace() as trace:
+        with span("total"):
+            try:
+                with get_admission_controller().admit(priority, session):
+                    result = _execute_in_workspace(code, language, cleanup, pool, cache, dependencies, limits, hedge,
+                                                   workspace)
+            except AdmissionRejected as e:
+                print(f"🚦 {e}")
+                if workspace is not None and cleanup:
+                    WorkspaceManager().schedule_cleanup(workspace)
+                result = {"success": False, "output": str(e), "exit_code": 1, "rejected": True}
+    result["timings"] = trace.timings()
+    export_trace(trace)
+    return result
+
+def _execute_in_workspace(code: str, language: str, cleanup: bool, pool: Optional[Any],
+                          cache: Optional[Any], dependencies: Optional[List[str]],
+                          limits: Optional[ResourceLimits] = None,
+                          hedge: Optional[bool] = None,
+                          provisioned: Optional[Any] = None) -> Dict[str, Any]:
     try:
-        manager = WorkspaceManager()
-        workspace = manager.create_workspace()
+        requirements = resolve_requirements(code, dependencies, language)
+        if cache is not None:
+            with span("cache_lookup"):
+                cached = cache.lookup(code, language, requirements.requirements)
+            if cached is not None:
+                print("♻️ Returning cached result")
+                if provisioned is not None and cleanup:
+                    WorkspaceManager().schedule_cleanup(provisioned)
+                return cached
+
+        installer = DependencyInstaller()
+        if pool is not None:
+            with pool.lease() as workspace:
+                if not workspace:
+                    return {"success": False, "output": "Failed to lease workspace", "exit_code": 1}
+                installer.ensure(pool.manager, workspace, requirements)
+                result = pool.manager.execute_code(workspace, code, language, limits)
+                # Probed while the lease is held, before another caller can use the workspace
+                version = pool.manager.runtime_version(workspace, language) if cache is not None else ""
+        else:
+            manager = WorkspaceManager()
+            hedge_info = None
+            lease_pool = None
+            if provisioned is not None:
+                workspace = provisioned
+            elif hedging_enabled() if hedge is None else hedge:
+                from .pool import peek_default_pool
+                
+                workspace, lease_pool, hedge_info = acquire_hedged(
+                    manager, image=installer.image_for(requirements), pool=peek_default_pool())
+            else:
+                workspace = manager.create_workspace(image=installer.image_for(requirements))
+            
+            if not workspace and manager.api_breaker.is_open:
+                # Fall back to warm workspaces while the Daytona API is unhealthy
+                from .pool import peek_default_pool
+                
+                warm_pool = peek_default_pool()
+                if warm_pool is not None:
+                    print("⚠️ Daytona API is unhealthy, running on a warm pooled workspace")
+                    return _execute_in_workspace(code, language, cleanup, warm_pool, cache, dependencies, limits)
+            
+            if not workspace:
+                return {"success": False, "output": "Failed to create workspace", "exit_code": 1}
+            
+            if lease_pool is not None:
+                # A warm pooled workspace won the hedge; it goes back to its pool
+                manager = lease_pool.manager
+            try:
+                installer.ensure(manager, workspace, requirements)
+                result = manager.execute_code(workspace, code, language, limits)
+                version = manager.runtime_version(workspace, language) if cache is not None else ""
+            finally:
+                if lease_pool is not None:
+                    lease_pool.release(workspace)
+                elif cleanup:
+                    # Removal happens off the critical path
+                    manager.schedule_cleanup(workspace)
+                else:
+                    print(f"⚠️ Workspace {workspace.id} is still running")
+            
+            if hedge_info is not None:
+                result["hedge"] = hedge_info
+
+        if cache is not None:
+            cache.store(code, language, requirements.requirements, version, result)
         
-        if not workspace:
-            return {"success": False, "output": "Failed to create workspace", "exit_code": 1}
+        return result
+    except Exception as e:
+        return {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+
+def stream_in_workspace(code: str, language: str = "python", cleanup: bool = True,
+                        max_output: Optional[int] = None, priority: Optional[Any] = None,
+                        session: Optional[str] = None) -> ExecutionStream:
+    """
+    High-level function to run code in a new workspace and stream its output
+    
+    The stream holds an admission slot until it finishes.
+    
+    Args:
+        code: The code to execute
+        language: Programming language of the code
+        cleanup: Whether to remove the workspace once the stream finishes
+        max_output: Byte cap on streamed output
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the request is queued under, defaults to GOOSE_SESSION_ID
         
-        result = manager.execute_code(workspace, code, language)
+    Returns:
+        ExecutionStream yielding output chunks; exit_code is set once exhausted
         
+    Raises:
+        RuntimeError: If the workspace could not be created
+        AdmissionRejected: If the request was shed or waited too long
+    """
+    admission = get_admission_controller()
+    ticket = admission.acquire(priority, session)
+    try:
+        requirements = resolve_requirements(code, language=language)
+        installer = DependencyInstaller()
+        manager = WorkspaceManager()
+        workspace = manager.create_workspace(image=installer.image_for(requirements))
+    except Exception:
+        admission.release(ticket)
+        raise
+    if not workspace:
+        admission.release(ticket)
+        raise RuntimeError("Failed to create workspace")
+    
+    def finish():
+        admission.release(ticket)
         if cleanup:
-            manager.cleanup_workspace(workspace)
+            manager.schedule_cleanup(workspace)
         else:
             print(f"⚠️ Workspace {workspace.id} is still running")
+    
+    try:
+        installer.ensure(manager, workspace, requirements)
+        return manager.stream_code(workspace, code, language, max_output=max_output, on_close=finish)
+    except Exception:
+        finish()
+        raise
+
+def execute_batch(codes: List[str], language: str = "python", cleanup: bool = True,
+                  shards: int = 1, timeout: Optional[float] = None,
+                  priority: Optional[Any] = None, session: Optional[str] = None,
+                  workspace: Optional[Any] = None, cache: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    High-level function to execute many snippets across a few workspaces
+    
+    Snippets are split into contiguous shards; each shard is uploaded in one
+    archive and executed in its own workspace, and shards run in parallel.
+    Each shard takes its own admission slot.
+    
+    Args:
+        codes: The snippets to execute
+        language: Programming language of the snippets
+        cleanup: Whether to clean up the workspaces after execution
+        shards: Number of workspaces to spread the batch over
+        timeout: Per-snippet wall-clock limit in seconds
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the shards are queued under, defaults to GOOSE_SESSION_ID
+        workspace: Workspace created in advance for the first shard; it is
+            cleaned up like the others
+        cache: Optional ResultCache. Snippets with a cached result are not
+            run again, and successful new results are stored.
         
-        return result
+    Returns:
+        List of result dictionaries in the same order as codes
+    """
+    # One dependency set for the whole batch so every shard shares a wheelhouse
+    requirements = resolve_requirements("\n".join(codes), language=language)
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(codes)
+    if cache is not None:
+        with span("cache_lookup", snippets=len(codes)):
+            results = [cache.lookup(code, language, requirements.requirements) for code in codes]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        if workspace is not None and cleanup:
+            WorkspaceManager().schedule_cleanup(workspace)
+        return results
+    if len(pending) < len(codes):
+        print(f"♻️ Returning {len(codes) - len(pending)} cached results")
+    
+    try:
+        manager = WorkspaceManager()
     except Exception as e:
-        return {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+        for i in pending:
+            results[i] = {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+        return results
+    
+    shards = max(1, min(shards, len(pending)))
+    size = -(-len(pending) // shards)
+    chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+    installer = DependencyInstaller()
+    
+    def run_shard(index: int, chunk: List[int]) -> List[Dict[str, Any]]:
+        provisioned = workspace if index == 0 else None
+        try:
+            with get_admission_controller().admit(priority, session):
+                return run_admitted_shard(chunk, provisioned)
+        except AdmissionRejected as e:
+            if provisioned is not None:
+                manager.schedule_cleanup(provisioned)
+            return [{"success": False, "output": str(e), "exit_code": 1, "rejected": True} for _ in chunk]
+    
+    def run_admitted_shard(chunk: List[int], workspace: Optional[Any]) -> List[Dict[str, Any]]:
+        if workspace is None:
+            workspace = manager.create_workspace(show_spinner=len(chunks) == 1,
+                                                 image=installer.image_for(requirements))
+        if not workspace:
+            return [{"success": False, "output": "Failed to create workspace", "exit_code": 1} for _ in chunk]
+        try:
+            installer.ensure(manager, workspace, requirements)
+            shard_results = manager.execute_batch(workspace, [codes[i] for i in chunk], language, timeout)
+            if cache is not None:
+                version = manager.runtime_version(workspace, language)
+                for i, result in zip(chunk, shard_results):
+                    cache.store(codes[i], language, requirements.requirements, version, result)
+            return shard_results
+        finally:
+            if cleanup:
+                manager.schedule_cleanup(workspace)
+            else:
+                print(f"⚠️ Workspace {workspace.id} is still running")
+    
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        # Shards record their spans in the caller's trace
+        futures = [executor.submit(contextvars.copy_context().run, run_shard, index, chunk)
+                   for index, chunk in enumerate(chunks)]
+        for chunk, future in zip(chunks, futures):
+            for i, result in zip(chunk, future.result()):
+                results[i] = result
+    return results
+
+def execute_code_blocks(source: Union[str, Iterable[str]], language: Optional[str] = None,
+                        cleanup: bool = True, timeout: Optional[float] = None,
+                        priority: Optional[Any] = None, session: Optional[str] = None,
+                        cache: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    High-level function to run every fenced code block of a message as one batch
+    
+    The message may arrive in pieces, e.g. as a model streams it. Creation
+    of the first workspace starts in the background as soon as the first
+    block opens, so provisioning overlaps with the rest of the message.
+    A single block runs through execute_in_workspace on that workspace;
+    several are grouped by language and each group runs as one batch.
+    
+    Args:
+        source: The message, or an iterable of its pieces
+        language: Language of blocks without a tag, and of a message without
+            any blocks, which is run as a single snippet. Defaults to Python.
+        cleanup: Whether to clean up the workspaces after execution
+        timeout: Per-block wall-clock limit in seconds
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the batches are queued under, defaults to GOOSE_SESSION_ID
+        cache: Optional ResultCache for the blocks' results
+        
+    Returns:
+        One result dictionary per block, in order, each with its "language"
+    """
+    from .utils import CodeBlockParser
+    
+    parser = CodeBlockParser(default_language=language or "python")
+    pieces = [source] if isinstance(source, str) else source
+    text = []
+    provisioning = None
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        for piece in pieces:
+            text.append(piece)
+            parser.feed(piece)
+            if provisioning is None and (parser.in_block or parser.blocks):
+                provisioning = executor.submit(WorkspaceManager().create_workspace, show_spinner=False)
+        parser.close()
+    except BaseException:
+        if provisioning is not None:
+            # Nobody will run on the early workspace
+            provisioning.add_done_callback(
+                lambda done: done.result() and WorkspaceManager().schedule_cleanup(done.result()))
+        raise
+    finally:
+        executor.shutdown(wait=False)
+    
+    workspace = provisioning.result() if provisioning is not None else None
+    try:
+        blocks = parser.blocks
+        if not blocks:
+            if workspace is not None:
+                # Only empty blocks
+                return []
+            blocks = [{"language": language or "python", "code": "".join(text).strip()}]
+        
+        # Group runnable blocks by runner, keeping each block's position; blocks
+        # such as ```text or ```json are reported as skipped
+        results: List[Optional[Dict[str, Any]]] = [None] * len(blocks)
+        groups: Dict[str, List[int]] = {}
+        for i, block in enumerate(blocks):
+            runner = find_runner(block["language"])
+            if runner is None:
+                print(f"⏭️ Skipping block {i + 1}: no runner for language {block['language']!r}")
+                results[i] = {"success": False, "output": f"Skipped: unsupported language {block['language']}",
+                              "exit_code": 1, "skipped": True, "language": block["language"]}
+            else:
+                groups.setdefault(runner.name, []).append(i)
+        if not groups:
+            return results
+        
+        # The workspace provisioned early serves the first runnable block's language,
+        # unless its dependencies have a prebuilt image the workspace was not created from
+        first_language = next(iter(groups))
+        requirements = resolve_requirements("\n".join(blocks[i]["code"] for i in groups[first_language]),
+                                            language=first_language)
+        early = None
+        if workspace is not None and not DependencyInstaller().image_for(requirements):
+            # execute_batch cleans it up from here on
+            early, workspace = workspace, None
+        
+        runnable = [i for indices in groups.values() for i in indices]
+        if len(runnable) == 1:
+            # Same path as a lone snippet: cache, artifacts, hedging and trace export
+            i = runnable[0]
+            limits = None
+            if timeout:
+                configured = Config().get_resource_limits()
+                limits = ResourceLimits(timeout, configured.cpu_seconds, configured.memory_mb)
+            results[i] = execute_in_workspace(blocks[i]["code"], first_language, cleanup=cleanup, cache=cache,
+                                              limits=limits, priority=priority, session=session,
+                                              workspace=early)
+            results[i]["language"] = first_language
+            return results
+        
+        def run_group(group_language: str) -> List[Dict[str, Any]]:
+            indices = groups[group_language]
+            return execute_batch([blocks[i]["code"] for i in indices], group_language, cleanup=cleanup,
+                                 timeout=timeout, priority=priority, session=session,
+                                 workspace=early if group_language == first_language else None,
+                                 cache=cache)
+        
+        with start_trace() as trace:
+            with span("total", blocks=len(runnable)):
+                with ThreadPoolExecutor(max_workers=len(groups)) as group_executor:
+                    futures = {group_language: group_executor.submit(contextvars.copy_context().run,
+                                                                     run_group, group_language)
+                               for group_language in groups}
+                    for group_language, future in futures.items():
+                        for i, result in zip(groups[group_language], future.result()):
+                            result["language"] = group_language
+                            results[i] = result
+        export_trace(trace)
+        return results
+    finally:
+        if workspace is not None:
+            # The early workspace was not used
+            WorkspaceManager().schedule_cleanup(workspace)
+
+def _read_code_arg(arg: str) -> str:
+    """Read a file if the argument is an existing path, otherwise treat it as code"""
+    if os.path.exists(arg):
+        with open(arg, 'r') as f:
+            return f.read()
+    return arg
+
+def _detect_language(arg: Optional[str], code: str) -> Tuple[str, str]:
+    """Return (code, language) from a source file extension or a fenced code block"""
+    if arg and os.path.exists(arg):
+        runner = runner_for_path(arg)
+        if runner:
+            return code, runner.name
+    if "```" in code:
+        from .utils import parse_goose_input
+        
+        parsed = parse_goose_input(code)
+        return parsed["code"], parsed["language"]
+    return code, "python"
+
+def _write_chunk(chunk: str) -> None:
+    """Write a streamed output chunk to stdout immediately"""
+    sys.stdout.write(chunk)
+    sys.stdout.flush()
+
+def _resolve_cleanup(is_goose: bool, prompt: bool = True) -> bool:
+    """
+    Decide whether to clean up, prompting the user when running interactively
+    
+    Args:
+        is_goose: Whether the executor was invoked by Goose
+        prompt: False when stdin carries the code and cannot answer a prompt
+    """
+    # Always clean up when called by Goose
+    cleanup = True if is_goose else os.getenv('DAYTONA_AUTO_CLEANUP', 'true').lower() in ('true', '1', 'yes')
+    
+    # Only ask for input if not called by Goose and auto cleanup is not set
+    if prompt and not is_goose and os.getenv('DAYTONA_AUTO_CLEANUP') is None:
+        try:
+            cleanup = input("\nClean up workspace after execution? (y/n, default: y): ").lower() != 'n'
+        except (EOFError, KeyboardInterrupt):
+            # Handle the case where input is not available
+            cleanup = True
+    return cleanup
+
+def run_batch_cli(args: List[str], is_goose: bool) -> int:
+    """
+    Run `--batch` mode: every argument is a file path or a code string
+    
+    Args:
+        args: Snippet arguments following the --batch flag
+        is_goose: Whether the executor was invoked by Goose
+        
+    Returns:
+        Process exit code, 0 only if every snippet succeeded
+    """
+    codes = [_read_code_arg(arg) for arg in args]
+    codes = [code for code in codes if code]
+    if not codes:
+        print(json.dumps({"error": "No code provided"}))
+        return 1
+    
+    shards = int(os.getenv('DAYTONA_BATCH_SHARDS', '1'))
+    timeout = os.getenv('DAYTONA_BATCH_TIMEOUT')
+    results = execute_batch(codes, cleanup=_resolve_cleanup(is_goose), shards=shards,
+                            timeout=float(timeout) if timeout else None)
+    
+    for i, result in enumerate(results):
+        print(f"\n=== Snippet {i + 1} (exit code {result['exit_code']}) ===")
+        print(result.get("output", ""))
+    return 0 if all(result.get("success", False) for result in results) else 1
+
+def run_blocks_cli(source: Union[str, Iterable[str]], is_goose: bool) -> int:
+    """
+    Run every fenced code block of a message as one batch and print the results
+    
+    Args:
+        source: The message, or its lines as they arrive
+        is_goose: Whether the executor was invoked by Goose
+        
+    Returns:
+        Process exit code, 0 only if every block succeeded
+    """
+    # Remove workspaces left behind by crashed runs while this one proceeds
+    start_reaper(WorkspaceManager())
+    
+    timeout = os.getenv('DAYTONA_BATCH_TIMEOUT')
+    results = execute_code_blocks(source, cleanup=_resolve_cleanup(is_goose, prompt=False),
+                                  timeout=float(timeout) if timeout else None,
+                                  cache=ResultCache() if cache_enabled() else None)
+    if len(results) == 1:
+        print(render_output(results[0]))
+    else:
+        for i, result in enumerate(results):
+            status = "skipped" if result.get("skipped") else f"exit code {result['exit_code']}"
+            print(f"\n=== Block {i + 1} ({result['language']}, {status}) ===")
+            print(render_output(result))
+    ran = [result for result in results if not result.get("skipped")]
+    return 0 if ran and all(result.get("success", False) for result in ran) else 1
 
 def main():
     """Command-line entry point for direct execution"""
+    install_signal_handler()
     try:
         # Determine if we're running as a module or directly
         is_module_call = len(sys.argv) > 1 and sys.argv[0].endswith('__main__.py')
@@ -248,41 +1280,93 @@ def main():
         # Check if we're being called by Goose
         is_goose = 'GOOSE_SESSION_ID' in os.environ or any('goose' in arg.lower() for arg in sys.argv)
         
-        # Get the code to execute
-        code = ""
-        if len(sys.argv) > 1:
-            # If it's a file path, read the file
-            if os.path.exists(sys.argv[1]):
-                with open(sys.argv[1], 'r') as f:
-                    code = f.read()
+        if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+            return run_batch_cli(sys.argv[2:], is_goose)
+        
+        args = sys.argv[1:]
+        stream = os.getenv('DAYTONA_STREAM', 'false').lower() in ('true', '1', 'yes')
+        language = os.getenv('DAYTONA_LANGUAGE')
+        while args and args[0] in ('--stream', '--language'):
+            if args[0] == '--stream':
+                stream = True
+                args = args[1:]
             else:
-                # Otherwise treat it as code directly
-                code = sys.argv[1]
-        else:
+                language = args[1] if len(args) > 1 else None
+                args = args[2:]
+        
+        from .kernel import execute_in_session, session_mode_enabled
+        from .utils import CodeBlockParser, extract_code_blocks
+        
+        # Get the code to execute
+        if args:
+            # A file path or the code itself
+            code = _read_code_arg(args[0])
+        elif language or stream or daemon_available() or session_mode_enabled():
             # Read from stdin
             code = sys.stdin.read()
+        else:
+            # Read stdin line by line; once a fenced block opens, the rest of
+            # the message is parsed while its workspace is being created
+            lines = []
+            fence_probe = CodeBlockParser()
+            for line in iter(sys.stdin.readline, ""):
+                lines.append(line)
+                fence_probe.feed(line)
+                if fence_probe.in_block:
+                    return run_blocks_cli(itertools.chain(lines, iter(sys.stdin.readline, "")), is_goose)
+            code = "".join(lines)
         
         if not code:
             print(json.dumps({"error": "No code provided"}))
             return 1
         
+        # Several fenced blocks run together as one batch, or one after another in a session
+        blocks = [] if language else extract_code_blocks(code)
+        if len(blocks) > 1:
+            if session_mode_enabled() and all(getattr(find_runner(block["language"]), "name", None) == "python"
+                                              for block in blocks):
+                results = [execute_in_session(block["code"]) for block in blocks]
+                for result in results:
+                    print(result.get("output", ""))
+                return 0 if all(result.get("success", False) for result in results) else 1
+            return run_blocks_cli(code, is_goose)
+        
+        # Without --language, go by the file extension or a fenced block's tag
+        if not language:
+            code, language = _detect_language(args[0] if args else None, code)
+        language = get_runner(language).name
+        
+        # Keep interpreter state across snippets of one Goose session when opted in
+        if language == "python" and session_mode_enabled():
+            result = execute_in_session(code)
+            print(result.get("output", ""))
+            return 0 if result.get("success", False) else 1
+        
+        # Hand the request to a running daemon when one is listening
+        result = execute_via_daemon(code, language, on_chunk=_write_chunk if stream else None)
+        if result is not None:
+            print("" if stream else render_output(result))
+            return 0 if result.get("success", False) else 1
+        
+        # Remove workspaces left behind by crashed runs while this one proceeds
+        start_reaper(WorkspaceManager())
+        
         # Set automatic cleanup based on context
-        # Always clean up when called by Goose
-        cleanup = True if is_goose else os.getenv('DAYTONA_AUTO_CLEANUP', 'true').lower() in ('true', '1', 'yes')
+        cleanup = _resolve_cleanup(is_goose)
         
-        # Only ask for input if not called by Goose and auto cleanup is not set
-        if not is_goose and os.getenv('DAYTONA_AUTO_CLEANUP') is None:
-            try:
-                cleanup = input("\nClean up workspace after execution? (y/n, default: y): ").lower() != 'n'
-            except (EOFError, KeyboardInterrupt):
-                # Handle the case where input is not available
-                cleanup = True
+        if stream:
+            output = stream_in_workspace(code, language, cleanup=cleanup)
+            for chunk in output:
+                _write_chunk(chunk)
+            print()
+            return 0 if output.exit_code == 0 else 1
         
-        # Execute code
-        result = execute_in_workspace(code, cleanup=cleanup)
+        # Execute code, reusing cached results when DAYTONA_RESULT_CACHE opts in
+        cache = ResultCache() if cache_enabled() else None
+        result = execute_in_workspace(code, language, cleanup=cleanup, cache=cache)
         
         # Print result
-        print(result.get("output", ""))
+        print(render_output(result))
         return 0 if result.get("success", False) else 1
     
     except Exception as e:
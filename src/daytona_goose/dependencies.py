@@ -0,0 +1,323 @@
+"""
+Dependency detection and pre-installation for workspaces
+
+Requirements come from a declarative spec (a requirements file or an explicit
+list) and, when DAYTONA_AUTO_INSTALL opts in, from the imports found in the
+submitted code. Before code runs, the packages a workspace lacks are
+installed from a wheelhouse cached locally per dependency set: the first
+workspace builds the wheels and the archive is downloaded, later workspaces
+get it uploaded in bulk and install offline. Dependency sets can also be
+mapped to a prebuilt image so new workspaces start with them installed.
+"""
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+import uuid
+from typing import Any, Dict, Iterable, Optional, Set
+
+from .metrics import span
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose")
+
+# Import names whose distribution on PyPI is named differently
+IMPORT_TO_PACKAGE = {
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "jwt": "PyJWT",
+    "PIL": "Pillow",
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "yaml": "PyYAML",
+}
+
+# Used when sys.stdlib_module_names is unavailable (Python < 3.10)
+_FALLBACK_STDLIB = {
+    "abc", "argparse", "array", "ast", "asyncio", "base64", "bisect", "collections",
+    "contextlib", "copy", "csv", "dataclasses", "datetime", "decimal", "enum",
+    "functools", "glob", "hashlib", "heapq", "io", "itertools", "json", "logging",
+    "math", "operator", "os", "pathlib", "pickle", "random", "re", "shutil",
+    "signal", "socket", "sqlite3", "statistics", "string", "struct", "subprocess",
+    "sys", "tempfile", "textwrap", "threading", "time", "timeit", "typing",
+    "unittest", "urllib", "uuid", "warnings", "zipfile",
+}
+
+STDLIB_MODULES = set(getattr(sys, "stdlib_module_names", _FALLBACK_STDLIB))
+
+_IMPORT_PATTERN = re.compile(r"^\s*(?:from\s+([A-Za-z_]\w*)|import\s+([A-Za-z_]\w*))", re.MULTILINE)
+
+
+def detect_imports(code: str) -> Set[str]:
+    """
+    Return the top-level third-party modules imported by Python code
+
+    Args:
+        code: Python source
+
+    Returns:
+        Module names, excluding the standard library and relative imports
+    """
+    modules = set()
+    try:
+        for node in ast.walk(ast.parse(code)):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules.add(node.module.split(".")[0])
+    except SyntaxError:
+        # Still pick up what we can from code that does not parse
+        for match in _IMPORT_PATTERN.finditer(code):
+            modules.add(match.group(1) or match.group(2))
+    return {module for module in modules if module not in STDLIB_MODULES and module != "__future__"}
+
+
+def normalize_name(requirement: str) -> str:
+    """Return the PEP 503 normalized project name of a requirement string"""
+    name = re.split(r"[\s\[<>=!~;@]", requirement.strip(), maxsplit=1)[0]
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class RequirementsSpec:
+    """A set of pip requirement strings identified by a stable hash"""
+    def __init__(self, requirements: Optional[Iterable[str]] = None):
+        unique = {}
+        for requirement in requirements or []:
+            requirement = requirement.strip()
+            if requirement and not requirement.startswith("#"):
+                unique.setdefault(normalize_name(requirement), requirement)
+        self.requirements = sorted(unique.values(), key=normalize_name)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RequirementsSpec":
+        """Read a requirements.txt style file"""
+        with open(path) as f:
+            return cls(line.split(" #")[0] for line in f)
+
+    @classmethod
+    def from_code(cls, code: str) -> "RequirementsSpec":
+        """Build a spec from the third-party imports found in code"""
+        return cls(IMPORT_TO_PACKAGE.get(module, module) for module in detect_imports(code))
+
+    def merge(self, other: "RequirementsSpec") -> "RequirementsSpec":
+        """Return a spec with both sets; requirements in self win on conflicts"""
+        return RequirementsSpec(self.requirements + other.requirements)
+
+    def key(self, *extra: str) -> str:
+        """Return a hash of the requirements and any extra qualifiers"""
+        payload = json.dumps({"requirements": self.requirements, "extra": list(extra)})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def missing(self, installed: Dict[str, str]) -> "RequirementsSpec":
+        """Return the requirements whose project is not in installed"""
+        present = {normalize_name(name) for name in installed}
+        return RequirementsSpec(r for r in self.requirements if normalize_name(r) not in present)
+
+    def dockerfile(self, base_image: str = "python:3.12-slim") -> str:
+        """Return a Dockerfile that bakes the requirements into an image"""
+        lines = [f"FROM {base_image}"]
+        if self.requirements:
+            lines.append("RUN pip install --no-cache-dir " + " ".join(f"'{r}'" for r in self.requirements))
+        return "\n".join(lines) + "\n"
+
+    def __bool__(self) -> bool:
+        return bool(self.requirements)
+
+    def __iter__(self):
+        return iter(self.requirements)
+
+
+def auto_install_enabled() -> bool:
+    """Return True if imports detected in submitted code should be installed"""
+    return os.getenv('DAYTONA_AUTO_INSTALL', 'false').lower() in ('true', '1', 'yes')
+
+
+def resolve_requirements(code: str, dependencies: Optional[Iterable[str]] = None,
+                         language: str = "python") -> RequirementsSpec:
+    """
+    Combine declared dependencies, DAYTONA_REQUIREMENTS and detected imports
+
+    Args:
+        code: Code that is about to run
+        dependencies: Explicitly declared requirement strings
+        language: Language of the code; imports are only detected for Python
+
+    Returns:
+        The requirements the code needs
+    """
+    spec = RequirementsSpec(dependencies)
+    requirements_file = os.getenv('DAYTONA_REQUIREMENTS')
+    if requirements_file:
+        spec = spec.merge(RequirementsSpec.from_file(requirements_file))
+    if language in ("python", "py", "python3") and auto_install_enabled():
+        spec = spec.merge(RequirementsSpec.from_code(code))
+    return spec
+
+
+class DependencyInstaller:
+    """Installs requirement sets into workspaces from a local wheelhouse cache"""
+    def __init__(self, cache_dir: Optional[str] = None, image_map_path: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Directory for cached wheelhouse archives, defaults to
+                DAYTONA_WHEELHOUSE_DIR
+            image_map_path: JSON file mapping dependency keys to prebuilt
+                images, defaults to DAYTONA_DEPENDENCY_IMAGES
+        """
+        self.cache_dir = cache_dir or os.getenv(
+            'DAYTONA_WHEELHOUSE_DIR', os.path.join(DEFAULT_CACHE_DIR, "wheelhouses")
+        )
+        self.image_map_path = image_map_path or os.getenv(
+            'DAYTONA_DEPENDENCY_IMAGES', os.path.join(DEFAULT_CACHE_DIR, "images.json")
+        )
+
+    def _load_images(self) -> Dict[str, str]:
+        try:
+            with open(self.image_map_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def image_for(self, spec: RequirementsSpec) -> Optional[str]:
+        """Return the prebuilt image registered for a dependency set, if any"""
+        if not spec:
+            return None
+        return self._load_images().get(spec.key())
+
+    def register_image(self, spec: RequirementsSpec, image: str) -> None:
+        """Record that image already contains every requirement in spec"""
+        images = self._load_images()
+        images[spec.key()] = image
+        os.makedirs(os.path.dirname(self.image_map_path), exist_ok=True)
+        tmp_path = f"{self.image_map_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(images, f, indent=2)
+        os.replace(tmp_path, self.image_map_path)
+
+    def ensure(self, manager: Any, workspace: Any, spec: RequirementsSpec) -> bool:
+        """
+        Install whatever part of spec the workspace does not have yet
+
+        Args:
+            manager: WorkspaceManager that owns the workspace
+            workspace: Daytona workspace object
+            spec: Requirements the code needs
+
+        Returns:
+            True if every requirement is installed afterwards
+        """
+        capabilities = manager.get_capabilities(workspace)
+        missing = spec.missing(capabilities.packages)
+        if not missing:
+            return True
+
+        print(f"📦 Installing {', '.join(missing)} in workspace {workspace.id}...")
+        key = missing.key(capabilities.python_version)
+        archive_path = os.path.join(self.cache_dir, f"{key}.tar.gz")
+        with span("install", packages=len(missing.requirements)):
+            installed = False
+            if os.path.exists(archive_path):
+                installed = self._install_from_archive(workspace, capabilities.interpreter, missing, archive_path)
+            if not installed:
+                installed = self._build_and_install(workspace, capabilities.interpreter, missing, archive_path)
+
+        if installed:
+            for requirement in missing:
+                capabilities.packages[normalize_name(requirement)] = ""
+            print("✅ Dependencies installed")
+        else:
+            print("⚠️ Failed to install dependencies")
+        return installed
+
+    def _upload_requirements(self, workspace: Any, spec: RequirementsSpec, directory: str) -> str:
+        path = f"{directory}.txt"
+        workspace.fs.upload_file(path, ("\n".join(spec) + "\n").encode("utf-8"))
+        return path
+
+    def _install_from_archive(self, workspace: Any, python_path: str, spec: RequirementsSpec,
+                              archive_path: str) -> bool:
+        directory = f"/home/daytona/.wheelhouse_{uuid.uuid4().hex[:8]}"
+        try:
+            with open(archive_path, "rb") as f:
+                workspace.fs.upload_file(f"{directory}.tar.gz", f.read())
+            requirements = self._upload_requirements(workspace, spec, directory)
+            result = workspace.process.exec(
+                f"mkdir -p {directory} && tar -xzf {directory}.tar.gz -C {directory} && "
+                f"{python_path} -m pip install -q --no-index --find-links {directory} -r {requirements} 2>&1; "
+                f"status=$?; rm -rf {directory} {directory}.tar.gz {requirements}; exit $status"
+            )
+            return result.exit_code == 0
+        except Exception as e:
+            print(f"⚠️ Cached wheelhouse could not be installed: {e}")
+            return False
+
+    def _build_and_install(self, workspace: Any, python_path: str, spec: RequirementsSpec,
+                           archive_path: str) -> bool:
+        directory = f"/home/daytona/.wheelhouse_{uuid.uuid4().hex[:8]}"
+        try:
+            requirements = self._upload_requirements(workspace, spec, directory)
+            result = workspace.process.exec(
+                f"{python_path} -m pip wheel -q -w {directory} -r {requirements} 2>&1 && "
+                f"{python_path} -m pip install -q --no-index --find-links {directory} -r {requirements} 2>&1 && "
+                f"tar -czf {directory}.tar.gz -C {directory} ."
+            )
+            if result.exit_code != 0:
+                print(result.result.strip())
+                return False
+
+            # Keep the wheels so later workspaces can skip resolution and builds
+            try:
+                archive = workspace.fs.download_file(f"{directory}.tar.gz")
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{archive_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(archive)
+                os.replace(tmp_path, archive_path)
+            except Exception as e:
+                print(f"⚠️ Failed to cache wheelhouse: {e}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Dependency installation error: {e}")
+            return False
+        finally:
+            try:
+                workspace.process.exec(f"rm -rf {directory} {directory}.tar.gz {directory}.txt")
+            except Exception:
+                pass
+
+
+def main():
+    """
+    Command-line entry point
+
+        detect FILE                    print requirements detected in FILE
+        dockerfile REQUIREMENTS [BASE] print a Dockerfile for a requirements file
+        register IMAGE REQUIREMENTS    use IMAGE for workspaces needing REQUIREMENTS
+    """
+    args = sys.argv[1:]
+    if len(args) == 2 and args[0] == "detect":
+        with open(args[1]) as f:
+            print("\n".join(RequirementsSpec.from_code(f.read())))
+        return 0
+    if len(args) in (2, 3) and args[0] == "dockerfile":
+        spec = RequirementsSpec.from_file(args[1])
+        print(spec.dockerfile(*args[2:]), end="")
+        return 0
+    if len(args) == 3 and args[0] == "register":
+        spec = RequirementsSpec.from_file(args[2])
+        DependencyInstaller().register_image(spec, args[1])
+        print(f"✅ Registered image {args[1]} for dependency set {spec.key()}")
+        return 0
+    print("Usage: python -m daytona_goose.dependencies detect FILE")
+    print("       python -m daytona_goose.dependencies dockerfile REQUIREMENTS [BASE_IMAGE]")
+    print("       python -m daytona_goose.dependencies register IMAGE REQUIREMENTS")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
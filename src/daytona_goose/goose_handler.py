@@ -5,14 +5,26 @@ Handler script for Goose integration
 import os
 import sys
 import tempfile
-from .daytona_executor import execute_in_workspace
+from typing import Dict, List, Optional
+from .artifacts import render_output
+from .daemon import execute_via_daemon
+from .daytona_executor import (execute_code_blocks, execute_in_workspace, install_signal_handler,
+                               stream_in_workspace)
+from .kernel import execute_in_session, session_mode_enabled
+from .runners import find_runner, get_runner
+from .utils import parse_goose_input
 
-def handle_goose_request(code: str) -> str:
+def handle_goose_request(code: str, stream: bool = False, language: Optional[str] = None) -> str:
     """
     Handle code execution request from Goose
     
     Args:
-        code: Python code to execute
+        code: Code to execute, optionally wrapped in a fenced code block
+        stream: Write output to stdout as it is produced instead of
+            collecting it. The returned string is then empty.
+        language: Language of the code; taken from the code block's fence
+            tag when omitted, defaulting to Python. Without it, a message
+            with several code blocks runs them all as one batch.
         
     Returns:
         Execution result
@@ -20,17 +32,73 @@ def handle_goose_request(code: str) -> str:
     # Set environment flag for automatic cleanup
     os.environ['DAYTONA_AUTO_CLEANUP'] = 'true'
     
+    if language is None:
+        parsed = parse_goose_input(code)
+        if len(parsed['blocks']) > 1:
+            return _handle_blocks(code, parsed['blocks'])
+        code, language = parsed['code'], parsed['language']
+    try:
+        language = get_runner(language).name
+    except ValueError as e:
+        return render_output({"success": False, "output": str(e), "exit_code": 1})
+    
+    def write_chunk(chunk: str) -> None:
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+    
+    # Reuse the session's kernel so state persists between snippets
+    if language == 'python' and session_mode_enabled():
+        result = execute_in_session(code)
+        return result.get('output', '')
+    
+    # Prefer a running daemon with warm workspaces
+    result = execute_via_daemon(code, language, on_chunk=write_chunk if stream else None)
+    if result is not None:
+        if stream:
+            sys.stdout.write("\n")
+        return '' if stream else render_output(result)
+    
+    if stream:
+        try:
+            for chunk in stream_in_workspace(code, language, cleanup=True):
+                write_chunk(chunk)
+        except Exception as e:
+            # Failed create or lease, or a rejected admission; report it like the other paths
+            write_chunk(f"Execution failed: {str(e)}")
+        sys.stdout.write("\n")
+        return ''
+    
     # Execute code with automatic cleanup
-    result = execute_in_workspace(code, cleanup=True)
+    result = execute_in_workspace(code, language, cleanup=True)
     
-    # Return output
-    return result.get('output', '')
+    # Return output, pointing at files saved in artifact mode
+    return render_output(result)
+
+def _handle_blocks(message: str, blocks: List[Dict[str, str]]) -> str:
+    """Run the code blocks of a message as one batch, or in the session if all are Python and sessions are on"""
+    if session_mode_enabled() and all(getattr(find_runner(block['language']), 'name', None) == 'python'
+                                      for block in blocks):
+        results = [execute_in_session(block['code']) for block in blocks]
+    else:
+        results = execute_code_blocks(message)
+    sections = []
+    for i, result in enumerate(results):
+        status = 'skipped' if result.get('skipped') else f"exit code {result.get('exit_code')}"
+        sections.append(f"=== Block {i + 1} ({status}) ===\n{render_output(result)}")
+    return "\n\n".join(sections)
 
 def main():
     """Command-line entry point"""
-    if len(sys.argv) > 1:
+    install_signal_handler()
+    args = sys.argv[1:]
+    stream = os.getenv('DAYTONA_STREAM', 'false').lower() in ('true', '1', 'yes')
+    if args and args[0] == '--stream':
+        stream = True
+        args = args[1:]
+    
+    if args:
         # Code from command line argument
-        code = sys.argv[1]
+        code = args[0]
     else:
         # Read from stdin
         code = sys.stdin.read()
@@ -40,8 +108,9 @@ def main():
         return 1
     
     # Execute and print results
-    output = handle_goose_request(code)
-    print(output)
+    output = handle_goose_request(code, stream=stream)
+    if output:
+        print(output)
     return 0
 
 if __name__ == "__main__":
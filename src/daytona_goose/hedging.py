@@ -0,0 +1,134 @@
+"""
+Hedged workspace creation
+
+Creation time has a long tail: most workspaces are ready in a few seconds,
+but an occasional one takes many times longer and stalls the whole request.
+With hedging on (DAYTONA_HEDGE=true), a second source of workspaces is
+started if the first creation has not finished after a delay: an idle
+workspace from the warm pool if one is available, otherwise a second
+creation. Whichever is ready first runs the code. The loser is removed (or
+returned to the pool) as soon as it arrives.
+
+The delay defaults to the p95 of recent provisioning times (creation,
+readiness wait and capability probe), so roughly one request in twenty pays
+for a second workspace. Hedges started, their winners and the discarded
+workspaces are counted in the metrics registry and reported in the result's
+"hedge" entry.
+"""
+import contextvars
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics import registry
+
+# Phase WorkspaceManager times around every create_workspace call, including
+# readiness polling and the capability probe; its p95 sets the default delay
+PROVISION_PHASE = "provision"
+
+# Used until enough creation times have been observed
+DEFAULT_HEDGE_DELAY = 10.0
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="daytona-hedge")
+
+
+def hedging_enabled() -> bool:
+    """Return True if DAYTONA_HEDGE opts in to hedged workspace creation"""
+    return os.getenv('DAYTONA_HEDGE', 'false').lower() in ('true', '1', 'yes')
+
+
+def hedge_delay() -> float:
+    """
+    Return the seconds to wait before hedging a creation
+
+    DAYTONA_HEDGE_DELAY fixes the delay. Otherwise the DAYTONA_HEDGE_QUANTILE
+    (default 0.95) of observed workspace creation times is used once
+    DAYTONA_HEDGE_MIN_SAMPLES (default 20) have been recorded, and
+    DEFAULT_HEDGE_DELAY before that.
+    """
+    fixed = os.getenv('DAYTONA_HEDGE_DELAY')
+    if fixed:
+        return float(fixed)
+    estimate = registry.quantile(
+        PROVISION_PHASE,
+        float(os.getenv('DAYTONA_HEDGE_QUANTILE', '0.95')),
+        min_count=int(os.getenv('DAYTONA_HEDGE_MIN_SAMPLES', '20'))
+    )
+    return estimate if estimate is not None else DEFAULT_HEDGE_DELAY
+
+
+def acquire_hedged(manager: Any, image: Optional[str] = None, pool: Optional[Any] = None,
+                   delay: Optional[float] = None) -> Tuple[Optional[Any], Optional[Any], Dict[str, Any]]:
+    """
+    Create a workspace, hedging with a second source if creation is slow
+
+    Args:
+        manager: WorkspaceManager used for creation and for removing losers
+        image: Image for created workspaces
+        pool: WorkspacePool whose idle workspaces may serve as the hedge
+        delay: Seconds before hedging, defaults to hedge_delay()
+
+    Returns:
+        (workspace or None, the pool the workspace was leased from or None,
+        accounting dict with "delay", "hedged", "winner" and "discarded", the
+        losing workspaces removed or to be removed when they arrive)
+    """
+    delay = hedge_delay() if delay is None else delay
+    info: Dict[str, Any] = {"delay": round(delay, 3), "hedged": False, "winner": "primary", "discarded": 0}
+
+    def provision() -> Optional[Any]:
+        return manager.create_workspace(show_spinner=False, image=image)
+
+    # The primary creation's spans go to the caller's trace
+    primary = _executor.submit(contextvars.copy_context().run, provision)
+    try:
+        return primary.result(timeout=delay), None, info
+    except FutureTimeout:
+        pass
+
+    # Lease an idle pooled workspace if there is one, otherwise race a second creation
+    leased = pool.acquire(create=False) if pool is not None else None
+    if leased is not None:
+        hedge: Future = Future()
+        hedge.set_result(leased)
+        source = "pool"
+    else:
+        hedge = _executor.submit(contextvars.copy_context().run, provision)
+        source = "hedge"
+    info["hedged"] = True
+    registry.increment("hedge_started_total", source=source)
+    print(f"🏁 Workspace creation is taking longer than {delay:.1f}s, hedging with a {'pooled' if source == 'pool' else 'second'} workspace")
+
+    sources = {primary: "primary", hedge: source}
+    winner: Optional[Future] = None
+    pending = set(sources)
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if winner is None and future.result() is not None:
+                winner = future
+
+    def discard(future: Future, source: str) -> None:
+        workspace = future.result()
+        if workspace is None:
+            return
+        registry.increment("hedge_discarded_total", source=source)
+        if source == "pool":
+            pool.release(workspace)
+        else:
+            manager.schedule_cleanup(workspace)
+
+    for future, future_source in sources.items():
+        if future is not winner:
+            # Counted now so the returned dict does not change after it is handed out
+            if not future.done() or future.result() is not None:
+                info["discarded"] += 1
+            # Runs now if the loser already finished, otherwise once it does
+            future.add_done_callback(lambda f, s=future_source: discard(f, s))
+
+    if winner is None:
+        return None, None, info
+    info["winner"] = sources[winner]
+    registry.increment("hedge_won_total", winner=info["winner"])
+    return winner.result(), pool if info["winner"] == "pool" else None, info
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Persistent interpreter sessions inside a Daytona workspace
+
+A small kernel server runs in the background of a workspace and executes
+every snippet it receives in the same namespace, so variables and imports
+survive between snippets and no interpreter is started per call. Snippets are
+sent to it through a bash /dev/tcp client, which also avoids starting a Python
+client process.
+
+Sessions are keyed by GOOSE_SESSION_ID and recorded in a local registry file,
+so separate CLI invocations from the same Goose session reattach to the same
+workspace and kernel.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from .admission import AdmissionRejected, get_admission_controller
+from .backends import session_request
+from .daytona_executor import CPU_LIMIT_EXIT_CODE, ResourceLimits, WorkspaceManager
+from .metrics import span
+
+KERNEL_DIR = "/home/daytona/.kernel"
+
+# Marker appended by the kernel after each snippet, followed by its exit status
+KERNEL_EXIT_MARKER = "__DAYTONA_KERNEL_EXIT__:"
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "kernels.json")
+
+KERNEL_SERVER_SCRIPT = """
+import contextlib, io, math, resource, signal, socket, sys, traceback
+port = int(sys.argv[1])
+# CPU seconds each snippet may use; RLIMIT_CPU counts the whole process, so it is moved per snippet
+cpu_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+class CpuLimitExceeded(BaseException):
+    pass
+
+def on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+signal.signal(signal.SIGXCPU, on_cpu_limit)
+
+def set_cpu_limit(seconds):
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+namespace = {"__name__": "__main__"}
+server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(("127.0.0.1", port))
+server.listen(8)
+while True:
+    conn, _ = server.accept()
+    with conn, conn.makefile("rb") as reader, conn.makefile("wb") as writer:
+        size = int(reader.readline() or 0)
+        source = reader.read(size).decode("utf-8")
+        out = io.TextIOWrapper(writer, encoding="utf-8", write_through=True)
+        status = 0
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            try:
+                if cpu_seconds:
+                    set_cpu_limit(cpu_seconds)
+                exec(compile(source, "<snippet>", "exec"), namespace)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except CpuLimitExceeded:
+                status = CPU_LIMIT_EXIT_CODE
+            except BaseException as e:
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+                status = 1
+            finally:
+                if cpu_seconds:
+                    set_cpu_limit(None)
+        out.write("\\n%s%d\\n" % (MARKER, status))
+        out.flush()
+        out.detach()
+""".replace("MARKER", repr(KERNEL_EXIT_MARKER)).replace("CPU_LIMIT_EXIT_CODE", str(CPU_LIMIT_EXIT_CODE))
+
+# Sends a snippet file to the kernel: `bash send.sh <port> <file>`
+KERNEL_CLIENT_SCRIPT = """#!/bin/bash
+exec 3<>/dev/tcp/127.0.0.1/$1 || exit 111
+{ printf '%s\\n' "$(wc -c < "$2")"; cat "$2"; } >&3
+cat <&3
+"""
+
+
+class KernelSession:
+    """A long-running interpreter inside one workspace"""
+    def __init__(self, manager: WorkspaceManager, workspace: Any, port: Optional[int] = None):
+        """
+        Args:
+            manager: Manager that owns the workspace
+            workspace: Daytona workspace object
+            port: Local port the kernel listens on, defaults to DAYTONA_KERNEL_PORT
+        """
+        self.manager = manager
+        self.workspace = workspace
+        self.port = port or int(os.getenv('DAYTONA_KERNEL_PORT', '8765'))
+        self.session_id = f"kernel-{self.port}"
+
+    def start(self) -> bool:
+        """
+        Upload the kernel and start it in a background session
+
+        The server runs under the manager's memory limit, and its CPU limit
+        is applied to each snippet by the server itself.
+
+        Returns:
+            True once the kernel accepts snippets, False otherwise
+        """
+        print(f"🧠 Starting kernel in workspace {self.workspace.id}...")
+        with span("kernel_start"):
+            self.workspace.fs.upload_file(f"{KERNEL_DIR}/server.py", KERNEL_SERVER_SCRIPT.encode("utf-8"))
+            self.workspace.fs.upload_file(f"{KERNEL_DIR}/send.sh", KERNEL_CLIENT_SCRIPT.encode("utf-8"))
+            python_path = self.manager.get_capabilities(self.workspace).interpreter
+            limits = self.manager.resource_limits
+            server = f"{python_path} {KERNEL_DIR}/server.py {self.port} {limits.cpu_seconds or 0}"
+            self.workspace.process.create_session(self.session_id)
+            self.workspace.process.execute_session_command(
+                self.session_id,
+                session_request(
+                    command=ResourceLimits(memory_mb=limits.memory_mb).wrap(server, apply_timeout=False),
+                    var_async=True
+                )
+            )
+
+            deadline = time.monotonic() + self.manager.readiness_policy.timeout
+            for delay in self.manager.readiness_policy.delays():
+                if self.is_alive():
+                    return True
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(delay)
+        print(f"❌ Kernel in workspace {self.workspace.id} did not start")
+        return False
+
+    def is_alive(self) -> bool:
+        """Return True if the kernel answers an empty snippet"""
+        try:
+            result = self.workspace.process.exec(f"bash {KERNEL_DIR}/send.sh {self.port} /dev/null")
+            return KERNEL_EXIT_MARKER in result.result
+        except Exception:
+            return False
+
+    def execute(self, code: str) -> Dict[str, Any]:
+        """
+        Execute a snippet in the kernel's persistent namespace
+
+        The manager's resource limits bound the call. CPU and memory limits
+        are enforced inside the kernel, which survives them. A snippet that
+        runs out of wall-clock time keeps the kernel busy, so the kernel is
+        restarted and the session's state is lost.
+
+        Args:
+            code: Python code to execute
+
+        Returns:
+            Dictionary with execution results
+        """
+        try:
+            limits = self.manager.resource_limits
+            snippet_path = f"{KERNEL_DIR}/snippet_{uuid.uuid4().hex[:8]}.py"
+            with span("upload"):
+                self.workspace.fs.upload_file(snippet_path, code.encode("utf-8"))
+
+            print(f"🧪 Executing code in kernel session on workspace {self.workspace.id}...")
+            # Only the timeout applies to the client; the kernel enforces the other limits
+            send = ResourceLimits(limits.timeout, kill_grace=limits.kill_grace).wrap(
+                f"bash {KERNEL_DIR}/send.sh {self.port} {snippet_path}")
+            with span("exec", mode="kernel"):
+                result = self.workspace.process.exec(
+                    f"{send}; status=$?; rm -f {snippet_path}; exit $status",
+                    timeout=limits.client_timeout()
+                )
+
+            limit_message = limits.describe(result.exit_code)
+            if limit_message:
+                print(f"⏱️ {limit_message}, restarting the kernel")
+                self.restart()
+                output = f"{result.result.strip()}\n{limit_message}; the kernel was restarted and its state reset"
+                return {"success": False, "output": output.strip(), "exit_code": result.exit_code,
+                        "timed_out": True}
+
+            output, marker, status = result.result.rpartition(KERNEL_EXIT_MARKER)
+            if not marker:
+                return {"success": False, "output": result.result.strip() or "Kernel is not running", "exit_code": 1}
+            exit_code = int(status.strip() or 1)
+            output = output.strip()
+            limit_message = limits.describe(exit_code) if exit_code == CPU_LIMIT_EXIT_CODE else None
+            if limit_message:
+                print(f"⏱️ {limit_message}")
+                output = f"{output}\n{limit_message}".strip()
+            return {"success": exit_code == 0, "output": output, "exit_code": exit_code,
+                    "timed_out": limit_message is not None}
+        except Exception as e:
+            print(f"❌ Kernel execution error: {e}")
+            return {"success": False, "output": str(e), "exit_code": 1}
+
+    def restart(self) -> bool:
+        """Stop the kernel, including a snippet it is still running, and start a fresh one"""
+        self.shutdown()
+        return self.start()
+
+    def shutdown(self) -> None:
+        """Stop the kernel process"""
+        try:
+            self.workspace.process.delete_session(self.session_id)
+            # The kernel may have been started by another CLI invocation; the
+            # bracket keeps pkill from matching its own shell
+            self.workspace.process.exec(f"pkill -f '{KERNEL_DIR}/[s]erver.py {self.port}'; true")
+        except Exception as e:
+            print(f"⚠️ Failed to stop kernel: {e}")
+
+
+class KernelRegistry:
+    """Maps keys such as Goose session ids to workspace entries in a local JSON file"""
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('DAYTONA_KERNEL_REGISTRY', DEFAULT_REGISTRY_PATH)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load().get(session_id)
+
+    def set(self, session_id: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[session_id] = entry
+            self._save(entries)
+
+    def remove(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._load()
+            entry = entries.pop(session_id, None)
+            self._save(entries)
+            return entry
+
+
+def get_kernel_session(session_id: str, manager: Optional[WorkspaceManager] = None,
+                       registry: Optional[KernelRegistry] = None) -> Optional[KernelSession]:
+    """
+    Reattach to the kernel of a session, or start a new workspace and kernel
+
+    Args:
+        session_id: Goose session identifier
+        manager: Manager to use, created if omitted
+        registry: Session registry, defaults to the shared registry file
+
+    Returns:
+        A running KernelSession, or None if one could not be started
+    """
+    manager = manager or WorkspaceManager()
+    registry = registry or KernelRegistry()
+
+    entry = registry.get(session_id)
+    if entry:
+        workspace = None
+        try:
+            workspace = manager.daytona_client.get_current_workspace(entry["workspace_id"])
+            kernel = KernelSession(manager, workspace, entry.get("port"))
+            if kernel.is_alive() or kernel.start():
+                return kernel
+        except Exception as e:
+            print(f"⚠️ Could not reattach to session workspace {entry['workspace_id']}: {e}")
+        # Persistent workspaces are invisible to the reaper, so remove the broken one here
+        if workspace is not None:
+            manager.schedule_cleanup(workspace)
+        registry.remove(session_id)
+
+    workspace = manager.create_workspace(name="Goose-Daytona-Session", persistent=True)
+    if not workspace:
+        return None
+    kernel = KernelSession(manager, workspace)
+    if not kernel.start():
+        manager.cleanup_workspace(workspace)
+        return None
+    registry.set(session_id, {"workspace_id": workspace.id, "port": kernel.port, "created_at": time.time()})
+    return kernel
+
+
+def execute_in_session(code: str, session_id: Optional[str] = None,
+                       manager: Optional[WorkspaceManager] = None,
+                       priority: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Execute code in the persistent kernel of a Goose session
+
+    Executions are admitted through the process-wide AdmissionController,
+    queued under the session id.
+
+    Args:
+        code: Python code to execute
+        session_id: Session identifier, defaults to GOOSE_SESSION_ID
+        manager: Manager to use, created if omitted
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+
+    Returns:
+        Dictionary with execution results
+    """
+    session_id = session_id or os.getenv('GOOSE_SESSION_ID')
+    if not session_id:
+        return {"success": False, "output": "No session id provided", "exit_code": 1}
+    try:
+        with get_admission_controller().admit(priority, session_id):
+            kernel = get_kernel_session(session_id, manager)
+            if not kernel:
+                return {"success": False, "output": "Failed to start kernel session", "exit_code": 1}
+            return kernel.execute(code)
+    except AdmissionRejected as e:
+        print(f"🚦 {e}")
+        return {"success": False, "output": str(e), "exit_code": 1, "rejected": True}
+    except Exception as e:
+        return {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+
+
+def end_session(session_id: Optional[str] = None, manager: Optional[WorkspaceManager] = None) -> bool:
+    """
+    Stop a session's kernel and remove its workspace
+
+    Args:
+        session_id: Session identifier, defaults to GOOSE_SESSION_ID
+        manager: Manager to use, created if omitted
+
+    Returns:
+        True if a session was found and its workspace removed
+    """
+    session_id = session_id or os.getenv('GOOSE_SESSION_ID')
+    entry = KernelRegistry().remove(session_id) if session_id else None
+    if not entry:
+        return False
+    manager = manager or WorkspaceManager()
+    try:
+        workspace = manager.daytona_client.get_current_workspace(entry["workspace_id"])
+    except Exception as e:
+        print(f"⚠️ Session workspace {entry['workspace_id']} not found: {e}")
+        return False
+    return manager.cleanup_workspace(workspace)
+
+
+def session_mode_enabled() -> bool:
+    """Return True if DAYTONA_KERNEL_SESSION opts in and a Goose session id is set"""
+    enabled = os.getenv('DAYTONA_KERNEL_SESSION', 'false').lower() in ('true', '1', 'yes')
+    return enabled and bool(os.getenv('GOOSE_SESSION_ID'))
+
+
+def main():
+    """Command-line entry point: `end [session_id]` removes a session's workspace"""
+    if len(sys.argv) > 1 and sys.argv[1] == "end":
+        session_id = sys.argv[2] if len(sys.argv) > 2 else None
+        if end_session(session_id):
+            return 0
+        print("No session to end")
+        return 1
+    print("Usage: python -m daytona_goose.kernel end [session_id]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Per-phase timing spans and metrics export
+
+WorkspaceManager wraps each phase of an execution (create, ready, probe,
+upload, exec, remove, ...) in span(). Durations are always aggregated into a
+process-wide histogram registry; when a trace is active (see start_trace),
+the spans are also recorded on it so they can be returned with the result
+and exported.
+
+Export is configured through the environment:
+    DAYTONA_METRICS_FILE      file to write after each execution
+    DAYTONA_METRICS_FORMAT    "prometheus" (text exposition, rewritten each
+                              time) or "otlp-json" (one OpenTelemetry
+                              ResourceSpans document appended per line)
+    DAYTONA_METRICS_ENDPOINT  OTLP/HTTP JSON traces endpoint to POST to,
+                              e.g. http://localhost:4318/v1/traces
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_NAME = "daytona_goose_phase_duration_seconds"
+
+# Prefix of gauges and counters such as daytona_goose_queue_depth
+GAUGE_PREFIX = "daytona_goose_"
+
+
+class Span:
+    """A single timed phase"""
+    def __init__(self, name: str, start_ns: int, duration: float, attributes: Dict[str, Any]):
+        self.name = name
+        self.start_ns = start_ns
+        self.duration = duration
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+
+
+class Trace:
+    """Spans recorded while executing one request"""
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def timings(self) -> Dict[str, float]:
+        """Return total seconds per phase name"""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = round(totals.get(span.name, 0.0) + span.duration, 6)
+        return totals
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Return the trace as an OTLP/JSON ResourceSpans document"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", "daytona-goose")]},
+                "scopeSpans": [{
+                    "scope": {"name": "daytona_goose"},
+                    "spans": [
+                        {
+                            "traceId": self.trace_id,
+                            "spanId": span.span_id,
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.start_ns + int(span.duration * 1e9)),
+                            "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+                        }
+                        for span in self.spans
+                    ],
+                }],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class MetricsRegistry:
+    """Process-wide histogram of phase durations plus a few gauges and counters"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[int]] = {}
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._values: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._types: Dict[str, str] = {}
+
+    def observe(self, phase: str, duration: float) -> None:
+        with self._lock:
+            buckets = self._buckets.setdefault(phase, [0] * len(BUCKETS))
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            self._sums[phase] = self._sums.get(phase, 0.0) + duration
+            self._counts[phase] = self._counts.get(phase, 0) + 1
+
+    def quantile(self, phase: str, q: float, min_count: int = 1) -> Optional[float]:
+        """
+        Estimate a quantile of a phase's durations from its histogram
+
+        Interpolates linearly inside the bucket holding the quantile, like
+        Prometheus' histogram_quantile.
+
+        Args:
+            phase: Phase name, e.g. "create"
+            q: Quantile between 0 and 1, e.g. 0.95
+            min_count: Observations needed before an estimate is returned
+
+        Returns:
+            Estimated seconds, or None with fewer than min_count observations
+        """
+        with self._lock:
+            count = self._counts.get(phase, 0)
+            if count == 0 or count < min_count:
+                return None
+            buckets = list(self._buckets[phase])
+        rank = q * count
+        lower_bound, lower_count = 0.0, 0
+        for bound, cumulative in zip(BUCKETS, buckets):
+            if cumulative >= rank:
+                in_bucket = cumulative - lower_count
+                fraction = (rank - lower_count) / in_bucket if in_bucket else 1.0
+                return lower_bound + (bound - lower_bound) * fraction
+            lower_bound, lower_count = bound, cumulative
+        # Beyond the largest bucket
+        return BUCKETS[-1]
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge, e.g. set_gauge("queue_depth", 3, priority="normal")"""
+        self._set(name, "gauge", labels, lambda _: value)
+
+    def increment(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """Add to a counter, e.g. increment("admission_rejected_total", reason="shed")"""
+        self._set(name, "counter", labels, lambda current: current + amount)
+
+    def _set(self, name: str, kind: str, labels: Dict[str, Any], update) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._types[name] = kind
+            values = self._values.setdefault(name, {})
+            values[key] = update(values.get(key, 0.0))
+
+    def to_prometheus(self) -> str:
+        """Render the registry in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each phase of a Daytona execution",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for phase in sorted(self._counts):
+                for bound, count in zip(BUCKETS, self._buckets[phase]):
+                    lines.append(f'{METRIC_NAME}_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_NAME}_bucket{{phase="{phase}",le="+Inf"}} {self._counts[phase]}')
+                lines.append(f'{METRIC_NAME}_sum{{phase="{phase}"}} {self._sums[phase]:.6f}')
+                lines.append(f'{METRIC_NAME}_count{{phase="{phase}"}} {self._counts[phase]}')
+            for name in sorted(self._values):
+                lines.append(f"# TYPE {GAUGE_PREFIX}{name} {self._types[name]}")
+                for key, value in sorted(self._values[name].items()):
+                    labels = ",".join(f'{k}="{v}"' for k, v in key)
+                    lines.append(f"{GAUGE_PREFIX}{name}{{{labels}}} {value:g}" if labels else f"{GAUGE_PREFIX}{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("daytona_goose_trace", default=None)
+
+
+@contextmanager
+def start_trace() -> Iterator[Trace]:
+    """Activate a new Trace for spans recorded in this context"""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """
+    Time a phase, recording it in the registry and the active trace
+
+    Args:
+        name: Phase name, e.g. "create" or "exec"
+        **attributes: Extra attributes attached to the exported span
+    """
+    start_ns = time.time_ns()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe(name, duration)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(Span(name, start_ns, duration, attributes))
+
+
+def export_trace(trace: Trace) -> None:
+    """Export a finished trace according to the DAYTONA_METRICS_* settings"""
+    path = os.getenv('DAYTONA_METRICS_FILE')
+    endpoint = os.getenv('DAYTONA_METRICS_ENDPOINT')
+    try:
+        if path:
+            if os.getenv('DAYTONA_METRICS_FORMAT', 'prometheus').lower() == 'otlp-json':
+                with open(path, 'a') as f:
+                    f.write(json.dumps(trace.to_otlp()) + "\n")
+            else:
+                with open(path, 'w') as f:
+                    f.write(registry.to_prometheus())
+        if endpoint:
+            import urllib.request
+
+            request = urllib.request.Request(
+                endpoint,
+                data=json.dumps(trace.to_otlp()).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+            urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        print(f"⚠️ Failed to export metrics: {e}")
@@ -0,0 +1,324 @@
+"""
+Warm workspace pool layered on top of WorkspaceManager
+"""
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .daytona_executor import WorkspaceManager
+from .metrics import span
+
+# Command run on a workspace before it is handed back to the idle set. It kills
+# the processes a lease left behind, i.e. those running with the workspace's HOME
+# apart from this shell's ancestors (the toolbox daemon among them), and removes
+# the sources, build cache, artifacts, stream output and temporary files. Packages
+# installed by DependencyInstaller are kept: they are shared on purpose and known
+# to the capabilities cache.
+RESET_COMMAND = (
+    'keep=" $$ "; pid=$$; '
+    'while [ -n "$pid" ] && [ "$pid" -gt 1 ]; do '
+    'pid=$(sed -n "s/^PPid:[[:space:]]*//p" /proc/$pid/status 2>/dev/null); keep="$keep$pid "; done; '
+    'for dir in /proc/[0-9]*; do pid=${dir#/proc/}; '
+    'case "$keep" in *" $pid "*) continue;; esac; '
+    'tr "\\0" "\\n" < $dir/environ 2>/dev/null | grep -qxF "HOME=$HOME" && kill -9 $pid 2>/dev/null; '
+    'done; '
+    "rm -rf /home/daytona/code.* /home/daytona/batch_* /home/daytona/.wheelhouse_* /home/daytona/.build "
+    "/home/daytona/.artifacts /home/daytona/.stream_* /tmp/* /tmp/.[!.]* 2>/dev/null; true"
+)
+
+# Command used to check that an idle workspace still responds
+HEALTH_CHECK_COMMAND = "echo ok"
+
+
+class PooledWorkspace:
+    """Bookkeeping for a workspace owned by a WorkspacePool"""
+    def __init__(self, workspace: Any):
+        self.workspace = workspace
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.leases = 0
+
+
+class WorkspacePool:
+    """
+    Keeps a set of pre-created workspaces ready for execution
+
+    Workspaces are leased to a caller, reset and health-checked between
+    leases, and evicted once they have been idle longer than the TTL while
+    the pool is above its minimum size.
+    """
+    def __init__(self, manager: Optional[WorkspaceManager] = None,
+                 min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 idle_ttl: Optional[float] = None, name: str = "Goose-Daytona-Pool"):
+        self.manager = manager or WorkspaceManager()
+        config = self.manager.config
+        self.min_size = config.pool_min_size if min_size is None else min_size
+        self.max_size = config.pool_max_size if max_size is None else max_size
+        self.idle_ttl = config.pool_idle_ttl if idle_ttl is None else idle_ttl
+        self.name = name
+
+        if self.max_size < 1 or self.min_size > self.max_size:
+            raise ValueError("Pool size must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self._idle: List[PooledWorkspace] = []
+        self._leased: Dict[str, PooledWorkspace] = {}
+        self._creating = 0
+        self._lock = threading.Condition()
+        self._closed = False
+        self._maintenance_thread: Optional[threading.Thread] = None
+
+    @property
+    def size(self) -> int:
+        """Number of workspaces owned by the pool, including ones being created"""
+        return len(self._idle) + len(self._leased) + self._creating
+
+    def start(self) -> "WorkspacePool":
+        """
+        Pre-warm the pool up to its minimum size and start idle eviction
+
+        Returns:
+            The pool itself, for chaining
+        """
+        self.replenish()
+        if self._maintenance_thread is None:
+            self._maintenance_thread = threading.Thread(target=self._maintenance_loop, daemon=True)
+            self._maintenance_thread.start()
+        return self
+
+    def replenish(self) -> None:
+        """Create workspaces until the pool holds at least min_size of them"""
+        while True:
+            with self._lock:
+                if self._closed or self.size >= self.min_size:
+                    return
+                self._creating += 1
+            entry = self._create_entry()
+            with self._lock:
+                self._creating -= 1
+                if entry:
+                    self._idle.append(entry)
+                self._lock.notify_all()
+            if not entry:
+                return
+
+    def acquire(self, timeout: Optional[float] = None, create: bool = True) -> Optional[Any]:
+        """
+        Lease a healthy workspace from the pool
+
+        Args:
+            timeout: Seconds to wait for a workspace when the pool is at
+                max_size. None waits indefinitely.
+            create: False to lease only an idle workspace, returning None
+                right away instead of creating or waiting for one
+
+        Returns:
+            Workspace object or None if no workspace could be leased
+        """
+        with span("lease"):
+            return self._acquire(timeout, create)
+
+    def _acquire(self, timeout: Optional[float], create_missing: bool = True) -> Optional[Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = None
+            create = False
+            with self._lock:
+                if not self._idle and not create_missing:
+                    return None
+                while not self._idle and (self.size >= self.max_size or self._api_down()) and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        print("❌ Timed out waiting for a pooled workspace")
+                        return None
+                    # Wake up periodically: the API recovering does not notify
+                    self._lock.wait(1.0 if remaining is None else min(remaining, 1.0))
+                if self._closed:
+                    return None
+                if self._idle:
+                    # Most recently used first, so cold entries age out via TTL
+                    entry = self._idle.pop()
+                else:
+                    self._creating += 1
+                    create = True
+
+            if create:
+                entry = self._create_entry()
+                with self._lock:
+                    self._creating -= 1
+                    self._lock.notify_all()
+                if not entry:
+                    return None
+            elif not self._is_healthy(entry):
+                print(f"⚠️ Pooled workspace {entry.workspace.id} failed health check, replacing it")
+                self._discard(entry)
+                continue
+
+            with self._lock:
+                entry.leases += 1
+                entry.last_used = time.monotonic()
+                self._leased[entry.workspace.id] = entry
+            return entry.workspace
+
+    def _api_down(self) -> bool:
+        """True while the Daytona API circuit is open and a leased workspace can be waited for instead"""
+        return bool(self._leased) and self.manager.api_breaker.is_open
+
+    def release(self, workspace: Any, healthy: bool = True) -> None:
+        """
+        Return a leased workspace to the pool
+
+        Args:
+            workspace: Workspace previously returned by acquire()
+            healthy: False to remove the workspace instead of reusing it
+        """
+        with self._lock:
+            entry = self._leased.pop(workspace.id, None)
+        if entry is None:
+            return
+
+        if healthy and not self._closed:
+            with span("reset"):
+                healthy = self._reset(entry)
+
+        if not healthy or self._closed:
+            self._discard(entry)
+            return
+
+        with self._lock:
+            entry.last_used = time.monotonic()
+            self._idle.append(entry)
+            self._lock.notify_all()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[Optional[Any]]:
+        """
+        Context manager that leases a workspace and returns it afterwards
+
+        Args:
+            timeout: Seconds to wait for a free workspace
+
+        Yields:
+            Workspace object or None if no workspace could be leased
+        """
+        workspace = self.acquire(timeout=timeout)
+        healthy = True
+        try:
+            yield workspace
+        except BaseException:
+            healthy = False
+            raise
+        finally:
+            if workspace is not None:
+                self.release(workspace, healthy=healthy)
+
+    def evict_idle(self) -> int:
+        """
+        Remove workspaces idle longer than idle_ttl, keeping min_size
+
+        Returns:
+            Number of workspaces evicted
+        """
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for entry in sorted(self._idle, key=lambda e: e.last_used):
+                if self.size - len(expired) <= self.min_size:
+                    break
+                if now - entry.last_used >= self.idle_ttl:
+                    expired.append(entry)
+            for entry in expired:
+                self._idle.remove(entry)
+            self._lock.notify_all()
+
+        for entry in expired:
+            print(f"🧹 Evicting idle workspace {entry.workspace.id}")
+            self._remove(entry)
+        return len(expired)
+
+    def close(self) -> None:
+        """Remove every workspace owned by the pool"""
+        with self._lock:
+            self._closed = True
+            entries = self._idle + list(self._leased.values())
+            self._idle = []
+            self._leased = {}
+            self._lock.notify_all()
+        for entry in entries:
+            self._remove(entry)
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of pool occupancy"""
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "creating": self._creating,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+    def _create_entry(self) -> Optional[PooledWorkspace]:
+        workspace = self.manager.create_workspace(name=self.name)
+        return PooledWorkspace(workspace) if workspace else None
+
+    def _is_healthy(self, entry: PooledWorkspace) -> bool:
+        try:
+            result = entry.workspace.process.exec(HEALTH_CHECK_COMMAND)
+            return result.exit_code == 0
+        except Exception:
+            return False
+
+    def _reset(self, entry: PooledWorkspace) -> bool:
+        try:
+            result = entry.workspace.process.exec(RESET_COMMAND)
+            return result.exit_code == 0
+        except Exception as e:
+            print(f"⚠️ Failed to reset workspace {entry.workspace.id}: {e}")
+            return False
+
+    def _discard(self, entry: PooledWorkspace) -> None:
+        # Removal of a broken workspace should not delay the caller
+        self.manager.schedule_cleanup(entry.workspace)
+        with self._lock:
+            self._lock.notify_all()
+
+    def _remove(self, entry: PooledWorkspace) -> None:
+        self.manager.cleanup_workspace(entry.workspace)
+
+    def _maintenance_loop(self) -> None:
+        interval = max(1.0, min(self.idle_ttl / 2, 30.0))
+        while not self._closed:
+            time.sleep(interval)
+            if self._closed:
+                break
+            try:
+                self.evict_idle()
+                self.replenish()
+            except Exception as e:
+                print(f"⚠️ Pool maintenance error: {e}")
+
+
+_default_pool: Optional[WorkspacePool] = None
+_default_pool_lock = threading.Lock()
+
+
+def peek_default_pool() -> Optional[WorkspacePool]:
+    """Return the process-wide workspace pool if it has been created, without creating it"""
+    return _default_pool
+
+
+def get_default_pool() -> WorkspacePool:
+    """
+    Return the process-wide workspace pool, creating and warming it on first use
+
+    Returns:
+        Shared WorkspacePool instance
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = WorkspacePool().start()
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Multi-file project execution with delta sync
+
+A local project directory is mirrored into a workspace that is kept between
+runs. Files are identified by content hash; a manifest of the synced state
+is stored next to the files in the workspace, so each run uploads only the
+files that changed and deletes the ones that were removed. Large change sets
+(and the first sync) go up as a single compressed archive.
+"""
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+from typing import Any, Dict, List, Optional
+
+from .admission import AdmissionRejected, get_admission_controller
+from .daytona_executor import WorkspaceManager
+from .dependencies import DependencyInstaller, RequirementsSpec
+from .kernel import KernelRegistry
+from .metrics import span
+
+REMOTE_PROJECT_ROOT = "/home/daytona/project"
+
+MANIFEST_NAME = ".daytona_manifest.json"
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "daytona-goose", "projects.json")
+
+# Paths never uploaded; extend with DAYTONA_SYNC_IGNORE (comma separated)
+DEFAULT_IGNORE = [
+    ".git", ".hg", ".svn", "__pycache__", "*.pyc", ".venv", "venv", "node_modules",
+    ".mypy_cache", ".pytest_cache", ".env", ".DS_Store", MANIFEST_NAME,
+]
+
+
+def _is_ignored(relpath: str, patterns: List[str]) -> bool:
+    parts = relpath.split("/")
+    return any(fnmatch.fnmatch(part, pattern) for part in parts for pattern in patterns) or \
+        any(fnmatch.fnmatch(relpath, pattern) for pattern in patterns)
+
+
+def _quote_paths(paths: List[str]) -> str:
+    return " ".join("'" + path.replace("'", "'\\''") + "'" for path in paths)
+
+
+def build_manifest(root: str, ignore: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Hash every file of a project
+
+    Args:
+        root: Local project directory
+        ignore: Glob patterns matched against path components and relative paths
+
+    Returns:
+        Mapping of POSIX relative path to SHA-256 of the file contents
+    """
+    if ignore is None:
+        extra = os.getenv('DAYTONA_SYNC_IGNORE', '')
+        ignore = DEFAULT_IGNORE + [p.strip() for p in extra.split(",") if p.strip()]
+
+    manifest = {}
+    for directory, dirnames, filenames in os.walk(root):
+        reldir = os.path.relpath(directory, root).replace(os.sep, "/")
+        reldir = "" if reldir == "." else reldir + "/"
+        dirnames[:] = sorted(d for d in dirnames if not _is_ignored(reldir + d, ignore))
+        for filename in sorted(filenames):
+            relpath = reldir + filename
+            if _is_ignored(relpath, ignore):
+                continue
+            digest = hashlib.sha256()
+            with open(os.path.join(directory, filename), "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            manifest[relpath] = digest.hexdigest()
+    return manifest
+
+
+class ProjectSync:
+    """Mirrors a local directory into a workspace, transferring only changes"""
+    def __init__(self, workspace: Any, local_root: str, remote_root: str = REMOTE_PROJECT_ROOT,
+                 archive_threshold: Optional[int] = None):
+        """
+        Args:
+            workspace: Daytona workspace object
+            local_root: Local project directory
+            remote_root: Directory the project is mirrored to
+            archive_threshold: Change sets with more files than this are sent
+                as one archive, defaults to DAYTONA_SYNC_ARCHIVE_THRESHOLD
+        """
+        self.workspace = workspace
+        self.local_root = os.path.abspath(local_root)
+        self.remote_root = remote_root
+        self.archive_threshold = archive_threshold if archive_threshold is not None else \
+            int(os.getenv('DAYTONA_SYNC_ARCHIVE_THRESHOLD', '4'))
+
+    def remote_manifest(self) -> Dict[str, str]:
+        """Return the manifest of the last sync, or {} if the workspace has none"""
+        try:
+            return json.loads(self.workspace.fs.download_file(f"{self.remote_root}/{MANIFEST_NAME}"))
+        except Exception:
+            return {}
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        Bring the workspace copy up to date with the local directory
+
+        Returns:
+            Dictionary with the transfer mode, files uploaded and deleted,
+            and bytes sent
+        """
+        with span("sync"):
+            local = build_manifest(self.local_root)
+            remote = self.remote_manifest()
+            changed = [path for path, digest in local.items() if remote.get(path) != digest]
+            deleted = [path for path in remote if path not in local]
+            manifest_data = json.dumps(local, sort_keys=True).encode("utf-8")
+
+            if not changed and not deleted:
+                return {"mode": "unchanged", "uploaded": 0, "deleted": 0, "bytes": 0}
+
+            if not remote or len(changed) > self.archive_threshold:
+                mode = "archive"
+                sent = self._send_archive(changed, deleted, manifest_data)
+            else:
+                mode = "files"
+                sent = self._send_files(changed, deleted, remote, manifest_data)
+
+        print(f"🔄 Synced {len(changed)} changed and {len(deleted)} deleted files ({sent} bytes, {mode})")
+        return {"mode": mode, "uploaded": len(changed), "deleted": len(deleted), "bytes": sent}
+
+    def _delete_command(self, deleted: List[str]) -> str:
+        if not deleted:
+            return "true"
+        return f"cd {self.remote_root} && rm -f {_quote_paths(deleted)}"
+
+    def _send_archive(self, changed: List[str], deleted: List[str], manifest_data: bytes) -> int:
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+            for path in changed:
+                tar.add(os.path.join(self.local_root, path), arcname=path, recursive=False)
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(manifest_data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(manifest_data))
+
+        data = archive.getvalue()
+        remote_archive = f"{self.remote_root}.sync.tar.gz"
+        self.workspace.fs.upload_file(remote_archive, data)
+        result = self.workspace.process.exec(
+            f"mkdir -p {self.remote_root} && tar -xzf {remote_archive} -C {self.remote_root} && "
+            f"rm -f {remote_archive} && {self._delete_command(deleted)}"
+        )
+        if result.exit_code != 0:
+            raise RuntimeError(f"Project sync failed: {result.result.strip()}")
+        return len(data)
+
+    def _send_files(self, changed: List[str], deleted: List[str], remote: Dict[str, str],
+                    manifest_data: bytes) -> int:
+        # Create directories the workspace does not have yet and drop removed
+        # files in one command before uploading
+        known_dirs = {os.path.dirname(path) for path in remote}
+        new_dirs = sorted({os.path.dirname(path) for path in changed} - known_dirs - {""})
+        if new_dirs or deleted:
+            mkdir = f"cd {self.remote_root} && mkdir -p {_quote_paths(new_dirs)}" if new_dirs else "true"
+            result = self.workspace.process.exec(f"{mkdir} && {self._delete_command(deleted)}")
+            if result.exit_code != 0:
+                raise RuntimeError(f"Project sync failed: {result.result.strip()}")
+
+        sent = 0
+        for path in changed:
+            with open(os.path.join(self.local_root, path), "rb") as f:
+                data = f.read()
+            self.workspace.fs.upload_file(f"{self.remote_root}/{path}", data)
+            sent += len(data)
+        # Written last so an interrupted sync is retried on the next run
+        self.workspace.fs.upload_file(f"{self.remote_root}/{MANIFEST_NAME}", manifest_data)
+        return sent + len(manifest_data)
+
+
+def get_project_workspace(project_dir: str, manager: WorkspaceManager,
+                          registry: Optional[KernelRegistry] = None) -> Optional[Any]:
+    """
+    Return the workspace kept for a project, creating one if needed
+
+    Args:
+        project_dir: Local project directory
+        manager: Manager that creates and looks up workspaces
+        registry: Project-to-workspace map, defaults to DAYTONA_PROJECT_REGISTRY
+
+    Returns:
+        Workspace object or None if one could not be created
+    """
+    registry = registry or KernelRegistry(os.getenv('DAYTONA_PROJECT_REGISTRY', DEFAULT_REGISTRY_PATH))
+    key = os.path.abspath(project_dir)
+
+    entry = registry.get(key)
+    if entry:
+        workspace = None
+        try:
+            workspace = manager.daytona_client.get_current_workspace(entry["workspace_id"])
+            if workspace.process.exec("echo ok").exit_code == 0:
+                return workspace
+        except Exception as e:
+            print(f"⚠️ Project workspace {entry['workspace_id']} is gone: {e}")
+        # Persistent workspaces are invisible to the reaper, so remove the unresponsive one here
+        if workspace is not None:
+            manager.schedule_cleanup(workspace)
+        registry.remove(key)
+
+    workspace = manager.create_workspace(name="Goose-Daytona-Project", persistent=True)
+    if workspace:
+        registry.set(key, {"workspace_id": workspace.id, "created_at": time.time()})
+    return workspace
+
+
+def execute_project(project_dir: str, entrypoint: str = "main.py", args: Optional[List[str]] = None,
+                    manager: Optional[WorkspaceManager] = None, priority: Optional[Any] = None,
+                    session: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Sync a project into its workspace and run its entry point
+
+    The workspace is kept so the next run only transfers what changed. A
+    requirements.txt at the project root is installed before running.
+    Runs are admitted through the process-wide AdmissionController.
+
+    Args:
+        project_dir: Local project directory
+        entrypoint: Script to run, relative to the project root
+        args: Arguments passed to the script
+        manager: Manager to use, created if omitted
+        priority: "high", "normal", "low" or a number, defaults to DAYTONA_PRIORITY
+        session: Session the run is queued under, defaults to GOOSE_SESSION_ID
+
+    Returns:
+        Dictionary with execution results and a "sync" summary
+    """
+    try:
+        if not os.path.isfile(os.path.join(project_dir, entrypoint)):
+            return {"success": False, "output": f"Entry point {entrypoint} not found in {project_dir}", "exit_code": 1}
+
+        manager = manager or WorkspaceManager()
+        with get_admission_controller().admit(priority, session):
+            workspace = get_project_workspace(project_dir, manager)
+            if not workspace:
+                return {"success": False, "output": "Failed to create workspace", "exit_code": 1}
+
+            sync_stats = ProjectSync(workspace, project_dir).sync()
+
+            requirements_file = os.path.join(project_dir, "requirements.txt")
+            if os.path.exists(requirements_file):
+                DependencyInstaller().ensure(manager, workspace, RequirementsSpec.from_file(requirements_file))
+
+            python_path = manager.get_capabilities(workspace).interpreter
+            arguments = _quote_paths(args or [])
+            limits = manager.resource_limits
+            command = limits.wrap(f"{python_path} {entrypoint} {arguments}")
+            print(f"🧪 Running {entrypoint} in workspace {workspace.id}...")
+            with span("exec", mode="project"):
+                result = workspace.process.exec(f"cd {REMOTE_PROJECT_ROOT} && {command} 2>&1",
+                                                timeout=limits.client_timeout())
+
+            output = result.result.strip()
+            limit_message = limits.describe(result.exit_code)
+            if limit_message:
+                print(f"⏱️ {limit_message}")
+                output = f"{output}\n{limit_message}".strip()
+
+            return {
+                "success": result.exit_code == 0,
+                "output": output,
+                "exit_code": result.exit_code,
+                "timed_out": limit_message is not None,
+                "sync": sync_stats
+            }
+    except AdmissionRejected as e:
+        print(f"🚦 {e}")
+        return {"success": False, "output": str(e), "exit_code": 1, "rejected": True}
+    except Exception as e:
+        return {"success": False, "output": f"Execution failed: {str(e)}", "exit_code": 1}
+
+
+def end_project(project_dir: str, manager: Optional[WorkspaceManager] = None) -> bool:
+    """
+    Remove the workspace kept for a project
+
+    Args:
+        project_dir: Local project directory
+        manager: Manager to use, created if omitted
+
+    Returns:
+        True if a workspace was found and removed
+    """
+    registry = KernelRegistry(os.getenv('DAYTONA_PROJECT_REGISTRY', DEFAULT_REGISTRY_PATH))
+    entry = registry.remove(os.path.abspath(project_dir))
+    if not entry:
+        return False
+    manager = manager or WorkspaceManager()
+    try:
+        workspace = manager.daytona_client.get_current_workspace(entry["workspace_id"])
+    except Exception as e:
+        print(f"⚠️ Project workspace {entry['workspace_id']} not found: {e}")
+        return False
+    return manager.cleanup_workspace(workspace)
+
+
+def main():
+    """Command-line entry point: `run DIR [ENTRYPOINT [ARGS...]]` or `end DIR`"""
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == "run":
+        entrypoint = args[2] if len(args) > 2 else "main.py"
+        result = execute_project(args[1], entrypoint, args[3:])
+        print(result.get("output", ""))
+        return 0 if result.get("success", False) else 1
+    if len(args) == 2 and args[0] == "end":
+        if end_project(args[1]):
+            return 0
+        print("No workspace kept for this project")
+        return 1
+    print("Usage: python -m daytona_goose.project run DIR [ENTRYPOINT [ARGS...]]")
+    print("       python -m daytona_goose.project end DIR")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Retries, deadlines and a circuit breaker for Daytona SDK calls
+
+WorkspaceManager routes its SDK calls through call_resilient():
+    - idempotent calls (upload, probes, lookups) are retried with jittered
+      exponential backoff, so one transient error does not fail a request
+    - calls that are not idempotent (creation, removal) get a single attempt
+    - calls get a deadline (DAYTONA_TIMEOUT by default); a call that exceeds
+      it raises DeadlineExceeded instead of blocking the caller. Removals
+      skip the deadline thread pool, which is shut down at interpreter exit
+      when queued removals still have to run
+    - a CircuitBreaker counts failed control-plane calls and, once the
+      Daytona API looks unhealthy, fails further calls immediately with
+      CircuitOpenError until a trial call succeeds, so callers can fall back
+      to warm workspaces instead of waiting on timeouts
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .metrics import registry
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the Daytona API while the circuit is open"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an SDK call does not return within its deadline"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+    def __init__(self, attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0):
+        """
+        Args:
+            attempts: Total tries per call, including the first
+            base_delay: Upper bound of the first backoff in seconds
+            max_delay: Cap on the backoff upper bound
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delays(self) -> Iterator[float]:
+        """Yield the sleep before each retry; each is uniform in [0, min(max, base * 2^n)]"""
+        for attempt in range(self.attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over consecutive failures
+
+    After failure_threshold consecutive failed calls the circuit opens and
+    calls are refused for reset_timeout seconds. Then one trial call is let
+    through (half-open); its success closes the circuit, its failure opens it
+    again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused"""
+        return self.state == self.OPEN
+
+    def before_call(self) -> None:
+        """
+        Reserve permission for a call
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a
+                trial call already running
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"Daytona {self.name} circuit is open after repeated failures")
+                self._state = self.HALF_OPEN
+                self._trial_running = False
+            if self._state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise CircuitOpenError(f"Daytona {self.name} circuit is half-open, trial call in progress")
+                self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            if self._state != self.CLOSED:
+                print(f"✅ Daytona {self.name} circuit closed")
+            self._state = self.CLOSED
+            registry.set_gauge("circuit_open", 0, circuit=self.name)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"⚠️ Daytona {self.name} circuit opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                registry.set_gauge("circuit_open", 1, circuit=self.name)
+
+
+# Runs calls that have a deadline; a call that overruns keeps its thread until it returns
+_deadline_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="daytona-call")
+
+
+def call_with_deadline(fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None,
+                       on_late_result: Optional[Callable[[Any], None]] = None, **kwargs: Any) -> Any:
+    """
+    Call fn, giving up after timeout seconds
+
+    Args:
+        fn: Function to call
+        timeout: Deadline in seconds, None or 0 calls fn directly
+        on_late_result: Called with fn's return value if it completes after
+            the deadline passed, e.g. to remove a workspace nobody will use
+
+    Raises:
+        DeadlineExceeded: If fn did not return in time
+    """
+    if not timeout:
+        return fn(*args, **kwargs)
+
+    future = _deadline_executor.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        if on_late_result is not None:
+            def late(done):
+                if not done.cancelled() and done.exception() is None:
+                    on_late_result(done.result())
+            future.add_done_callback(late)
+        raise DeadlineExceeded(f"{getattr(fn, '__name__', 'call')} did not finish within {timeout:g}s") from None
+
+
+def call_resilient(fn: Callable[..., Any], *args: Any, operation: str = "call",
+                   policy: Optional[RetryPolicy] = None, retry: bool = True,
+                   deadline: Optional[float] = None, breaker: Optional[CircuitBreaker] = None,
+                   on_late_result: Optional[Callable[[Any], None]] = None, **kwargs: Any) -> Any:
+    """
+    Call an SDK function with a deadline, retries and a circuit breaker
+
+    Args:
+        fn: SDK function to call
+        operation: Name used in log messages and metrics
+        policy: Backoff between attempts, defaults to RetryPolicy()
+        retry: False for calls that must not run twice; they get one attempt
+        deadline: Seconds each attempt may take
+        breaker: Circuit breaker that gates the call and records its outcome
+        on_late_result: See call_with_deadline; a call that overran its
+            deadline is never retried
+
+    Raises:
+        CircuitOpenError: If the breaker refused the call
+        Exception: The last error once all attempts failed
+    """
+    policy = policy or RetryPolicy()
+    delays = policy.delays() if retry else iter(())
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = call_with_deadline(fn, *args, timeout=deadline, on_late_result=on_late_result, **kwargs)
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure()
+            registry.increment("sdk_errors_total", operation=operation)
+            delay = next(delays, None)
+            if delay is None or (on_late_result is not None and isinstance(e, DeadlineExceeded)):
+                raise
+            print(f"🔁 {operation} failed ({e}), retrying in {delay:.2f}s")
+            registry.increment("sdk_retries_total", operation=operation)
+            time.sleep(delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Return the process-wide breaker with this name, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return breaker
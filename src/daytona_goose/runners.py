@@ -0,0 +1,139 @@
+"""
+Language runners for code executed in a workspace
+
+Each Runner knows the file extension of a language and the shell command
+that runs a source file. Compiled languages build into a directory named by
+the hash of the source under BUILD_ROOT and reuse the binary when the same
+source runs again on the workspace, so unchanged snippets skip compilation.
+Register additional languages with register_runner().
+"""
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+# Compiled binaries are kept here, one directory per source hash
+BUILD_ROOT = "/home/daytona/.build"
+
+CODE_ROOT = "/home/daytona"
+
+
+class Runner:
+    """How to run source code of one language"""
+    def __init__(self, name: str, extension: str, run: str, compile: Optional[str] = None,
+                 aliases: Iterable[str] = (), version: Optional[str] = None):
+        """
+        Args:
+            name: Canonical language name
+            extension: Source file extension without the dot
+            run: Command template; {source} is the source file, {binary} the
+                compiled binary and {python} the workspace's Python interpreter
+            compile: Build command template for compiled languages, using
+                {source} and {binary}
+            aliases: Other names the language is known by, e.g. fence tags
+            version: Shell command whose first output line identifies the
+                toolchain, part of the result cache key; None uses the
+                workspace's Python version
+        """
+        self.name = name
+        self.extension = extension
+        self.run = run
+        self.compile = compile
+        self.aliases = tuple(aliases)
+        self.version = version
+
+    @property
+    def compiled(self) -> bool:
+        return self.compile is not None
+
+    def source_path(self, code: str, directory: str = CODE_ROOT) -> str:
+        """
+        Return where the source should be uploaded
+
+        Compiled sources go to a build directory keyed by their hash so a
+        binary built earlier from identical source is found again.
+        """
+        if self.compiled:
+            digest = hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+            return f"{BUILD_ROOT}/{self.name}/{digest}/main.{self.extension}"
+        return f"{directory}/code.{self.extension}"
+
+    def command(self, source_path: str, python: str = "python3") -> str:
+        """
+        Return the shell command that runs source_path, building it first if needed
+
+        Args:
+            source_path: Uploaded source file
+            python: Python interpreter of the workspace
+        """
+        if not self.compiled:
+            return self.run.format(source=source_path, python=python)
+
+        build_dir = source_path.rsplit("/", 1)[0]
+        binary = f"{build_dir}/main"
+        # Build under a per-process name and rename, so concurrent runs of the
+        # same source never execute a half-written binary
+        build = self.compile.format(source=source_path, binary=f"{binary}.$$")
+        return (
+            f"if [ ! -x {binary} ]; then "
+            f"{build} > {build_dir}/compile.$$.log 2>&1 && mv -f {binary}.$$ {binary} "
+            f"|| {{ cat {build_dir}/compile.$$.log; rm -f {binary}.$$ {build_dir}/compile.$$.log; exit 1; }}; "
+            f"rm -f {build_dir}/compile.$$.log; "
+            f"fi; {self.run.format(source=source_path, binary=binary, python=python)}"
+        )
+
+
+_runners: Dict[str, Runner] = {}
+
+
+def register_runner(runner: Runner) -> None:
+    """Make a runner available under its name and aliases, replacing existing ones"""
+    for name in (runner.name,) + runner.aliases:
+        _runners[name.lower()] = runner
+
+
+def get_runner(language: str) -> Runner:
+    """
+    Return the runner for a language name or alias
+
+    Raises:
+        ValueError: If no runner is registered for the language
+    """
+    runner = find_runner(language)
+    if runner is None:
+        raise ValueError(f"Unsupported language: {language} (supported: {', '.join(supported_languages())})")
+    return runner
+
+
+def find_runner(language: str) -> Optional[Runner]:
+    """Return the runner for a language name or alias, or None if there is none"""
+    return _runners.get((language or "python").strip().lower())
+
+
+def runner_for_path(path: str) -> Optional[Runner]:
+    """Return the runner whose extension matches a file path, if any"""
+    extension = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    for runner in _runners.values():
+        if runner.extension == extension:
+            return runner
+    return None
+
+
+def supported_languages() -> List[str]:
+    """Return the canonical names of the registered languages"""
+    return sorted({runner.name for runner in _runners.values()})
+
+
+for _runner in (
+    Runner("python", "py", "{python} {source}", aliases=("py", "python3")),
+    Runner("javascript", "js", "node {source}", aliases=("js", "node", "nodejs"), version="node --version"),
+    Runner("typescript", "ts", "npx --yes tsx {source}", aliases=("ts",), version="node --version"),
+    Runner("bash", "sh", "bash {source}", aliases=("sh", "shell", "zsh"), version="bash --version"),
+    Runner("ruby", "rb", "ruby {source}", aliases=("rb",), version="ruby --version"),
+    Runner("go", "go", "{binary}", compile="go build -o {binary} {source}", aliases=("golang",),
+           version="go version"),
+    Runner("c", "c", "{binary}", compile="cc -O2 -o {binary} {source} -lm", version="cc --version"),
+    Runner("cpp", "cpp", "{binary}", compile="c++ -O2 -o {binary} {source}", aliases=("c++", "cxx"),
+           version="c++ --version"),
+    Runner("rust", "rs", "{binary}", compile="rustc -O -o {binary} {source}", aliases=("rs",),
+           version="rustc --version"),
+):
+    register_runner(_runner)
@@ -0,0 +1,131 @@
+"""
+Streaming stdout/stderr from code running in a Daytona workspace
+"""
+import base64
+import codecs
+import time
+import uuid
+from typing import Any, Callable, Iterator, Optional
+
+from .backends import session_request
+
+
+class ExecutionStream:
+    """
+    Iterator over the output of a command running in a workspace
+
+    The command runs in a background session with its output redirected to a
+    file. Each iteration step reads at most chunk_size new bytes from that
+    file, so output is only fetched as fast as the consumer pulls it and at
+    most max_output bytes are ever transferred. Once the stream is exhausted,
+    exit_code holds the command's exit status.
+    """
+    def __init__(self, workspace: Any, command: str, max_output: int = 10 * 1024 * 1024,
+                 chunk_size: int = 64 * 1024, poll_interval: float = 0.2,
+                 on_close: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            workspace: Daytona workspace object
+            command: Shell command to run
+            max_output: Byte cap after which the command is killed
+            chunk_size: Maximum bytes fetched per poll
+            poll_interval: Seconds to wait between polls when no new output
+            on_close: Called once the stream finishes, e.g. to remove the workspace
+        """
+        self.workspace = workspace
+        self.command = command
+        self.max_output = max_output
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.on_close = on_close
+
+        self.exit_code: Optional[int] = None
+        self.truncated = False
+        self.bytes_read = 0
+
+        run_id = uuid.uuid4().hex[:12]
+        self.session_id = f"stream-{run_id}"
+        self.output_path = f"/home/daytona/.stream_{run_id}.out"
+        self.exit_path = f"/home/daytona/.stream_{run_id}.exit"
+        self._started = False
+        self._closed = False
+
+    def start(self) -> None:
+        """Launch the command in a background session"""
+        if self._started:
+            return
+        self.workspace.process.create_session(self.session_id)
+        self.workspace.process.execute_session_command(
+            self.session_id,
+            session_request(
+                command=f"{self.command} > {self.output_path} 2>&1; echo $? > {self.exit_path}",
+                var_async=True
+            )
+        )
+        self._started = True
+
+    def __iter__(self) -> Iterator[str]:
+        self.start()
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        try:
+            while True:
+                status, data = self._poll()
+
+                if data:
+                    remaining = self.max_output - self.bytes_read
+                    if len(data) > remaining:
+                        self.bytes_read += remaining
+                        self.truncated = True
+                        text = decoder.decode(data[:remaining], final=True)
+                        if text:
+                            yield text
+                        yield f"\n... output truncated after {self.max_output} bytes"
+                        self.exit_code = 1
+                        return
+
+                    self.bytes_read += len(data)
+                    text = decoder.decode(data)
+                    if text:
+                        yield text
+                    if len(data) == self.chunk_size:
+                        # More output is probably waiting, read it right away
+                        continue
+
+                if status is not None:
+                    text = decoder.decode(b"", final=True)
+                    if text:
+                        yield text
+                    self.exit_code = status
+                    return
+
+                time.sleep(self.poll_interval)
+        finally:
+            self.close()
+
+    def _poll(self):
+        """Return (exit status or None, next chunk of output bytes)"""
+        result = self.workspace.process.exec(
+            f"if [ -f {self.exit_path} ]; then cat {self.exit_path}; else echo running; fi; "
+            f"tail -c +{self.bytes_read + 1} {self.output_path} 2>/dev/null "
+            f"| head -c {self.chunk_size} | base64 | tr -d '\\n'"
+        )
+        lines = result.result.strip().splitlines()
+        state = lines[0].strip() if lines else "running"
+        data = base64.b64decode(lines[1]) if len(lines) > 1 else b""
+        status = int(state) if state.lstrip("-").isdigit() else None
+        return status, data
+
+    def close(self) -> None:
+        """Stop the command if still running and remove its output files"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._started:
+                self.workspace.process.delete_session(self.session_id)
+                self.workspace.process.exec(f"rm -f {self.output_path} {self.exit_path}")
+        except Exception as e:
+            print(f"⚠️ Failed to clean up stream {self.session_id}: {e}")
+        finally:
+            if self.on_close:
+                self.on_close()
@@ -0,0 +1,283 @@
+"""
+Spreading workspaces over several Daytona targets
+
+DAYTONA_TARGETS lists the targets (regions, or the same region under
+different API keys) to use instead of the single DAYTONA_TARGET, e.g.
+
+    DAYTONA_TARGETS=us:8,eu:4,us-b=us:8
+
+Each entry is `[name=]target[:max_workspaces]`. A target's API key and server
+URL come from DAYTONA_API_KEY_<NAME> and DAYTONA_SERVER_URL_<NAME>, falling
+back to DAYTONA_API_KEY and DAYTONA_SERVER_URL.
+
+MultiTargetClient stands in for the Daytona client. Every workspace holds a
+slot on its target from creation until removal, so the limit caps both
+concurrent creations and the executions running on that target. New
+workspaces go to the target with the lowest expected creation latency (an
+EWMA of past creations, scaled by how full the target is); a target whose
+creation fails is skipped for a cooldown period and the next best is tried.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class TargetSpec:
+    """One entry of DAYTONA_TARGETS"""
+    def __init__(self, name: str, target: str, api_key: str, server_url: str,
+                 max_workspaces: int = 8):
+        self.name = name
+        self.target = target
+        self.api_key = api_key
+        self.server_url = server_url
+        self.max_workspaces = max_workspaces
+
+    @classmethod
+    def parse(cls, entry: str, default_limit: int = 8) -> "TargetSpec":
+        """
+        Parse a `[name=]target[:max_workspaces]` entry
+
+        Raises:
+            ValueError: If the entry is malformed or no API key is configured for it
+        """
+        entry = entry.strip()
+        name, _, rest = entry.rpartition("=")
+        target, _, limit = rest.partition(":")
+        name = name or target
+        if not target or (limit and not limit.isdigit()):
+            raise ValueError(f"Invalid DAYTONA_TARGETS entry: {entry!r}")
+
+        suffix = name.upper().replace("-", "_")
+        api_key = os.getenv(f"DAYTONA_API_KEY_{suffix}") or os.getenv("DAYTONA_API_KEY")
+        if not api_key:
+            raise ValueError(f"No API key for target {name} (set DAYTONA_API_KEY_{suffix} or DAYTONA_API_KEY)")
+        server_url = (os.getenv(f"DAYTONA_SERVER_URL_{suffix}")
+                      or os.getenv("DAYTONA_SERVER_URL", "https://app.daytona.io/api"))
+        return cls(name, target, api_key, server_url, int(limit) if limit else default_limit)
+
+
+def configured_targets() -> List[TargetSpec]:
+    """Return the targets listed in DAYTONA_TARGETS, or an empty list if it is unset"""
+    value = os.getenv("DAYTONA_TARGETS", "").strip()
+    if not value:
+        return []
+    default_limit = int(os.getenv("DAYTONA_TARGET_MAX_WORKSPACES", "8"))
+    return [TargetSpec.parse(entry, default_limit) for entry in value.split(",") if entry.strip()]
+
+
+class TargetState:
+    """Client, load and latency estimate of one target"""
+    def __init__(self, spec: TargetSpec, client: Any):
+        self.spec = spec
+        self.client = client
+        self.live = 0
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.live < self.spec.max_workspaces and now >= self.cooldown_until
+
+    def score(self, default_latency: float) -> float:
+        """Expected creation latency, penalised by the share of slots in use"""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + self.live / self.spec.max_workspaces)
+
+
+class MultiTargetClient:
+    """Daytona client facade that routes workspaces over several targets"""
+    def __init__(self, specs: List[TargetSpec], clients: Optional[List[Any]] = None,
+                 alpha: Optional[float] = None, cooldown: Optional[float] = None,
+                 wait_timeout: Optional[float] = None):
+        """
+        Args:
+            specs: Targets to use
+            clients: One client per spec, defaults to a Daytona client built from the spec
+            alpha: Weight of the newest sample in the latency EWMA, defaults
+                to DAYTONA_TARGET_EWMA_ALPHA or 0.3
+            cooldown: Seconds a target is skipped after a failed creation,
+                defaults to DAYTONA_TARGET_COOLDOWN or 30
+            wait_timeout: Seconds to wait for a free slot when every target is
+                full, defaults to DAYTONA_TARGET_WAIT or 60
+        """
+        if not specs:
+            raise ValueError("At least one target is required")
+        if clients is None:
+            # Deferred so importing this module does not pull in the SDK
+            from daytona_sdk import Daytona, DaytonaConfig
+
+            clients = [Daytona(config=DaytonaConfig(api_key=spec.api_key, server_url=spec.server_url,
+                                                    target=spec.target))
+                       for spec in specs]
+        self.targets = [TargetState(spec, client) for spec, client in zip(specs, clients)]
+        self.alpha = alpha if alpha is not None else float(os.getenv("DAYTONA_TARGET_EWMA_ALPHA", "0.3"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("DAYTONA_TARGET_COOLDOWN", "30"))
+        self.wait_timeout = wait_timeout if wait_timeout is not None else float(os.getenv("DAYTONA_TARGET_WAIT", "60"))
+        self._owners: Dict[str, TargetState] = {}
+        self._lock = threading.Condition()
+
+    def _acquire(self, tried: List[TargetState]) -> Optional[TargetState]:
+        """Reserve a slot on the best untried target, waiting while all of them are full"""
+        deadline = time.monotonic() + self.wait_timeout
+        with self._lock:
+            while True:
+                candidates = [t for t in self.targets if t not in tried]
+                if not candidates:
+                    return None
+                now = time.monotonic()
+                available = [t for t in candidates if t.available(now)]
+                if available:
+                    known = [t.latency for t in self.targets if t.latency is not None]
+                    # Untried targets are assumed as fast as the best known one so they get sampled
+                    default_latency = min(known) if known else 1.0
+                    best = min(available, key=lambda t: t.score(default_latency))
+                    best.live += 1
+                    return best
+
+                # Everything left is either full or cooling down; rather than
+                # wait, retry the cooling target that recovers first
+                not_full = [t for t in candidates if t.live < t.spec.max_workspaces]
+                if not_full:
+                    best = min(not_full, key=lambda t: t.cooldown_until)
+                    best.live += 1
+                    return best
+                remaining = deadline - now
+                if remaining <= 0:
+                    return None
+                self._lock.wait(remaining)
+
+    def _release(self, target: TargetState) -> None:
+        with self._lock:
+            target.live = max(0, target.live - 1)
+            self._lock.notify()
+
+    def _record(self, target: TargetState, latency: Optional[float]) -> None:
+        with self._lock:
+            if latency is None:
+                target.failures += 1
+                target.cooldown_until = time.monotonic() + self.cooldown
+            else:
+                target.failures = 0
+                target.cooldown_until = 0.0
+                target.latency = latency if target.latency is None else (
+                    self.alpha * latency + (1 - self.alpha) * target.latency)
+
+    def create(self, params: Any) -> Any:
+        """
+        Create a workspace on the best target, failing over to the others
+
+        Raises:
+            RuntimeError: If no target has a free slot in time or every target failed
+        """
+        tried: List[TargetState] = []
+        errors = []
+        while True:
+            target = self._acquire(tried)
+            if target is None:
+                break
+            tried.append(target)
+            params.target = target.spec.target
+            start = time.monotonic()
+            try:
+                workspace = target.client.create(params)
+            except Exception as e:
+                self._release(target)
+                self._record(target, None)
+                errors.append(f"{target.spec.name}: {e}")
+                print(f"⚠️ Workspace creation on target {target.spec.name} failed, trying another target: {e}")
+                continue
+            self._record(target, time.monotonic() - start)
+            with self._lock:
+                self._owners[workspace.id] = target
+            return workspace
+
+        if not errors:
+            raise RuntimeError(f"No Daytona target had a free slot within {self.wait_timeout:g}s")
+        raise RuntimeError("Workspace creation failed on every target: " + "; ".join(errors))
+
+    def _owner(self, workspace_id: str) -> Optional[TargetState]:
+        with self._lock:
+            return self._owners.get(workspace_id)
+
+    def remove(self, workspace: Any) -> None:
+        """Remove a workspace through the target that created it and free its slot"""
+        target = self._owner(workspace.id)
+        if target is None:
+            # Created by another process; find the target that knows it
+            last_error: Optional[Exception] = None
+            for candidate in self.targets:
+                try:
+                    candidate.client.remove(workspace)
+                    return
+                except Exception as e:
+                    last_error = e
+            raise last_error or RuntimeError(f"Workspace {workspace.id} not found on any target")
+
+        try:
+            target.client.remove(workspace)
+        finally:
+            # A failed removal must not leak the slot; retries find the target again by trying each
+            with self._lock:
+                self._owners.pop(workspace.id, None)
+            self._release(target)
+
+    def get_current_workspace(self, workspace_id: str) -> Any:
+        """Look up a workspace on its target, or on each target in turn"""
+        target = self._owner(workspace_id)
+        candidates = [target] if target else self.targets
+        last_error: Optional[Exception] = None
+        for candidate in candidates:
+            try:
+                return candidate.client.get_current_workspace(workspace_id)
+            except Exception as e:
+                last_error = e
+        raise last_error or RuntimeError(f"Workspace {workspace_id} not found on any target")
+
+    def list(self) -> List[Any]:
+        """List workspaces across all targets, skipping targets that fail to answer"""
+        workspaces = []
+        for target in self.targets:
+            try:
+                workspaces.extend(target.client.list())
+            except Exception as e:
+                print(f"⚠️ Could not list workspaces on target {target.spec.name}: {e}")
+        return workspaces
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return load, latency estimate and health of every target"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "name": t.spec.name,
+                    "target": t.spec.target,
+                    "live": t.live,
+                    "max_workspaces": t.spec.max_workspaces,
+                    "latency": t.latency,
+                    "failures": t.failures,
+                    "cooling_down": now < t.cooldown_until,
+                }
+                for t in self.targets
+            ]
+
+
+_default_client: Optional[MultiTargetClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_target_client() -> Optional[MultiTargetClient]:
+    """
+    Return the process-wide MultiTargetClient, or None if DAYTONA_TARGETS is unset
+
+    All WorkspaceManagers in a process share it so that the per-target limits
+    and latency estimates cover every workspace the process creates.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            specs = configured_targets()
+            if not specs:
+                return None
+            _default_client = MultiTargetClient(specs)
+        return _default_client
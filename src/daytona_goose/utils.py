@@ -2,10 +2,15 @@
 Utility functions for the Daytona-Goose integration.
 """
 import os
+import re
 import sys
 import json
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import time
+import weakref
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
 def load_environment() -> bool:
@@ -17,7 +22,10 @@ def load_environment() -> bool:
     """
     try:
         load_dotenv()
-        required_vars = ['OPENAI_API_KEY', 'DAYTONA_API_KEY']
+        required_vars = ['OPENAI_API_KEY']
+        # The local backend runs without a Daytona account
+        if os.getenv('DAYTONA_BACKEND', 'daytona').lower() != 'local':
+            required_vars.append('DAYTONA_API_KEY')
         missing = [var for var in required_vars if not os.getenv(var)]
         
         if missing:
@@ -29,58 +37,322 @@ def load_environment() -> bool:
         print(f"⚠️ Error loading environment: {e}")
         return False
 
-def generate_code(prompt: str, model: str = "gpt-3.5-turbo") -> Optional[str]:
+# Prompt wrapper that asks the model for bare code
+SYSTEM_PROMPT = "You are a Python code generator. Generate clean, efficient, and correct code."
+
+USER_PROMPT_TEMPLATE = """
+        Generate Python code for the following request. Return ONLY the code, no explanations or comments unless they're part of the code.
+        
+        Request: {prompt}
+        """
+
+class ResponseCache:
+    """In-memory LRU + TTL cache of generated code keyed by prompt, model and temperature"""
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            max_entries: Entries kept before least recently used ones are
+                evicted, defaults to OPENAI_RESPONSE_CACHE_SIZE or 128
+            ttl: Seconds an entry stays valid, defaults to
+                OPENAI_RESPONSE_CACHE_TTL or 3600
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('OPENAI_RESPONSE_CACHE_SIZE', '128'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('OPENAI_RESPONSE_CACHE_TTL', '3600'))
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float) -> str:
+        payload = json.dumps({"prompt": prompt, "model": model, "temperature": temperature})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
+
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_async_clients: "weakref.WeakKeyDictionary[Any, Dict[Tuple[str, Optional[str]], Any]]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+def _get_client(clients: Dict[Tuple[str, Optional[str]], Any], is_async: bool) -> Optional[Any]:
+    """Return the client in clients for the current credentials, creating it on first use"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("⚠️ OpenAI API key not found in environment")
+        return None
+    
+    key = (api_key, os.getenv("OPENAI_BASE_URL"))
+    with _clients_lock:
+        client = clients.get(key)
+        if client is None:
+            # Deferred so parse_goose_input callers do not pay for the openai import
+            import openai
+            
+            client_class = openai.AsyncOpenAI if is_async else openai.OpenAI
+            client = client_class(api_key=api_key, base_url=key[1])
+            clients[key] = client
+        return client
+
+def get_openai_client() -> Optional[Any]:
+    """
+    Return the shared OpenAI client, reusing its connection pool across calls
+    
+    Returns:
+        OpenAI client or None if OPENAI_API_KEY is not set
+    """
+    return _get_client(_clients, is_async=False)
+
+def get_async_openai_client() -> Optional[Any]:
+    """
+    Return the shared AsyncOpenAI client of the running event loop
+    
+    Async connections are bound to the loop that opened them, so each loop
+    gets its own client.
+    
+    Returns:
+        AsyncOpenAI client or None if OPENAI_API_KEY is not set
+    """
+    import asyncio
+    
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+    return _get_client(clients, is_async=True)
+
+def _build_messages(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": USER_PROMPT_TEMPLATE.format(prompt=prompt)}
+    ]
+
+def _extract_code(response: Any) -> str:
+    """Return the code from a completion, removing markdown code block markers"""
+    content = response.choices[0].message.content
+    blocks = extract_code_blocks(content)
+    return blocks[0]["code"] if blocks else content.strip()
+
+def generate_code(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7,
+                  use_cache: bool = True) -> Optional[str]:
     """
     Generate code using OpenAI
     
     Args:
         prompt: The prompt asking for code
         model: The OpenAI model to use
+        temperature: Sampling temperature
+        use_cache: Return a previous response for the same prompt, model and
+            temperature instead of calling the API again
         
     Returns:
         Generated code or None if generation failed
     """
     try:
-        # Load API key from environment
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            print("⚠️ OpenAI API key not found in environment")
-            return None
-            
-        client = OpenAI(api_key=api_key)
+        key = ResponseCache.make_key(prompt, model, temperature)
+        if use_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                return cached
         
-        # Create a prompt that emphasizes code output
-        full_prompt = f"""
-        Generate Python code for the following request. Return ONLY the code, no explanations or comments unless they're part of the code.
-        
-        Request: {prompt}
-        """
+        client = get_openai_client()
+        if client is None:
+            return None
         
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": "You are a Python code generator. Generate clean, efficient, and correct code."},
-                {"role": "user", "content": full_prompt}
-            ],
-            temperature=0.7
+            messages=_build_messages(prompt),
+            temperature=temperature
         )
         
-        # Extract generated code
-        code = response.choices[0].message.content.strip()
+        code = _extract_code(response)
+        response_cache.put(key, code)
+        return code
+    except Exception as e:
+        print(f"⚠️ Error generating code: {e}")
+        return None
+
+async def generate_code_async(prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7,
+                              use_cache: bool = True) -> Optional[str]:
+    """
+    Asyncio counterpart of generate_code
+    
+    Args:
+        prompt: The prompt asking for code
+        model: The OpenAI model to use
+        temperature: Sampling temperature
+        use_cache: Return a previous response for the same prompt, model and
+            temperature instead of calling the API again
         
-        # Remove markdown code block markers if present
-        if code.startswith("```python"):
-            code = code[len("```python"):].strip()
-        if code.startswith("```"):
-            code = code[3:].strip()
-        if code.endswith("```"):
-            code = code[:-3].strip()
-            
+    Returns:
+        Generated code or None if generation failed
+    """
+    try:
+        key = ResponseCache.make_key(prompt, model, temperature)
+        if use_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        client = get_async_openai_client()
+        if client is None:
+            return None
+        
+        response = await client.chat.completions.create(
+            model=model,
+            messages=_build_messages(prompt),
+            temperature=temperature
+        )
+        
+        code = _extract_code(response)
+        response_cache.put(key, code)
         return code
     except Exception as e:
         print(f"⚠️ Error generating code: {e}")
         return None
 
+# Opening fence at the start of a line (at most 3 spaces in, as in CommonMark): three or
+# more backticks or tildes, then an optional info string whose first word is the language.
+# A backtick fence's info string cannot contain backticks.
+_FENCE_PATTERN = re.compile(r"^ {0,3}(`{3,}(?=[^`]*$)|~{3,})[ \t]*(\S*)")
+
+class CodeBlockParser:
+    """
+    Incremental extractor of fenced code blocks
+    
+    Text can be fed in pieces of any size, e.g. tokens as a model produces
+    them. Every line is examined once and only the unfinished last line is
+    buffered, so a block is available as soon as its closing fence arrives.
+    A block opens with a line starting with three or more backticks or
+    tildes, optionally followed by a language tag, and closes with a line
+    holding only a fence of the same character that is at least as long.
+    Fences may be indented by up to three spaces. A closing fence glued to
+    the end of the last code line is accepted if that line has no other
+    fence characters, so code such as print("```") is left alone.
+    """
+    def __init__(self, default_language: str = "python"):
+        """
+        Args:
+            default_language: Language of blocks without a tag
+        """
+        self.default_language = default_language
+        self.blocks: List[Dict[str, str]] = []
+        self._partial = ""
+        self._fence: Optional[str] = None
+        self._language = ""
+        self._lines: List[str] = []
+    
+    @property
+    def in_block(self) -> bool:
+        """True while inside an opened block that has not been closed yet"""
+        return self._fence is not None
+    
+    def feed(self, text: str) -> List[Dict[str, str]]:
+        """
+        Consume the next piece of text
+        
+        Returns:
+            The blocks closed by this piece, each {"language", "code"}
+        """
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        completed = []
+        for line in lines:
+            block = self._consume(line.rstrip("\r"))
+            if block is not None:
+                completed.append(block)
+        return completed
+    
+    def close(self) -> List[Dict[str, str]]:
+        """
+        Finish the input; a block still open is returned as if it had been closed
+        
+        Returns:
+            The blocks completed by the end of the input
+        """
+        completed = []
+        if self._partial:
+            line, self._partial = self._partial, ""
+            block = self._consume(line.rstrip("\r"))
+            if block is not None:
+                completed.append(block)
+        if self._fence is not None:
+            block = self._finish()
+            if block is not None:
+                completed.append(block)
+        return completed
+    
+    def _consume(self, line: str) -> Optional[Dict[str, str]]:
+        if self._fence is None:
+            match = _FENCE_PATTERN.match(line)
+            if match:
+                self._fence = match.group(1)
+                self._language = match.group(2)
+                self._lines = []
+            return None
+        
+        fence_char = self._fence[0]
+        stripped = line.rstrip()
+        indent = len(stripped) - len(stripped.lstrip(" "))
+        code = stripped.rstrip(fence_char)
+        run = len(stripped) - len(code)
+        if run >= len(self._fence):
+            if not code.strip():
+                if indent <= 3:
+                    return self._finish()
+            elif fence_char not in code:
+                # Closing fence glued to the last line of code
+                self._lines.append(code)
+                return self._finish()
+        self._lines.append(line)
+        return None
+    
+    def _finish(self) -> Optional[Dict[str, str]]:
+        """Close the current block; empty blocks are dropped"""
+        code = "\n".join(self._lines).strip()
+        block = {"language": self._language or self.default_language, "code": code} if code else None
+        if block is not None:
+            self.blocks.append(block)
+        self._fence = None
+        self._language = ""
+        self._lines = []
+        return block
+
+def extract_code_blocks(text: str, default_language: str = "python") -> List[Dict[str, str]]:
+    """
+    Return every fenced code block in text
+    
+    Args:
+        text: Markdown text, e.g. a model's message
+        default_language: Language of blocks without a tag
+        
+    Returns:
+        List of {"language", "code"} dictionaries in order of appearance
+    """
+    parser = CodeBlockParser(default_language)
+    return parser.feed(text) + parser.close()
+
 def parse_goose_input(input_text: str) -> Dict[str, Any]:
     """
     Parse input from Goose to extract code and language
@@ -89,32 +361,24 @@ def parse_goose_input(input_text: str) -> Dict[str, Any]:
         input_text: Text input from Goose
         
     Returns:
-        Dictionary with extracted code and language
+        Dictionary with the code and language of the first code block, and
+        "blocks" with every block. Text without code blocks is treated as
+        one block of Python.
     """
     try:
-        # Check for code block format
-        if "```" in input_text:
-            # Extract language and code from markdown code blocks
-            parts = input_text.split("```", 2)
-            if len(parts) >= 3:
-                lang_line = parts[1].strip().split("\n")[0]
-                language = lang_line if lang_line else "python"
-                code = "\n".join(parts[1].strip().split("\n")[1:]) if "\n" in parts[1] else ""
-            else:
-                language = "python"
-                code = input_text
-        else:
+        blocks = extract_code_blocks(input_text)
+        if not blocks:
             # Default to python if no code block markers
-            language = "python"
-            code = input_text
-            
+            blocks = [{"language": "python", "code": input_text.strip()}]
         return {
-            "code": code.strip(),
-            "language": language.strip()
+            "code": blocks[0]["code"],
+            "language": blocks[0]["language"],
+            "blocks": blocks
         }
     except Exception as e:
         print(f"⚠️ Error parsing input: {e}")
         return {
             "code": input_text,
-            "language": "python"
-        }
\ No newline at end of file
+            "language": "python",
+            "blocks": [{"language": "python", "code": input_text}]
+        }
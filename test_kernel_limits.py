@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test that a session kernel enforces the CPU limit per snippet
+
+Runs against the local backend, so no Daytona account is needed.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+# Run in a child process so the environment below configures a fresh manager
+SESSION_SCRIPT = """
+from daytona_goose.kernel import end_session, execute_in_session
+
+try:
+    first = execute_in_session("x = 41", session_id="limits")
+    busy = execute_in_session("while True:\\n    pass", session_id="limits")
+    after = execute_in_session("print(x + 1)", session_id="limits")
+finally:
+    end_session("limits")
+print("RESULT", first["exit_code"], busy["exit_code"], busy.get("timed_out"), repr(after["output"]))
+"""
+
+
+def test_session_cpu_limit():
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"),
+            DAYTONA_BACKEND="local",
+            DAYTONA_API_KEY="local",
+            DAYTONA_LOCAL_ROOT=os.path.join(scratch, "workspaces"),
+            DAYTONA_WORKSPACE_REGISTRY=os.path.join(scratch, "workspaces.json"),
+            DAYTONA_KERNEL_REGISTRY=os.path.join(scratch, "kernels.json"),
+            DAYTONA_KERNEL_PORT="18790",
+            DAYTONA_CPU_LIMIT="1",
+            DAYTONA_EXEC_TIMEOUT="30",
+        )
+        result = subprocess.run([sys.executable, "-c", SESSION_SCRIPT], env=env,
+                                capture_output=True, text=True, timeout=120)
+
+    lines = [line for line in result.stdout.splitlines() if line.startswith("RESULT ")]
+    assert lines, result.stdout + result.stderr
+    # The busy loop stops at the CPU limit and the kernel, with its state, survives
+    assert lines[-1] == "RESULT 0 152 True '42'", lines[-1]
+
+
+if __name__ == "__main__":
+    print("Testing session CPU limit...")
+    test_session_cpu_limit()
+    print("OK")